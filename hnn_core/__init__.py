@@ -14,7 +14,7 @@ from .network_models import (
     calcium_model,
 )
 from .cell import Cell
-from .cell_response import CellResponse, read_spikes
+from .cell_response import CellResponse, read_spikes, read_streamed_response
 from .cells_default import pyramidal, basket
 from .parallel_backends import MPIBackend, JoblibBackend
 from .hnn_io import (
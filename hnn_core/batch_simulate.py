@@ -13,7 +13,7 @@ from joblib import Parallel, delayed, parallel_config
 
 from .network import Network
 from .externals.mne import _validate_type, _check_option
-from .dipole import simulate_dipole
+from .dipole import simulate_dipole, _check_record_spec
 from .network_models import neymotin_2020_model
 
 
@@ -75,12 +75,14 @@ class BatchSimulate(object):
         If True, save calcium concentrations.
         Note, `save_outputs` must be True.
         Default: False.
-    record_vsec : {False, 'all', 'soma'}
+    record_vsec : {False, 'all', 'soma'} | dict
         Option to record voltages from all sections ('all'), or just
-        the soma ('soma'). Default: False.
-    record_isec : {False, 'all', 'soma'}
+        the soma ('soma'). A dict selects the cells and sections to record
+        from (see :func:`~hnn_core.simulate_dipole`). Default: False.
+    record_isec : {False, 'all', 'soma'} | dict
         Option to record voltages from all sections ('all'), or just
-        the soma ('soma'). Default: False.
+        the soma ('soma'). A dict selects the cells and sections to record
+        from (see :func:`~hnn_core.simulate_dipole`). Default: False.
     postproc : bool, optional
         If True, smoothing (``dipole_smooth_win``) and scaling
         (``dipole_scalefctr``) values are read from the parameter file, and
@@ -140,8 +142,8 @@ class BatchSimulate(object):
         _validate_type(save_voltages, types=(bool,), item_name="save_voltages")
         _validate_type(save_currents, types=(bool,), item_name="save_currents")
         _validate_type(save_calcium, types=(bool,), item_name="save_calcium")
-        _check_option("record_vsec", record_vsec, ["all", "soma", False])
-        _check_option("record_isec", record_isec, ["all", "soma", False])
+        _check_record_spec(net, record_vsec, "record_vsec")
+        _check_record_spec(net, record_isec, "record_isec")
         _validate_type(clear_cache, types=(bool,), item_name="clear_cache")
 
         if set_params is not None and not callable(set_params):
@@ -17,6 +17,24 @@ from .externals.mne import _validate_type, _check_option
 # Units for gbar: S/cm^2
 
 
+def _record_vector(ref, record_dt=None):
+    """Record a NEURON variable at every time step or every record_dt ms."""
+    if record_dt is None:
+        return h.Vector().record(ref)
+    return h.Vector().record(ref, record_dt)
+
+
+def _get_record_sections(record, section_names, item_name):
+    """Get the names of the sections to record from."""
+    if isinstance(record, str):
+        _check_option(item_name, record, ["all", "soma"])
+        return ["soma"] if record == "soma" else section_names
+    _validate_type(record, (list, tuple), item_name, "'all', 'soma' or list")
+    for sec_name in record:
+        _check_option(f"section of {item_name}", sec_name, section_names)
+    return list(record)
+
+
 def _get_cos_theta(sections, sec_name_apical):
     """Get cos(theta) to compute dipole along the apical dendrite."""
     a = np.array(sections[sec_name_apical].end_pts[1]) - np.array(
@@ -61,10 +79,10 @@ def _get_gaussian_connection(src_pos, target_pos, nc_dict, inplane_distance=1.0)
 
     Parameters
     ----------
-    src_pos : float
-        Position of source cell.
-    target_pos : float
-        Position of target cell.
+    src_pos : array-like, shape (3,) | (n_pairs, 3)
+        Position of source cell(s).
+    target_pos : array-like, shape (3,) | (n_pairs, 3)
+        Position of target cell(s).
     nc_dict : dict
         Dictionary with keys: pos_src, A_weight, A_delay, lamtha
         Defines the connection parameters
@@ -74,17 +92,18 @@ def _get_gaussian_connection(src_pos, target_pos, nc_dict, inplane_distance=1.0)
 
     Returns
     -------
-    weight : float
-        Weight of the synaptic connection.
-    delay : float
-        Delay of synaptic connection.
+    weight : float | array, shape (n_pairs,)
+        Weight of the synaptic connection(s).
+    delay : float | array, shape (n_pairs,)
+        Delay of synaptic connection(s).
 
     Notes
     -----
     Distance in xy plane is used for gaussian decay.
     """
-    x_dist = target_pos[0] - src_pos[0]
-    y_dist = target_pos[1] - src_pos[1]
+    src_pos, target_pos = np.asarray(src_pos), np.asarray(target_pos)
+    x_dist = target_pos[..., 0] - src_pos[..., 0]
+    y_dist = target_pos[..., 1] - src_pos[..., 1]
     cell_dist = np.sqrt(x_dist**2 + y_dist**2)
     scaled_lamtha = nc_dict["lamtha"] * inplane_distance
 
@@ -143,6 +162,19 @@ class _ArtificialCell:
         if gid is not None:
             self.gid = gid  # use setter method to check input argument gid
 
+    def _set_event_times(self, event_times):
+        """Replace the spike times played by this feed source.
+
+        Parameters
+        ----------
+        event_times : list
+            Spike times associated with the feed source for the next
+            simulation. Takes effect at the next ``h.finitialize()``.
+        """
+        self.nrn_eventvec.from_python(event_times)
+        # re-attach in case the vector data was reallocated
+        self.nrn_vecstim.play(self.nrn_eventvec)
+
     @property
     def gid(self):
         return self._gid
@@ -673,7 +705,17 @@ class Cell:
         # https://nrn.readthedocs.io/en/latest/python/modelspec/programmatic/topology/geometry.html?highlight=pt3dadd#pt3dadd  # noqa
         h.define_shape()
 
-    def build(self, sec_name_apical=None):
+    def _reset_voltages(self):
+        """Re-apply the initial voltage of each built section.
+
+        ``h.finitialize()`` is called without an initial voltage, so the
+        membrane potential left over from a previous simulation must be reset
+        before the same NEURON objects are simulated again.
+        """
+        for sec_name, sec in self._nrn_sections.items():
+            sec.v = self.sections[sec_name].v0
+
+    def build(self, sec_name_apical=None, record_dt=None):
         """Build cell in Neuron and insert dipole if applicable.
 
         Parameters
@@ -682,12 +724,15 @@ class Cell:
             If not None, a dipole will be inserted in this cell in alignment
             with this section. The section should belong to the apical dendrite
             of a pyramidal neuron.
+        record_dt : float | None
+            The interval (ms) at which the dipole is recorded. If None, it is
+            recorded at every integration time step. Default: None.
         """
         self._create_sections(self.sections, self.cell_tree)
         self._create_synapses(self.sections, self.synapses)
         self._set_biophysics(self.sections)
         if sec_name_apical in self._nrn_sections:
-            self._insert_dipole(sec_name_apical)
+            self._insert_dipole(sec_name_apical, record_dt)
         elif sec_name_apical is not None:
             raise ValueError(
                 f"sec_name_apical must be an existing "
@@ -704,13 +749,16 @@ class Cell:
     # 2. a list needs to be created with a Dipole (Point Process) in each
     #    section at position 1
     # In Cell() and not Pyr() for future possibilities
-    def _insert_dipole(self, sec_name_apical):
+    def _insert_dipole(self, sec_name_apical, record_dt=None):
         """Insert dipole into each section of this cell.
 
         Parameters
         ----------
         sec_name_apical : str
             The name of the section along which dipole moment is calculated.
+        record_dt : float | None
+            The interval (ms) at which the dipole is recorded. If None, it is
+            recorded at every integration time step.
         """
         self.dpl_vec = h.Vector(1)
         self.dpl_ref = self.dpl_vec._ref_x[0]
@@ -755,7 +803,7 @@ class Cell:
                 sect(pos).dipole.ztan = seg_lens_z[idx]
             # set the pp dipole's ztan value to the last value from seg_lens_z
             dpp.ztan = seg_lens_z[-1]
-        self.dipole = h.Vector().record(self.dpl_ref)
+        self.dipole = _record_vector(self.dpl_ref, record_dt)
 
     def create_tonic_bias(self, amplitude, t0, tstop, section="soma", loc=0.5):
         """Create tonic bias at defined section.
@@ -780,41 +828,43 @@ class Cell:
         stim.amp = amplitude
         self.tonic_biases.append(stim)
 
-    def record(self, record_vsec=False, record_isec=False, record_ca=False):
+    def record(
+        self, record_vsec=False, record_isec=False, record_ca=False, record_dt=None
+    ):
         """Record current and voltage from all sections
 
         Parameters
         ----------
-        record_vsec : 'all' | 'soma' | False
-            Option to record voltages from all sections ('all'), or just
-            the soma ('soma'). Default: False.
-        record_isec : 'all' | 'soma' | False
-            Option to record voltages from all sections ('all'), or just
-            the soma ('soma'). Default: False.
-        record_ca : 'all' | 'soma' | False
+        record_vsec : 'all' | 'soma' | list of str | False
+            Option to record voltages from all sections ('all'), just
+            the soma ('soma') or the sections in a list. Default: False.
+        record_isec : 'all' | 'soma' | list of str | False
+            Option to record voltages from all sections ('all'), just
+            the soma ('soma') or the sections in a list. Default: False.
+        record_ca : 'all' | 'soma' | list of str | False
             Option to record calcium concentration from all sections ('all'),
-            or just the soma ('soma'). Default: False.
+            just the soma ('soma') or the sections in a list. Default: False.
+        record_dt : float | None
+            The interval (ms) at which the traces are recorded. If None, they
+            are recorded at every integration time step. Default: None.
         """
 
         section_names = list(self.sections.keys())
 
         # Logic checks if just recording soma, sections, or both
-        if record_vsec == "soma":
-            self.vsec = dict.fromkeys(["soma"])
-        elif record_vsec == "all":
-            self.vsec = dict.fromkeys(section_names)
-
         if record_vsec:
+            self.vsec = dict.fromkeys(
+                _get_record_sections(record_vsec, section_names, "record_vsec")
+            )
             for sec_name in self.vsec:
-                self.vsec[sec_name] = h.Vector()
-                self.vsec[sec_name].record(self._nrn_sections[sec_name](0.5)._ref_v)
-
-        if record_isec == "soma":
-            self.isec = dict.fromkeys(["soma"])
-        elif record_isec == "all":
-            self.isec = dict.fromkeys(section_names)
+                self.vsec[sec_name] = _record_vector(
+                    self._nrn_sections[sec_name](0.5)._ref_v, record_dt
+                )
 
         if record_isec:
+            self.isec = dict.fromkeys(
+                _get_record_sections(record_isec, section_names, "record_isec")
+            )
             for sec_name in self.isec:
                 list_syn = [
                     key
@@ -824,22 +874,20 @@ class Cell:
                 self.isec[sec_name] = dict.fromkeys(list_syn)
 
                 for syn_name in self.isec[sec_name]:
-                    self.isec[sec_name][syn_name] = h.Vector()
-                    self.isec[sec_name][syn_name].record(
-                        self._nrn_synapses[syn_name]._ref_i
+                    self.isec[sec_name][syn_name] = _record_vector(
+                        self._nrn_synapses[syn_name]._ref_i, record_dt
                     )
 
         # calcium concentration
-        if record_ca == "soma":
-            self.ca = dict.fromkeys(["soma"])
-        elif record_ca == "all":
-            self.ca = dict.fromkeys(section_names)
-
         if record_ca:
+            self.ca = dict.fromkeys(
+                _get_record_sections(record_ca, section_names, "record_ca")
+            )
             for sec_name in self.ca:
                 if hasattr(self._nrn_sections[sec_name](0.5), "_ref_cai"):
-                    self.ca[sec_name] = h.Vector()
-                    self.ca[sec_name].record(self._nrn_sections[sec_name](0.5)._ref_cai)
+                    self.ca[sec_name] = _record_vector(
+                        self._nrn_sections[sec_name](0.5)._ref_cai, record_dt
+                    )
 
     def syn_create(self, secloc, **kwargs):
         """Create a NEURON synapse at the given section location.
@@ -944,7 +992,9 @@ class Cell:
         nc.threshold = threshold
         return nc
 
-    def parconnect_from_src(self, gid_presyn, nc_dict, postsyn, inplane_distance):
+    def parconnect_from_src(
+        self, gid_presyn, nc_dict, postsyn, inplane_distance, *, weight=None, delay=None
+    ):
         """Parallel receptor-centric connect FROM presyn TO this cell,
            based on GID.
 
@@ -953,13 +1003,21 @@ class Cell:
         gid_presyn : int
             The cell ID of the presynaptic neuron
         nc_dict : dict
-            Dictionary with keys: pos_src, A_weight, A_delay, lamtha
+            Dictionary with keys: pos_src, A_weight, A_delay, lamtha, threshold
             Defines the connection parameters
         postsyn : instance of h.Exp2Syn
             The postsynaptic cell object.
         inplane_distance : float
             The in plane-distance (in um) between pyramidal cell somas in the
             square grid.
+        weight : float | None
+            The weight of the connection. If None (default), it is computed
+            from the distance between ``nc_dict['pos_src']`` and this cell,
+            along with the delay. Only ``threshold`` of ``nc_dict`` is used
+            when both weight and delay are given.
+        delay : float | None
+            The delay (ms) of the connection, computed like ``weight`` if
+            None (default).
 
         Returns
         -------
@@ -972,9 +1030,11 @@ class Cell:
 
         # set props here.
         nc.threshold = nc_dict["threshold"]
-        nc.weight[0], nc.delay = _get_gaussian_connection(
-            nc_dict["pos_src"], self.pos, nc_dict, inplane_distance=inplane_distance
-        )
+        if weight is None or delay is None:
+            weight, delay = _get_gaussian_connection(
+                nc_dict["pos_src"], self.pos, nc_dict, inplane_distance=inplane_distance
+            )
+        nc.weight[0], nc.delay = weight, delay
 
         return nc
 
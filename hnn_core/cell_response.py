@@ -4,11 +4,17 @@
 #          Ryan Thorpe <ryan_thorpe@brown.edu>
 #          Mainak Jas <mjas@mgh.harvard.edu>
 
+import os.path as op
+import pickle
+import re
+from collections.abc import Mapping
 from glob import glob
 from warnings import warn
 
 import numpy as np
 
+from .externals.mne import _check_option
+from .check import _get_gid_type_table
 from .viz import plot_spikes_hist, plot_spikes_raster
 
 
@@ -55,13 +61,19 @@ class CellResponse(object):
     vsec : list (n_trials,) of dict
         Each element of the outer list is a trial.
         Dictionary indexed by gids containing voltages for cell sections.
+        The dictionaries are read-only views of one array holding the
+        voltages of all trials, and each voltage trace is a read-only array:
+        neither the dictionaries nor the traces can be modified in place.
+        Copy a trace, e.g., with ``np.array(trace)``, to modify it.
     isec : list (n_trials,) of dict
         Each element of the outer list is a trial.
         Dictionary indexed by gids containing currents for cell sections.
+        Like ``vsec``, these are read-only views with arrays of currents.
     ca : list (n_trials,) of dict, shape
         Each element of the outer list is a trial.
         Dictionary indexed by gids containing calcium concentration
-        for cell sections.
+        for cell sections. Like ``vsec``, these are read-only views with
+        arrays of concentrations.
     times : array-like, shape (n_times,)
         Array of time points for samples in continuous data.
         This includes vsoma and isoma.
@@ -122,9 +134,9 @@ class CellResponse(object):
         self._spike_times = spike_times
         self._spike_gids = spike_gids
         self._spike_types = spike_types
-        self._vsec = list()
-        self._isec = list()
-        self._ca = list()
+        self._vsec = _TraceData()
+        self._isec = _TraceData()
+        self._ca = _TraceData()
         if times is not None:
             if not isinstance(times, (list, np.ndarray)):
                 raise TypeError("'times' is an np.ndarray of simulation times")
@@ -151,9 +163,6 @@ class CellResponse(object):
             and self._vsec == other._vsec
             and self._isec == other._isec
             and self._ca == other._ca
-            and self.vsec == other.vsec
-            and self.isec == other.isec
-            and self.ca == other.ca
         )
 
     @property
@@ -190,15 +199,15 @@ class CellResponse(object):
 
     @property
     def vsec(self):
-        return self._vsec
+        return self._vsec._get_trials()
 
     @property
     def isec(self):
-        return self._isec
+        return self._isec._get_trials()
 
     @property
     def ca(self):
-        return self._ca
+        return self._ca._get_trials()
 
     @property
     def times(self):
@@ -226,15 +235,16 @@ class CellResponse(object):
                         "gid_ranges should contain only disjoint sets of gid values"
                     )
 
+        gid_types, gid_type_idxs, _ = _get_gid_type_table(gid_ranges)
+        # the type index -1 of gids without a type selects the trailing ""
+        type_names = np.array(gid_types + [""], dtype="<U36")
         spike_types = list()
         for trial_idx in range(len(self._spike_times)):
-            spike_types_trial = np.empty_like(
-                self._spike_times[trial_idx], dtype="<U36"
-            )
-            for gidtype, gids in gid_ranges.items():
-                spike_gids_mask = np.isin(self._spike_gids[trial_idx], gids)
-                spike_types_trial[spike_gids_mask] = gidtype
-            spike_types += [list(spike_types_trial)]
+            spike_gids = np.asarray(self._spike_gids[trial_idx], dtype=int)
+            valid = (spike_gids >= 0) & (spike_gids < len(gid_type_idxs))
+            type_idxs = np.full(spike_gids.shape, -1, dtype=int)
+            type_idxs[valid] = gid_type_idxs[spike_gids[valid]]
+            spike_types += [list(type_names[type_idxs])]
         self._spike_types = spike_types
 
     def mean_rates(self, tstart, tstop, gid_ranges, mean_type="all"):
@@ -443,19 +453,19 @@ class CellResponse(object):
         cell_response_data["spike_times"] = self.spike_times
         cell_response_data["spike_gids"] = self.spike_gids
         cell_response_data["spike_types"] = self.spike_types
-        vsec_data = self.vsec
+        vsec_data = self._vsec._to_trials()
         cell_response_data["vsec"] = list()
         for trial in vsec_data:
             # Turn `int` gid keys into string values for hdf5 format
             trial = dict((str(key), val) for key, val in trial.items())
             cell_response_data["vsec"].append(trial)
-        isec_data = self.isec
+        isec_data = self._isec._to_trials()
         cell_response_data["isec"] = list()
         for trial in isec_data:
             # Turn `int` gid keys into string values for hdf5 format
             trial = dict((str(key), val) for key, val in trial.items())
             cell_response_data["isec"].append(trial)
-        ca_data = self.ca
+        ca_data = self._ca._to_trials()
         cell_response_data["ca"] = list()
         for trial in ca_data:
             # Turn `int` gid keys into string values for hdf5 format
@@ -577,3 +587,253 @@ def read_spikes(fname, gid_ranges=None):
         cell_response.update_types(gid_ranges)
 
     return cell_response
+
+
+def read_streamed_response(record_dir):
+    """Read the cell response written to disk during a simulation.
+
+    Parameters
+    ----------
+    record_dir : path-like
+        The directory passed as ``record_dir`` to
+        :func:`~hnn_core.simulate_dipole`.
+
+    Returns
+    -------
+    cell_response : CellResponse
+        The spikes and the recorded voltages, currents and calcium
+        concentrations of all trials.
+    """
+    fnames = glob(op.join(str(record_dir), "trial_*_rank_*.pkl"))
+    if len(fnames) == 0:
+        raise ValueError(f"No recordings found in {record_dir}")
+    ranks_by_trial = dict()
+    for fname in fnames:
+        trial_idx, rank = re.findall(r"trial_(\d+)_rank_(\d+)\.pkl$", fname)[0]
+        ranks_by_trial.setdefault(int(trial_idx), list()).append(int(rank))
+    if sorted(ranks_by_trial) != list(range(len(ranks_by_trial))):
+        raise ValueError(f"Recordings of some trials are missing in {record_dir}")
+
+    spike_times, spike_gids = list(), list()
+    packed = {key: list() for key in ("vsec", "isec", "ca")}
+    for trial_idx in range(len(ranks_by_trial)):
+        trial_spike_times, trial_spike_gids = list(), list()
+        trial_packed = {key: (dict(), list()) for key in packed}
+        # the traces and spikes are combined in the order of the ranks, as
+        # when they are gathered at the end of the simulation
+        for rank in sorted(ranks_by_trial[trial_idx]):
+            fname = op.join(str(record_dir), f"trial_{trial_idx}_rank_{rank}")
+            with open(f"{fname}.pkl", "rb") as f:
+                recording = pickle.load(f)
+            if rank == 0:
+                metadata = recording
+            trial_spike_times.append(recording["spike_times"])
+            trial_spike_gids.append(recording["spike_gids"])
+            chunks = [
+                np.load(f"{fname}_chunk_{chunk_idx}.npz")
+                for chunk_idx in range(recording["n_chunks"])
+            ]
+            for key, (index, data) in trial_packed.items():
+                offset = sum(len(rank_data) for rank_data in data)
+                index.update(_offset_rows(recording[key], offset))
+                data.append(np.concatenate([chunk[key] for chunk in chunks], axis=1))
+        spike_times.append(np.concatenate(trial_spike_times).tolist())
+        spike_gids.append(np.concatenate(trial_spike_gids).tolist())
+        for key, (index, data) in trial_packed.items():
+            packed[key].append((index, np.concatenate(data)))
+
+    cell_response = CellResponse(
+        cell_type_names=metadata["cell_type_names"],
+        spike_times=spike_times,
+        spike_gids=spike_gids,
+        spike_types=[list() for _ in spike_times],
+        times=metadata["times"],
+    )
+    cell_response.update_types(metadata["gid_ranges"])
+    cell_response._vsec = _TraceData._from_packed(packed["vsec"])
+    cell_response._isec = _TraceData._from_packed(packed["isec"])
+    cell_response._ca = _TraceData._from_packed(packed["ca"])
+    return cell_response
+
+
+def _offset_rows(index, offset):
+    """Shift the rows of traces in an index by an offset."""
+    return {
+        key: _offset_rows(row, offset) if isinstance(row, dict) else row + offset
+        for key, row in index.items()
+    }
+
+
+def _unpack_traces(index, data):
+    """Unpack traces copied from NEURON into nested dicts of lists.
+
+    Parameters
+    ----------
+    index : dict
+        Nested dicts (gid -> section name [-> synapse name]) of the row of
+        each trace in ``data``.
+    data : array, shape (n_traces, n_times)
+        The samples of all traces.
+
+    Returns
+    -------
+    traces : dict
+        Nested dicts like ``index``, with the samples of each trace as list.
+    """
+    return {
+        key: _unpack_traces(row, data) if isinstance(row, dict) else data[row].tolist()
+        for key, row in index.items()
+    }
+
+
+def _iter_trace_rows(index, path=()):
+    """Yield the path of keys and the row of each trace in an index."""
+    for key, row in index.items():
+        if isinstance(row, dict):
+            yield from _iter_trace_rows(row, path + (key,))
+        else:
+            yield path + (key,), row
+
+
+class _TraceData(object):
+    """Columnar storage of the traces recorded in all trials.
+
+    The samples of all traces are kept in one array, and a nested dict index
+    shared by the trials maps each trace to its row.
+
+    Parameters
+    ----------
+    index : dict | None
+        Nested dicts (gid -> section name [-> synapse name]) of the row of
+        each trace in ``data``.
+    data : array, shape (n_trials, n_traces, n_times) | None
+        The samples of all traces in all trials.
+    dtype : 'float64' | 'float32'
+        The data type the samples are stored in. Storing them in single
+        precision halves the memory of long recordings of many sections,
+        at the cost of rounding the recorded values. Defaults to 'float64'.
+    """
+
+    def __init__(self, index=None, data=None, dtype="float64"):
+        _check_option("dtype", dtype, ["float64", "float32"])
+        if index is None:
+            index = dict()
+        if data is None:
+            data = np.empty((0, 0, 0))
+        self.index = index
+        self.data = np.asarray(data, dtype=dtype)
+
+    @classmethod
+    def _from_packed(cls, packed, dtype="float64"):
+        """Stack the (index, data) of traces packed in each trial.
+
+        Traces are rearranged to the rows of the index of the first trial.
+        """
+        if len(packed) == 0:
+            return cls(dtype=dtype)
+        index = packed[0][0]
+        paths = [path for path, _ in _iter_trace_rows(index)]
+        trials_data = list()
+        for trial_index, trial_data in packed:
+            if trial_index != index:
+                rows = dict(_iter_trace_rows(trial_index))
+                if sorted(rows) != sorted(paths):
+                    raise ValueError("All trials must record the same traces")
+                trial_data = trial_data[[rows[path] for path in paths]]
+            trials_data.append(trial_data)
+        return cls(index, np.stack(trials_data), dtype=dtype)
+
+    @classmethod
+    def _from_trials(cls, trials, n_times, dtype="float64"):
+        """Pack nested dicts of traces of each trial, e.g., read from file."""
+
+        def _get_index(traces, vectors):
+            index = dict()
+            for key, trace in traces.items():
+                if isinstance(trace, Mapping):
+                    index[key] = _get_index(trace, vectors)
+                else:
+                    index[key] = len(vectors)
+                    vectors.append(trace)
+            return index
+
+        packed = list()
+        for trial in trials:
+            vectors = list()
+            index = _get_index(trial, vectors)
+            data = np.empty((len(vectors), n_times), dtype=dtype)
+            for row, trace in zip(data, vectors):
+                row[:] = trace
+            packed.append((index, data))
+        return cls._from_packed(packed, dtype=dtype)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __eq__(self, other):
+        if not isinstance(other, _TraceData):
+            return NotImplemented
+        return (
+            len(self) == len(other)
+            and self.index == other.index
+            and np.array_equal(self.data, other.data)
+        )
+
+    def _get_trials(self):
+        """The traces of each trial as nested dict views."""
+        return [_TraceView(self.index, trial_data) for trial_data in self.data]
+
+    def _to_trials(self):
+        """The traces of each trial as nested dicts of lists."""
+        return [_unpack_traces(self.index, trial_data) for trial_data in self.data]
+
+
+class _TraceView(Mapping):
+    """Read-only nested dict view of the traces of a trial.
+
+    The traces are served as read-only array views of ``data``.
+
+    Parameters
+    ----------
+    index : dict
+        Nested dicts of the row of each trace in ``data``.
+    data : array, shape (n_traces, n_times)
+        The samples of the traces of the trial.
+    """
+
+    def __init__(self, index, data):
+        self._index = index
+        self._data = data
+
+    def __getitem__(self, key):
+        row = self._index[key]
+        if isinstance(row, dict):
+            return _TraceView(row, self._data)
+        trace = self._data[row]
+        trace.flags.writeable = False
+        return trace
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        if self.keys() != other.keys():
+            return False
+        for key, trace in self.items():
+            other_trace = other[key]
+            if isinstance(trace, Mapping) != isinstance(other_trace, Mapping):
+                return False
+            if isinstance(trace, Mapping):
+                if trace != other_trace:
+                    return False
+            elif not np.array_equal(trace, other_trace):
+                return False
+        return True
+
+    def __repr__(self):
+        return repr(dict(self.items()))
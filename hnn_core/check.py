@@ -2,6 +2,8 @@
 
 # Authors: Nick Tolley <nicholas_tolley@brown.edu>
 
+import numpy as np
+
 from .params import _long_name
 from .externals.mne import _validate_type, _check_option
 
@@ -43,6 +45,39 @@ def _gid_to_type(gid, gid_ranges):
             return gidtype
 
 
+def _get_gid_type_table(gid_ranges):
+    """Lookup table of gids to the index of their type in gid_ranges.
+
+    Parameters
+    ----------
+    gid_ranges : dict of range | dict of list of int
+        The gids of each cell or drive type.
+
+    Returns
+    -------
+    gid_types : list of str
+        The types in gid_ranges.
+    gid_type_idxs : array of int, shape (max_gid + 1,)
+        The index into gid_types of the type of each gid, -1 for the gids
+        without a type. As in _gid_to_type, a gid in several types is of the
+        first one.
+    type_offsets : array of int, shape (n_types,)
+        The first gid of each type, -1 for types without gids.
+    """
+    gid_types = list(gid_ranges.keys())
+    n_gids = max(
+        (max(gids) + 1 for gids in gid_ranges.values() if len(gids)), default=0
+    )
+    gid_type_idxs = np.full(n_gids, -1, dtype=int)
+    type_offsets = np.full(len(gid_types), -1, dtype=int)
+    for type_idx in reversed(range(len(gid_types))):
+        gids = gid_ranges[gid_types[type_idx]]
+        if len(gids):
+            gid_type_idxs[np.asarray(gids, dtype=int)] = type_idx
+            type_offsets[type_idx] = gids[0]
+    return gid_types, gid_type_idxs, type_offsets
+
+
 def _string_input_to_list(input_str, valid_str, arg_name):
     """Convert input strings to list"""
     if input_str is None:
@@ -12,7 +12,7 @@ import numpy as np
 from h5io import write_hdf5, read_hdf5
 from scipy import signal
 
-from .externals.mne import _check_option
+from .externals.mne import _check_option, _validate_type
 from .utils import _savgol_filter, smooth_waveform
 from .viz import plot_dipole, plot_psd, plot_tfr_morlet
 
@@ -27,6 +27,10 @@ def simulate_dipole(
     record_ca=False,
     postproc=False,
     verbose=True,
+    record_dir=None,
+    record_dt=None,
+    record_imem=False,
+    record_dtype="float64",
 ):
     """Simulate a dipole given the experiment parameters.
 
@@ -42,15 +46,27 @@ def simulate_dipole(
     n_trials : int | None
         The number of trials to simulate. If None, the 'N_trials' value
         of the ``params`` used to create ``net`` is used (must be >0)
-    record_vsec : 'all' | 'soma' | False
+    record_vsec : 'all' | 'soma' | dict | False
         Option to record voltages from all sections ('all'), or just
-        the soma ('soma'). Default: False.
-    record_isec : 'all' | 'soma' | False
+        the soma ('soma') of every cell. A dict selects the cells and
+        sections to record from, with the optional keys:
+
+        - ``'cell_types'``: str | list of str | None, the cell types.
+        - ``'gids'``: int | list of int | None, the gids of the cells.
+        - ``'sections'``: 'all' | 'soma' | str | list of str, the sections
+          of each selected cell. Sections missing from a cell are skipped.
+
+        Keys that are missing or None do not restrict the selection. E.g.,
+        ``dict(cell_types='L5_pyramidal', sections='apical_tuft')``.
+        Default: False.
+    record_isec : 'all' | 'soma' | dict | False
         Option to record synaptic currents from all sections ('all'), or just
-        the soma ('soma'). Default: False.
-    record_ca : 'all' | 'soma' | False
+        the soma ('soma'). A dict selects the cells and sections like for
+        ``record_vsec``. Default: False.
+    record_ca : 'all' | 'soma' | dict | False
         Option to record calcium concentration from all sections ('all'),
-        or just the soma ('soma'). Default: False.
+        or just the soma ('soma'). A dict selects the cells and sections
+        like for ``record_vsec``. Default: False.
     postproc : bool
         If True, smoothing (``dipole_smooth_win``) and scaling
         (``dipole_scalefctr``) values are read from the parameter file, and
@@ -61,6 +77,32 @@ def simulate_dipole(
         :meth:`~hnn_core.dipole.Dipole.scale` methods instead. Default: False.
     verbose : bool
         If True, print build steps and simulation progress to console. Default: True.
+    record_dir : path-like | None
+        If not None, the voltages, currents and calcium concentrations
+        recorded by each process are written to files in this directory at
+        regular intervals during the simulation, instead of being kept in
+        memory and gathered at its end. These recordings are then not part of
+        ``net.cell_response``, use :func:`~hnn_core.read_streamed_response`
+        to read them. The directory must be empty or not exist.
+        Default: None.
+    record_dt : float | None
+        The interval (ms) at which the voltages, currents, calcium
+        concentrations, dipoles and extracellular potentials are recorded.
+        Must be a multiple of ``dt``. If None, they are recorded at every
+        integration time step ``dt``. Note that the last time point (tstop)
+        is not recorded at a coarser interval. Default: None.
+    record_imem : 'segment' | 'section' | False
+        Option to record the net transmembrane currents of all segments of
+        the cells ('segment'), or their sums over each section ('section').
+        They are stored in ``net.membrane_currents`` (see
+        :class:`~hnn_core.extracellular.MembraneCurrents`), from which the
+        potentials of any electrode array can be computed after the
+        simulation. Default: False.
+    record_dtype : 'float64' | 'float32'
+        The data type the recorded voltages, currents and calcium
+        concentrations are stored in ``net.cell_response`` with. Single
+        precision halves their memory, at the cost of rounding the recorded
+        values. Default: 'float64'.
 
     Returns
     -------
@@ -109,17 +151,36 @@ def simulate_dipole(
     net._instantiate_drives(n_trials=n_trials, tstop=tstop)
     net._reset_rec_arrays()
 
-    _check_option("record_vsec", record_vsec, ["all", "soma", False])
+    net._params["record_vsec"] = _check_record_spec(net, record_vsec, "record_vsec")
+    net._params["record_isec"] = _check_record_spec(net, record_isec, "record_isec")
+    net._params["record_ca"] = _check_record_spec(net, record_ca, "record_ca")
 
-    net._params["record_vsec"] = record_vsec
+    _validate_type(record_dir, ("path-like", None), "record_dir")
+    if record_dir is not None:
+        record_dir = os.path.abspath(record_dir)
+        if os.path.isdir(record_dir) and os.listdir(record_dir):
+            raise ValueError(f"record_dir must be an empty directory. Got {record_dir}")
+        os.makedirs(record_dir, exist_ok=True)
 
-    _check_option("record_isec", record_isec, ["all", "soma", False])
+    net._record_dir = record_dir
 
-    net._params["record_isec"] = record_isec
+    _validate_type(record_dt, ("numeric", None), "record_dt")
+    if record_dt is not None:
+        record_step = record_dt / dt
+        if round(record_step) < 1 or not np.isclose(record_step, round(record_step)):
+            raise ValueError(
+                f"record_dt must be a multiple of dt. Got record_dt={record_dt} "
+                f"and dt={dt}"
+            )
+        # recording at every integration time step is the default
+        record_dt = float(record_dt) if round(record_step) > 1 else None
+    net._params["record_dt"] = record_dt
 
-    _check_option("record_ca", record_ca, ["all", "soma", False])
+    _check_option("record_imem", record_imem, ["segment", "section", False])
+    net._params["record_imem"] = record_imem
 
-    net._params["record_ca"] = record_ca
+    _check_option("record_dtype", record_dtype, ["float64", "float32"])
+    net._params["record_dtype"] = record_dtype
 
     net._tstop = tstop
 
@@ -140,6 +201,75 @@ def simulate_dipole(
     return dpls
 
 
+def _check_record_spec(net, record, item_name):
+    """Check what to record from the cells of a network.
+
+    Parameters
+    ----------
+    net : Network object
+        The network to record from.
+    record : 'all' | 'soma' | dict | False
+        The recording option (see :func:`~hnn_core.simulate_dipole`).
+    item_name : str
+        The name of the option, used in error messages.
+
+    Returns
+    -------
+    record : 'all' | 'soma' | dict | False
+        The recording option. A dict has the keys 'cell_types' and 'gids'
+        (sorted lists or None) and 'sections' ('all', 'soma' or a list).
+    """
+    if not isinstance(record, dict):
+        _check_option(item_name, record, ["all", "soma", False])
+        return record
+
+    for key in record:
+        _check_option(f"key of {item_name}", key, ["cell_types", "gids", "sections"])
+
+    cell_types = record.get("cell_types")
+    _validate_type(cell_types, (str, list, tuple, None), f"{item_name}['cell_types']")
+    if isinstance(cell_types, str):
+        cell_types = [cell_types]
+    if cell_types is not None:
+        for cell_type in cell_types:
+            _check_option(
+                f"cell type of {item_name}", cell_type, list(net.cell_types)
+            )
+        cell_types = [name for name in net.cell_types if name in cell_types]
+
+    gids = record.get("gids")
+    if gids is not None:
+        gids = np.unique(np.atleast_1d(gids))
+        if not np.issubdtype(gids.dtype, np.integer):
+            raise TypeError(f"{item_name}['gids'] must be int or a list of int")
+        cell_gids = np.concatenate(
+            [np.array(net.gid_ranges[name]) for name in net.cell_types]
+        )
+        if not np.all(np.isin(gids, cell_gids)):
+            raise ValueError(
+                f"{item_name}['gids'] must be gids of cells in the network. "
+                f"Got {gids[~np.isin(gids, cell_gids)].tolist()}"
+            )
+        gids = gids.tolist()
+
+    sections = record.get("sections", "all")
+    _validate_type(sections, (str, list, tuple), f"{item_name}['sections']")
+    if isinstance(sections, str) and sections not in ("all", "soma"):
+        sections = [sections]
+    if not isinstance(sections, str):
+        selected_types = net.cell_types if cell_types is None else cell_types
+        section_names = set()
+        for name in selected_types:
+            section_names.update(net.cell_types[name]["cell_object"].sections)
+        for sec_name in sections:
+            _check_option(
+                f"section of {item_name}", sec_name, sorted(section_names)
+            )
+        sections = list(sections)
+
+    return dict(cell_types=cell_types, gids=gids, sections=sections)
+
+
 def _read_dipole_txt(fname, extension=".txt"):
     """Read dipole values from a txt file and create a Dipole instance.
 
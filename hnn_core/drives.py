@@ -4,6 +4,10 @@
 #          Sam Neymotin <samnemo@gmail.com>
 #          Christopher Bailey <bailey.cj@gmail.com>
 
+import operator
+from collections.abc import Sequence
+from copy import deepcopy
+
 import numpy as np
 
 from .params import (
@@ -307,10 +311,62 @@ def _drive_cell_event_times(
     event_times : list
         The event times at which spikes occur.
     """
-    prng, prng2 = _get_prng(
-        seed=event_seed + trial_idx * trial_seed_offset, gid=drive_cell_gid
+    events = _drive_event_times(
+        drive_type,
+        dynamics,
+        tstop,
+        target_types=[[target_type]],
+        trial_idxs=[trial_idx],
+        drive_cell_gids=[drive_cell_gid],
+        event_seed=event_seed,
+        trial_seed_offset=trial_seed_offset,
     )
+    return events[0][0]
+
+
+def _drive_event_times(
+    drive_type,
+    dynamics,
+    tstop,
+    target_types,
+    trial_idxs=(0,),
+    drive_cell_gids=None,
+    event_seed=0,
+    trial_seed_offset=0,
+):
+    """Generate event times for all artificial cells of a drive and trials.
+
+    The random state of each drive cell is seeded exactly as in
+    :func:`_drive_cell_event_times`, so that both produce the same events.
 
+    Parameters
+    ----------
+    drive_type : str
+        The drive type (see :func:`_drive_cell_event_times`).
+    dynamics : dict
+        Parameters of the event time dynamics to simulate
+    tstop : float
+        The simulation stop time (ms).
+    target_types : list of list of str
+        For each drive cell, the cell types it creates event times for. Use
+        ['any'] for a drive cell that is non-specific.
+    trial_idxs : array-like of int
+        The indices of the trials to create event times for.
+    drive_cell_gids : array-like of int | None
+        The gids of the drive cells (used for seeding). If None, the drive
+        cells are numbered from 0.
+    event_seed : int
+        Optional initial seed for random number generator.
+    trial_seed_offset : int
+        Seed is incremented by this amount for each trial.
+
+    Returns
+    -------
+    events : list of list of list
+        The event times (n_trials x n_event_times x n_events), with one list
+        of event times per drive cell and target type in the order of
+        target_types.
+    """
     # check drive name validity, allowing substring matches
     valid_drives = ["evoked", "poisson", "gaussian", "bursty", "spike_train"]
     # NB check if drive_type has a valid substring, not vice versa
@@ -320,67 +376,202 @@ def _drive_cell_event_times(
     elif len(matches) > 1:
         raise ValueError("Ambiguous external drive: %s" % drive_type)
 
-    event_times = np.array([])
-    if drive_type == "poisson":
-        if target_type == "any":
-            rate_constant = dynamics["rate_constant"]
-        elif target_type in dynamics["rate_constant"]:
-            rate_constant = dynamics["rate_constant"][target_type]
-        # XXX required for legacy mode since drive cells are created in network
-        # for which rate constant may not be defined
-        if target_type == "any" or target_type in dynamics["rate_constant"]:
-            event_times = _create_extpois(
-                t0=dynamics["tstart"],
-                T=dynamics["tstop"],
-                lamtha=rate_constant,
-                prng=prng,
+    if drive_cell_gids is None:
+        drive_cell_gids = range(len(target_types))
+
+    if drive_type == "spike_train":
+        # the event times are explicitly provided in dynamics and are the
+        # same for every trial
+        cell_event_times = _get_spike_train_event_times(dynamics, drive_cell_gids)
+        trial_events = [
+            list(event_times)
+            for event_times, cell_target_types in zip(cell_event_times, target_types)
+            for _ in cell_target_types
+        ]
+        return [[list(ev) for ev in trial_events] for _ in trial_idxs]
+
+    events = list()
+    for trial_idx in trial_idxs:
+        seed = event_seed + trial_idx * trial_seed_offset
+        if drive_type == "bursty" and dynamics["tstart_std"] > 0.0:
+            # the start time is drawn from a random state that does not
+            # depend on the gid and is thus shared by all drive cells
+            tstart = np.random.RandomState(seed).normal(
+                dynamics["tstart"], dynamics["tstart_std"]
             )
-    elif drive_type == "evoked" or drive_type == "gaussian":
-        event_times = _create_gauss(
-            mu=dynamics["mu"],
-            sigma=dynamics["sigma"],
-            numspikes=dynamics["numspikes"],
-            prng=prng,
+        elif drive_type == "bursty":
+            tstart = dynamics["tstart"]
+
+        trial_events = list()
+        for drive_cell_gid, cell_target_types in zip(drive_cell_gids, target_types):
+            for target_type in cell_target_types:
+                prng = np.random.RandomState(seed + drive_cell_gid)
+                event_times = np.array([])
+                if drive_type == "poisson":
+                    # XXX required for legacy mode since drive cells are
+                    # created in network for which rate constant may not be
+                    # defined
+                    if target_type == "any":
+                        rate_constant = dynamics["rate_constant"]
+                    elif target_type in dynamics["rate_constant"]:
+                        rate_constant = dynamics["rate_constant"][target_type]
+                    else:
+                        rate_constant = None
+                    if rate_constant is not None:
+                        event_times = _create_extpois(
+                            t0=dynamics["tstart"],
+                            T=dynamics["tstop"],
+                            lamtha=rate_constant,
+                            prng=prng,
+                        )
+                elif drive_type == "evoked" or drive_type == "gaussian":
+                    event_times = _create_gauss(
+                        mu=dynamics["mu"],
+                        sigma=dynamics["sigma"],
+                        numspikes=dynamics["numspikes"],
+                        prng=prng,
+                    )
+                elif drive_type == "bursty":
+                    event_times = _create_bursty_input(
+                        t0=tstart,
+                        t0_stdev=0.0,
+                        tstop=dynamics["tstop"],
+                        f_input=dynamics["burst_rate"],
+                        events_jitter_std=dynamics["burst_std"],
+                        events_per_cycle=dynamics["numspikes"],
+                        cycle_events_isi=dynamics["spike_isi"],
+                        prng=prng,
+                        prng2=None,
+                    )
+
+                # brute force remove non-zero times. Might result in fewer
+                # vals than desired
+                # values MUST be sorted for VecStim()!
+                event_times = event_times[
+                    np.logical_and(event_times > 0, event_times <= tstop)
+                ]
+                event_times.sort()
+                trial_events.append(event_times.tolist())
+        events.append(trial_events)
+
+    return events
+
+
+class _DriveEvents(Sequence):
+    """Event times of the drive cells of a drive, created on demand per trial.
+
+    Behaves like the nested list (n_trials x n_event_times x n_events)
+    returned by :func:`_drive_event_times`, but only stores what is needed to
+    generate the event times of a trial. Since the random state of every drive
+    cell is seeded from the trial index, the event times of a trial are the
+    same whenever they are generated. The event times of the last trial
+    accessed are kept.
+
+    Parameters
+    ----------
+    drive_type : str
+        The drive type (see :func:`_drive_cell_event_times`).
+    dynamics : dict
+        Parameters of the event time dynamics to simulate. A copy is stored.
+    tstop : float
+        The simulation stop time (ms).
+    target_types : list of list of str
+        For each drive cell, the cell types it creates event times for.
+    n_trials : int
+        The number of trials.
+    event_seed : int
+        The initial seed for random number generator.
+    trial_seed_offset : int
+        Seed is incremented by this amount for each trial.
+    """
+
+    def __init__(
+        self,
+        drive_type,
+        dynamics,
+        tstop,
+        target_types,
+        n_trials,
+        event_seed,
+        trial_seed_offset,
+    ):
+        self._kwargs = dict(
+            drive_type=drive_type,
+            dynamics=deepcopy(dynamics),
+            tstop=tstop,
+            target_types=target_types,
+            event_seed=event_seed,
+            trial_seed_offset=trial_seed_offset,
         )
-    elif drive_type == "bursty":
-        event_times = _create_bursty_input(
-            t0=dynamics["tstart"],
-            t0_stdev=dynamics["tstart_std"],
-            tstop=dynamics["tstop"],
-            f_input=dynamics["burst_rate"],
-            events_jitter_std=dynamics["burst_std"],
-            events_per_cycle=dynamics["numspikes"],
-            cycle_events_isi=dynamics["spike_isi"],
-            prng=prng,
-            prng2=prng2,
+        self._n_trials = n_trials
+        self._trial_idx = None
+        self._trial_events = None
+
+    def _get_trial_events(self, trial_idx):
+        if trial_idx != self._trial_idx:
+            self._trial_events = _drive_event_times(
+                trial_idxs=[trial_idx], **self._kwargs
+            )[0]
+            self._trial_idx = trial_idx
+        return self._trial_events
+
+    def __getitem__(self, trial_idx):
+        if isinstance(trial_idx, slice):
+            return [self[idx] for idx in range(*trial_idx.indices(len(self)))]
+        trial_idx = operator.index(trial_idx)
+        if trial_idx < 0:
+            trial_idx += len(self)
+        if not 0 <= trial_idx < len(self):
+            raise IndexError(
+                f"Trial index out of range. Got {trial_idx} for "
+                f"{len(self)} trials"
+            )
+        return self._get_trial_events(trial_idx)
+
+    def __len__(self):
+        return self._n_trials
+
+    def __eq__(self, other):
+        if not isinstance(other, (_DriveEvents, list)):
+            return NotImplemented
+        if (
+            isinstance(other, _DriveEvents)
+            and self._n_trials == other._n_trials
+            and self._kwargs == other._kwargs
+        ):
+            return True
+        return len(self) == len(other) and all(
+            trial_events == other_events
+            for trial_events, other_events in zip(self, other)
         )
-    # Add this new case for spike_train drives
-    elif drive_type == "spike_train":
-        # For spike_train, the event times are explicitly provided in dynamics
-        if "times" not in dynamics or "gids" not in dynamics:
-            return []
 
-        # Get all spike times from the specified drive cell
-        times = dynamics["times"]
-        gids = dynamics["gids"]
+    def __repr__(self):
+        return f"<{self.__class__.__name__} | {len(self)} trials>"
 
-        # Extract only spikes from this drive cell GID
-        if times and gids:
-            mask = np.array(gids) == drive_cell_gid
-            cell_event_times = np.array(times)[mask].tolist()
-        else:
-            cell_event_times = []
+    def __getstate__(self):
+        # the cached event times are not transferred to other processes
+        state = self.__dict__.copy()
+        state["_trial_idx"] = None
+        state["_trial_events"] = None
+        return state
 
-        return cell_event_times
 
-    # brute force remove non-zero times. Might result in fewer vals
-    # than desired
-    # values MUST be sorted for VecStim()!
-    event_times = event_times[np.logical_and(event_times > 0, event_times <= tstop)]
-    event_times.sort()
-    event_times = event_times.tolist()
+def _get_spike_train_event_times(dynamics, drive_cell_gids):
+    """Split the spike times of a spike train drive by drive cell."""
+    # the event times are only defined if both times and gids are given
+    if "times" not in dynamics or "gids" not in dynamics:
+        return [[] for _ in drive_cell_gids]
+    times, gids = dynamics["times"], dynamics["gids"]
+    if not (len(times) and len(gids)):
+        return [[] for _ in drive_cell_gids]
 
-    return event_times
+    # group the spikes by gid once, keeping their original order
+    times, gids = np.asarray(times), np.asarray(gids)
+    order = np.argsort(gids, kind="stable")
+    sorted_gids = gids[order]
+    starts = np.searchsorted(sorted_gids, drive_cell_gids, side="left")
+    stops = np.searchsorted(sorted_gids, drive_cell_gids, side="right")
+    return [times[order[start:stop]].tolist() for start, stop in zip(starts, stops)]
 
 
 def _create_extpois(*, t0, T, lamtha, prng):
@@ -415,14 +606,25 @@ def _create_extpois(*, t0, T, lamtha, prng):
     if lamtha <= 0.0:
         raise ValueError(f"Rate must be > 0. Got {lamtha}")
 
+    # Draw the inter-event intervals in batches rather than one at a time.
+    # The random state yields the same values for a batch as for successive
+    # draws and the cumulative sum adds them in the same order, so the event
+    # times do not depend on the batch size. Intervals drawn beyond T are
+    # discarded.
+    n_expected = lamtha * (T - t0) / 1000.0
+    n_draws = int(n_expected + 5 * np.sqrt(n_expected)) + 10
     event_times = list()
     t_gen = t0
     while t_gen < T:
-        t_gen += prng.exponential(1.0 / lamtha) * 1000.0
-        if t_gen < T:
-            event_times.append(t_gen)
-
-    return np.array(event_times)
+        intervals = prng.exponential(1.0 / lamtha, size=n_draws) * 1000.0
+        intervals[0] += t_gen
+        times = np.cumsum(intervals)
+        event_times.append(times[times < T])
+        t_gen = times[-1]
+
+    if not event_times:
+        return np.array([])
+    return np.concatenate(event_times)
 
 
 def _create_gauss(*, mu, sigma, numspikes, prng):
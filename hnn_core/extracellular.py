@@ -20,30 +20,59 @@ Network Local Field Potentials using LFPsim. Front Comput Neurosci 10:65.
 #          Sam Neymotin <samnemo@gmail.com>
 #          Christopher Bailey <cjb@cfin.au.dk>
 
+import hashlib
+import os
+import os.path as op
 from copy import deepcopy
 
 import numpy as np
 from numpy.linalg import norm
+from scipy import sparse
+from scipy.interpolate import CubicSpline
 from neuron import h
 
+from .cell import _record_vector
 from .externals.mne import _validate_type, _check_option
 from .utils import smooth_waveform
 from .viz import plot_laminar_csd, plot_laminar_lfp
 
+# transfer resistance matrices computed in this process, keyed by the geometry
+# of the segments and the electrode array (see _get_transfer_resistance)
+_TRANSFER_CACHE = dict()
+_TRANSFER_CACHE_SIZE = 8
 
-def calculate_csd2d(lfp_data, delta=1):
+
+def calculate_csd2d(
+    lfp_data, delta=1, *, vaknin=False, interpolation=None, n_depths=None, dtype=None
+):
     """Current source density (CSD) estimation
 
     Parameters
     ----------
-    lfp_data : array, shape (n_channels, n_times)
-        LFP data.
+    lfp_data : array, shape (n_channels, n_times) | (n_trials, n_channels, n_times)
+        LFP data. Any leading dimensions, e.g., of trials, are computed at
+        once.
     delta : int
         Spacing between channels (um), scales the CSD.
+    vaknin : bool
+        If True, the first and last channels are duplicated before taking the
+        second spatial derivative (Vaknin et al., 1988), instead of linearly
+        extrapolating the CSD of the border channels. Default: False.
+    interpolation : 'spline' | None
+        If 'spline', the CSD is interpolated with a cubic spline along the
+        channels at ``n_depths`` equispaced depths, from the first to the last
+        channel. If None, the CSD is returned at the channels. Default: None.
+    n_depths : int | None
+        The number of depths of the spline interpolation. If None, ten times
+        as many intervals as between the channels are used. Default: None.
+    dtype : str | numpy dtype | None
+        The data type the CSD is computed and returned in, e.g., ``'float32'``
+        to halve the memory of large arrays. If None, the data type of
+        ``lfp_data`` is used (float for integers). Default: None.
 
     Returns
     -------
-    csd2d : array, shape (n_channels, n_times)
+    csd2d : array, shape (..., n_channels, n_times) | (..., n_depths, n_times)
         The 2nd derivative current source density estimate (csd2d)
 
     Notes
@@ -54,12 +83,45 @@ def calculate_csd2d(lfp_data, delta=1):
     csd[electrode] = -(LFP[electrode - 1] - 2*LFP[electrode] +
                        LFP[electrode + 1]) / spacing ** 2
     """
-    csd2d = -np.diff(lfp_data, n=2, axis=0) / delta**2
-    bottom_border = csd2d[-1, :] * 2 - csd2d[-2, :]
-    top_border = csd2d[0, :] * 2 - csd2d[1, :]
-    csd2d = np.concatenate(
-        (top_border[None, ...], csd2d, bottom_border[None, ...]), axis=0
-    )
+    _validate_type(vaknin, bool, "vaknin")
+    _check_option("interpolation", interpolation, [None, "spline"])
+    lfp_data = np.asarray(lfp_data, dtype=dtype)
+    if lfp_data.dtype.kind != "f":
+        lfp_data = lfp_data.astype(float)
+    if lfp_data.ndim < 2:
+        raise ValueError(
+            "lfp_data must have at least 2 dimensions (n_channels, n_times), "
+            f"got shape {lfp_data.shape}"
+        )
+    n_channels = lfp_data.shape[-2]
+    n_min = 2 if vaknin else 4
+    if n_channels < n_min:
+        raise ValueError(
+            f"At least {n_min} channels are needed to estimate the CSD, got "
+            f"{n_channels}"
+        )
+
+    # second differences, -(LFP[e - 1] - 2 * LFP[e] + LFP[e + 1])
+    diff = np.diff(lfp_data, axis=-2)
+    csd2d = np.empty_like(lfp_data)
+    np.subtract(diff[..., :-1, :], diff[..., 1:, :], out=csd2d[..., 1:-1, :])
+    if vaknin:
+        # the differences to the duplicated border channels are zero
+        np.negative(diff[..., 0, :], out=csd2d[..., 0, :])
+        csd2d[..., -1, :] = diff[..., -1, :]
+        csd2d /= delta**2
+    else:
+        csd2d[..., 1:-1, :] /= delta**2
+        csd2d[..., 0, :] = csd2d[..., 1, :] * 2 - csd2d[..., 2, :]
+        csd2d[..., -1, :] = csd2d[..., -2, :] * 2 - csd2d[..., -3, :]
+
+    if interpolation == "spline":
+        if n_depths is None:
+            n_depths = 10 * (n_channels - 1) + 1
+        _validate_type(n_depths, "int", "n_depths")
+        spline = CubicSpline(np.arange(n_channels), csd2d, axis=-2)
+        depths = np.linspace(0, n_channels - 1, n_depths)
+        csd2d = spline(depths).astype(csd2d.dtype, copy=False)
     return csd2d
 
 
@@ -104,65 +166,116 @@ def _get_laminar_z_coords(electrode_positions):
         return np.array(electrode_positions)[:, 2], z_delta
 
 
-def _transfer_resistance(
-    section, electrode_pos, conductivity, method, min_distance=0.5
-):
-    """Transfer resistance between section and electrode position.
+def _get_segment_geometry(sections):
+    """Get the geometry of the segments of NEURON sections.
 
-    To arrive at the extracellular potential, the value returned by this
-    function is multiplied by the net transmembrane current flowing through all
-    segments of the section. Hence the term "resistance" (voltage equals
-    current times resistance).
+    Parameters
+    ----------
+    sections : list of h.Section()
+        The NEURON sections.
+
+    Returns
+    -------
+    seg_ctrs : array, shape (n_segments, 3)
+        The center point (in um) of each segment of all sections.
+    line_lens : array, shape (n_segments,)
+        Half the length (in um) of the line source of each segment, which
+        extends from the previous to the next segment center point.
+    sec_vecs : array, shape (n_segments, 3)
+        The vector from the start to the end of the section of each segment.
+    """
+    seg_ctrs, line_lens, sec_vecs = list(), list(), list()
+    for section in sections:
+        sec_start = np.array([section.x3d(0), section.y3d(0), section.z3d(0)])
+        sec_end = np.array([section.x3d(1), section.y3d(1), section.z3d(1)])
+        sec_vec = sec_end - sec_start
+
+        # NB segment lengths aren't equal! First/last segment center point is
+        # closer to respective end point than to next/previous segment!
+        # for nseg == 5, the segment centers are: [0.1, 0.3, 0.5, 0.7, 0.9]
+        seg_xs = np.array([seg.x for seg in section])
+        seg_ctrs.append(sec_start + seg_xs[:, None] * sec_vec)
+        sec_lens = np.zeros((section.nseg + 2))
+        sec_lens[1:-1] = seg_xs * section.L
+        sec_lens[-1] = section.L
+        sec_lens = np.diff(sec_lens)
+        line_lens.append(np.concatenate((sec_lens[:1], sec_lens[2:])))
+        sec_vecs.append(np.tile(sec_vec, (section.nseg, 1)))
+
+    if len(seg_ctrs) == 0:
+        return np.empty((0, 3)), np.empty((0,)), np.empty((0, 3))
+    return np.concatenate(seg_ctrs), np.concatenate(line_lens), np.concatenate(sec_vecs)
+
+
+def _get_section_geometry(sections):
+    """Get the geometry of NEURON sections taken as single line sources.
 
     Parameters
     ----------
-    section : h.Section()
-        The NEURON section.
-    electrode_pos : list (x, y, z)
-        The x, y, z coordinates of the electrode (in um)
+    sections : list of h.Section()
+        The NEURON sections.
+
+    Returns
+    -------
+    sec_ctrs : array, shape (n_sections, 3)
+        The center point (in um) of each section.
+    line_lens : array, shape (n_sections,)
+        Half the length (in um) of each section.
+    sec_vecs : array, shape (n_sections, 3)
+        The vector from the start to the end of each section.
+    """
+    sec_ctrs, line_lens, sec_vecs = list(), list(), list()
+    for section in sections:
+        sec_start = np.array([section.x3d(0), section.y3d(0), section.z3d(0)])
+        sec_end = np.array([section.x3d(1), section.y3d(1), section.z3d(1)])
+        sec_vec = sec_end - sec_start
+        sec_ctrs.append(sec_start + 0.5 * sec_vec)
+        line_lens.append(0.5 * section.L)
+        sec_vecs.append(sec_vec)
+    return (
+        np.array(sec_ctrs).reshape(-1, 3),
+        np.array(line_lens, dtype=float),
+        np.array(sec_vecs).reshape(-1, 3),
+    )
+
+
+def _dot(x, y):
+    """Dot products of the vectors along the last axis of x and y.
+
+    Each product is computed as a (1 x 3) @ (3 x 1) matrix product, like
+    np.dot does for a pair of vectors, so the results are identical to it.
+    """
+    return (x[..., None, :] @ y[..., :, None])[..., 0, 0]
+
+
+def _transfer_resistance_matrix(
+    seg_ctrs, line_lens, sec_vecs, electrode_pos, conductivity, method, min_distance
+):
+    """Transfer resistances between segments and electrode positions.
+
+    Parameters
+    ----------
+    seg_ctrs, line_lens, sec_vecs : array
+        The geometry of the segments (see :func:`_get_segment_geometry`).
+    electrode_pos : array, shape (n_contacts, 3)
+        The x, y, z coordinates of the electrode contacts (in um).
     conductivity : float
         Extracellular conductivity (in S/m)
     method : str
-        Approximation to use. ``'psa'`` (point source approximation) treats
-        each segment junction as a point extracellular current source.
-        ``'lsa'`` (line source approximation) treats each segment as a line
-        source of current, which extends from the previous to the next segment
-        center point: |---x---|, where x is the current segment flanked by |.
-    min_distance : float (default: 0.5)
-        To avoid numerical errors in the 1/R calculation, we'll by default
-        limit the distance to 0.5 um, corresponding to 1 um diameter dendrites.
-        NB: LFPy uses section.diam / 2.0, i.e., whatever the closest section
-        radius happens to be. This may not make sense for HNN model neurons, in
-        which dendrite diameters have been adjusted to represent the entire
-        tree (Bush & Sejnowski, 1993).
+        Approximation to use (see :func:`_transfer_resistance`).
+    min_distance : float
+        The minimal distance (in um) between a segment and a contact.
 
     Returns
     -------
-    vres : list
-        The transfer resistance at each segment of the section.
+    vres : array, shape (n_contacts, n_segments)
+        The transfer resistance between each contact and segment.
     """
-    electrode_pos = np.array(electrode_pos)  # electrode position to Numpy
-
-    sec_start = np.array([section.x3d(0), section.y3d(0), section.z3d(0)])
-    sec_end = np.array([section.x3d(1), section.y3d(1), section.z3d(1)])
-    sec_vec = sec_end - sec_start
-
-    # NB segment lengths aren't equal! First/last segment center point is
-    # closer to respective end point than to next/previous segment!
-    # for nseg == 5, the segment centers are: [0.1, 0.3, 0.5, 0.7, 0.9]
-    seg_ctr = np.zeros((section.nseg, 3))
-    line_lens = np.zeros((section.nseg + 2))
-    for ii, seg in enumerate(section):
-        seg_ctr[ii, :] = sec_start + seg.x * sec_vec
-        line_lens[ii + 1] = seg.x * section.L
-    line_lens[-1] = section.L
-    line_lens = np.diff(line_lens)
-    first_len = line_lens[0]
-    line_lens = np.array([first_len] + list(line_lens[2:]))
+    electrode_pos = np.asarray(electrode_pos, dtype=float)[:, None, :]
 
     if method == "psa":
         # distance from segment midpoints to electrode
-        dis = norm(np.tile(electrode_pos, (section.nseg, 1)) - seg_ctr, axis=1)
+        dis = norm(electrode_pos - seg_ctrs, axis=-1)
 
         # To avoid very large values when electrode is placed close to a
         # segment junction, enforce minimal radial distance
@@ -188,33 +301,43 @@ def _transfer_resistance(
         # L: parallel distance from section start to electrode
         # Note that there are three distinct regimes to this approximation,
         # depending on the electrode position along the section axis.
-        phi = np.zeros(len(seg_ctr))
-        for idx, (ctr, line_len) in enumerate(zip(seg_ctr, line_lens)):
-            start = ctr - line_len * sec_vec / norm(sec_vec)
-            end = ctr + line_len * sec_vec / norm(sec_vec)
-            a = end - start
-            norm_a = norm(a)
-            b = electrode_pos - end
-            # projection: H = a.cos(theta) = a.dot(b) / |a|
-            H = np.dot(b, a) / norm_a  # NB can be negative
-            L = H + norm_a
-            R2 = np.dot(b, b) - H**2  # NB squares
-
-            # To avoid very large values when electrode is placed (anywhere) on
-            # the section axis, enforce minimal perpendicular distance
-            R2 = np.maximum(R2, min_distance**2)
-
-            if L < 0 and H < 0:  # electrode is "behind" line segment
-                num = np.sqrt(H**2 + R2) - H  # == norm(b) - H
-                denom = np.sqrt(L**2 + R2) - L
-            elif L > 0 and H < 0:  # electrode is "on top of" line segment
-                num = (np.sqrt(H**2 + R2) - H) * (L + np.sqrt(L**2 + R2))
-                denom = R2
-            else:  # electrode is "ahead of" line segment
-                num = np.sqrt(L**2 + R2) + L
-                denom = np.sqrt(H**2 + R2) + H  # == norm(b) + H
-
-            phi[idx] = np.log(num / denom) / norm_a
+        sec_norms = np.sqrt(_dot(sec_vecs, sec_vecs))[:, None]
+        seg_vecs = line_lens[:, None] * sec_vecs / sec_norms
+        start = seg_ctrs - seg_vecs
+        end = seg_ctrs + seg_vecs
+        a = end - start
+        norm_a = np.sqrt(_dot(a, a))
+        b = electrode_pos - end
+        # projection: H = a.cos(theta) = a.dot(b) / |a|
+        H = _dot(b, a) / norm_a  # NB can be negative
+        L = H + norm_a
+        # NB squares, with float_power calling pow() like scalar ** does
+        R2 = _dot(b, b) - np.float_power(H, 2)
+
+        # To avoid very large values when electrode is placed (anywhere) on
+        # the section axis, enforce minimal perpendicular distance
+        R2 = np.maximum(R2, min_distance**2)
+
+        num, denom = np.empty_like(H), np.empty_like(H)
+        # electrode is "behind" line segment
+        behind = (L < 0) & (H < 0)
+        H_, L_, R2_ = H[behind], L[behind], R2[behind]
+        num[behind] = np.sqrt(np.float_power(H_, 2) + R2_) - H_  # == norm(b) - H
+        denom[behind] = np.sqrt(np.float_power(L_, 2) + R2_) - L_
+        # electrode is "on top of" line segment
+        on_top = (L > 0) & (H < 0)
+        H_, L_, R2_ = H[on_top], L[on_top], R2[on_top]
+        num[on_top] = (np.sqrt(np.float_power(H_, 2) + R2_) - H_) * (
+            L_ + np.sqrt(np.float_power(L_, 2) + R2_)
+        )
+        denom[on_top] = R2_
+        # electrode is "ahead of" line segment
+        ahead = ~(behind | on_top)
+        H_, L_, R2_ = H[ahead], L[ahead], R2[ahead]
+        num[ahead] = np.sqrt(np.float_power(L_, 2) + R2_) + L_
+        denom[ahead] = np.sqrt(np.float_power(H_, 2) + R2_) + H_  # == norm(b) + H
+
+        phi = np.log(num / denom) / norm_a
 
     # [dis]: um; [conductivity]: S / m
     # [phi / conductivity] = [1/dis] / [conductivity] = 1 / [dis] x [conduct'y]
@@ -225,6 +348,324 @@ def _transfer_resistance(
     return 1000.0 * phi / (4.0 * np.pi * conductivity)
 
 
+def _transfer_resistance(
+    section, electrode_pos, conductivity, method, min_distance=0.5
+):
+    """Transfer resistance between section and electrode position.
+
+    To arrive at the extracellular potential, the value returned by this
+    function is multiplied by the net transmembrane current flowing through all
+    segments of the section. Hence the term "resistance" (voltage equals
+    current times resistance).
+
+    Parameters
+    ----------
+    section : h.Section()
+        The NEURON section.
+    electrode_pos : list (x, y, z)
+        The x, y, z coordinates of the electrode (in um)
+    conductivity : float
+        Extracellular conductivity (in S/m)
+    method : str
+        Approximation to use. ``'psa'`` (point source approximation) treats
+        each segment junction as a point extracellular current source.
+        ``'lsa'`` (line source approximation) treats each segment as a line
+        source of current, which extends from the previous to the next segment
+        center point: |---x---|, where x is the current segment flanked by |.
+    min_distance : float (default: 0.5)
+        To avoid numerical errors in the 1/R calculation, we'll by default
+        limit the distance to 0.5 um, corresponding to 1 um diameter dendrites.
+        NB: LFPy uses section.diam / 2.0, i.e., whatever the closest section
+        radius happens to be. This may not make sense for HNN model neurons, in
+        which dendrite diameters have been adjusted to represent the entire
+        tree (Bush & Sejnowski, 1993).
+
+    Returns
+    -------
+    vres : array, shape (n_segments,)
+        The transfer resistance at each segment of the section.
+    """
+    return _transfer_resistance_matrix(
+        *_get_segment_geometry([section]),
+        [electrode_pos],
+        conductivity=conductivity,
+        method=method,
+        min_distance=min_distance,
+    )[0]
+
+
+def _get_section_sources(geometry, sec_starts, electrode_pos, compression):
+    """Get the summary sources of the sections of a set of segments.
+
+    Parameters
+    ----------
+    geometry : tuple of array
+        The geometry of the segments (see :func:`_get_segment_geometry`).
+    sec_starts : array of int, shape (n_sections,)
+        The index of the first segment of each section.
+    electrode_pos : array, shape (n_contacts, 3)
+        The x, y, z coordinates of the electrode contacts (in um).
+    compression : 'section' | 'multipole'
+        The summary sources of the sections.
+
+    Returns
+    -------
+    sec_geometry : tuple of array
+        The center points, half lengths and vectors of the sections, each
+        taken as a single line source (see :func:`_get_section_geometry`).
+    offsets : array, shape (n_segments,)
+        The signed distance (in um) of each segment center from the center of
+        its section, along the section.
+    keep : array of bool, shape (n_sections,)
+        Whether the section keeps its segments as sources, because a contact
+        is closer to its center than its length, where summary sources are
+        not accurate, or because it has no more segments than summary sources.
+    """
+    seg_ctrs, _, sec_vecs = geometry
+    counts = np.diff(np.append(sec_starts, len(seg_ctrs)))
+    # the segment centers are symmetric about the section center
+    sec_ctrs = np.add.reduceat(seg_ctrs, sec_starts, axis=0) / counts[:, None]
+    sec_vecs = sec_vecs[sec_starts]
+    sec_norms = norm(sec_vecs, axis=1)
+    units = sec_vecs / sec_norms[:, None]
+    offsets = _dot(
+        seg_ctrs - np.repeat(sec_ctrs, counts, axis=0),
+        np.repeat(units, counts, axis=0),
+    )
+    electrode_pos = np.asarray(electrode_pos, dtype=float)[:, None, :]
+    distances = norm(electrode_pos - sec_ctrs, axis=-1).min(axis=0)
+    n_terms = 2 if compression == "multipole" else 1
+    keep = (distances < sec_norms) | (counts <= n_terms)
+    return (sec_ctrs, 0.5 * sec_norms, sec_vecs), offsets, keep
+
+
+def _dipole_transfer_matrix(
+    sec_ctrs, sec_vecs, electrode_pos, conductivity, min_distance
+):
+    """Transfer resistances between axial current dipoles and electrodes.
+
+    The potential of a current dipole of moment ``m`` (in nA x um) at the
+    center of a section, oriented along the section, is the transfer
+    resistance times ``m``.
+
+    Parameters
+    ----------
+    sec_ctrs, sec_vecs : array, shape (n_sections, 3)
+        The center points and vectors of the sections.
+    electrode_pos : array, shape (n_contacts, 3)
+        The x, y, z coordinates of the electrode contacts (in um).
+    conductivity : float
+        Extracellular conductivity (in S/m)
+    min_distance : float
+        The minimal distance (in um) between a section center and a contact.
+
+    Returns
+    -------
+    vres : array, shape (n_contacts, n_sections)
+        The transfer resistance between each contact and section dipole.
+    """
+    electrode_pos = np.asarray(electrode_pos, dtype=float)[:, None, :]
+    displacements = electrode_pos - sec_ctrs
+    dis = np.maximum(norm(displacements, axis=-1), min_distance)
+    units = sec_vecs / norm(sec_vecs, axis=1)[:, None]
+    phi = _dot(displacements, units) / dis**3
+    # see _transfer_resistance_matrix, [m / dis^2] = [i / dis]
+    return 1000.0 * phi / (4.0 * np.pi * conductivity)
+
+
+def _get_source_projection(geometry, sec_starts, electrode_pos, compression):
+    """Projection of segment currents onto the summary sources of sections.
+
+    The sources are the segments of the sections that are kept (see
+    :func:`_get_section_sources`), then the summed currents of the other
+    sections, and for ``compression='multipole'`` the moments of their axial
+    current dipoles, i.e., the sums of the segment currents times their
+    distances from the section center.
+
+    Parameters
+    ----------
+    geometry : tuple of array
+        The geometry of the segments (see :func:`_get_segment_geometry`).
+    sec_starts : array of int, shape (n_sections,)
+        The index of the first segment of each section.
+    electrode_pos : array, shape (n_contacts, 3)
+        The x, y, z coordinates of the electrode contacts (in um).
+    compression : 'section' | 'multipole'
+        The summary sources of the sections.
+
+    Returns
+    -------
+    projection : scipy.sparse.csr_matrix, shape (n_sources, n_segments)
+        The matrix of the sources in terms of the segment currents.
+    """
+    _, offsets, keep = _get_section_sources(
+        geometry, sec_starts, electrode_pos, compression
+    )
+    n_segments = len(offsets)
+    counts = np.diff(np.append(sec_starts, n_segments))
+    seg_keep = np.repeat(keep, counts)
+    kept_segs, summed_segs = np.flatnonzero(seg_keep), np.flatnonzero(~seg_keep)
+    # the index of the summary source of the section of each summed segment
+    summed_sources = np.repeat(np.cumsum(~keep) - 1, counts)[summed_segs]
+    n_kept, n_summed = len(kept_segs), np.count_nonzero(~keep)
+
+    rows = [np.arange(n_kept), n_kept + summed_sources]
+    cols = [kept_segs, summed_segs]
+    weights = [np.ones(n_kept), np.ones(len(summed_segs))]
+    if compression == "multipole":
+        rows.append(n_kept + n_summed + summed_sources)
+        cols.append(summed_segs)
+        weights.append(offsets[summed_segs])
+        n_summed *= 2
+    return sparse.csr_matrix(
+        (np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_kept + n_summed, n_segments),
+    )
+
+
+def _compressed_transfer_matrix(
+    geometry,
+    sec_starts,
+    electrode_pos,
+    conductivity,
+    method,
+    min_distance,
+    compression,
+):
+    """Transfer resistances between summary sources and electrode positions.
+
+    With ``compression='section'``, the currents of the segments of each
+    section are summed into a single source, which is a point (``'psa'``) or
+    line source (``'lsa'``) at the section. With ``compression='multipole'``,
+    each section additionally has an axial current dipole at its center.
+    Sections close to a contact, or with few segments, keep their segments
+    as sources.
+
+    Parameters
+    ----------
+    geometry : tuple of array
+        The geometry of the segments (see :func:`_get_segment_geometry`).
+    sec_starts : array of int, shape (n_sections,)
+        The index of the first segment of each section.
+    electrode_pos : array, shape (n_contacts, 3)
+        The x, y, z coordinates of the electrode contacts (in um).
+    conductivity : float
+        Extracellular conductivity (in S/m)
+    method : str
+        Approximation to use (see :func:`_transfer_resistance`).
+    min_distance : float
+        The minimal distance (in um) between a source and a contact.
+    compression : 'section' | 'multipole'
+        The summary sources of the sections.
+
+    Returns
+    -------
+    vres : array, shape (n_contacts, n_sources)
+        The transfer resistance between each contact and source, in the order
+        of the sources of :func:`_get_source_projection`.
+    """
+    sec_geometry, _, keep = _get_section_sources(
+        geometry, sec_starts, electrode_pos, compression
+    )
+    counts = np.diff(np.append(sec_starts, len(geometry[0])))
+    seg_keep = np.repeat(keep, counts)
+    kept_geometry = tuple(arr[seg_keep] for arr in geometry)
+    summed_geometry = tuple(arr[~keep] for arr in sec_geometry)
+    kwargs = dict(conductivity=conductivity, min_distance=min_distance)
+    blocks = [
+        _transfer_resistance_matrix(
+            *kept_geometry, electrode_pos, method=method, **kwargs
+        ),
+        _transfer_resistance_matrix(
+            *summed_geometry, electrode_pos, method=method, **kwargs
+        ),
+    ]
+    if compression == "multipole":
+        sec_ctrs, _, sec_vecs = summed_geometry
+        blocks.append(
+            _dipole_transfer_matrix(sec_ctrs, sec_vecs, electrode_pos, **kwargs)
+        )
+    return np.concatenate(blocks, axis=1)
+
+
+def _get_transfer_resistance(geometry, array, sec_starts=None):
+    """Get the transfer resistances between segments and an electrode array.
+
+    The matrix only depends on the geometry of the segments and on the
+    positions, conductivity, method, minimal distance and compression of the
+    array. It is kept in memory for later builds of the same geometry and, if
+    the array has a ``_cache_dir``, in a file in that directory.
+
+    Parameters
+    ----------
+    geometry : tuple of array
+        The geometry of the segments (see :func:`_get_segment_geometry`).
+    array : ExtracellularArray object
+        The electrode array.
+    sec_starts : array of int, shape (n_sections,) | None
+        The index of the first segment of each section. Required if the
+        array has a ``compression``.
+
+    Returns
+    -------
+    vres : array, shape (n_contacts, n_sources)
+        The transfer resistance between each contact and segment, or summary
+        source of the sections (see :func:`_compressed_transfer_matrix`).
+    """
+    hasher = hashlib.sha1()
+    arrs = geometry + (np.asarray(array.positions, dtype=float),)
+    if array.compression is not None:
+        arrs += (np.asarray(sec_starts, dtype=int),)
+    for arr in arrs:
+        hasher.update(np.ascontiguousarray(arr).tobytes())
+    hasher.update(
+        repr(
+            (array.conductivity, array.method, array.min_distance, array.compression)
+        ).encode()
+    )
+    key = hasher.hexdigest()
+
+    fname = None
+    if array._cache_dir is not None:
+        fname = op.join(array._cache_dir, f"transfer_resistance_{key}.npy")
+
+    transfer_resistance = _TRANSFER_CACHE.pop(key, None)
+    if transfer_resistance is None and fname is not None and op.exists(fname):
+        transfer_resistance = np.load(fname)
+    if transfer_resistance is None and array.compression is not None:
+        transfer_resistance = _compressed_transfer_matrix(
+            geometry,
+            sec_starts,
+            array.positions,
+            conductivity=array.conductivity,
+            method=array.method,
+            min_distance=array.min_distance,
+            compression=array.compression,
+        )
+    elif transfer_resistance is None:
+        transfer_resistance = _transfer_resistance_matrix(
+            *geometry,
+            array.positions,
+            conductivity=array.conductivity,
+            method=array.method,
+            min_distance=array.min_distance,
+        )
+    if fname is not None and not op.exists(fname):
+        os.makedirs(array._cache_dir, exist_ok=True)
+        # write to a temporary file first, since other processes may read or
+        # write the same matrix
+        tmp_fname = f"{fname[:-4]}_{os.getpid()}.tmp.npy"
+        np.save(tmp_fname, transfer_resistance)
+        os.replace(tmp_fname, fname)
+
+    # keep the most recently used matrices
+    transfer_resistance.setflags(write=False)
+    if len(_TRANSFER_CACHE) >= _TRANSFER_CACHE_SIZE:
+        del _TRANSFER_CACHE[next(iter(_TRANSFER_CACHE))]
+    _TRANSFER_CACHE[key] = transfer_resistance
+    return transfer_resistance
+
+
 class ExtracellularArray:
     """Class for recording extracellular potential fields with electrode array
 
@@ -259,6 +700,25 @@ class ExtracellularArray:
     voltages : array-like, shape (n_trials, n_electrodes, n_times) | None
         Optionally, provide precomputed voltages for electrodes at
         ``positions``.
+    cache_dir : path-like | None
+        If not None, the transfer resistances between the electrodes and the
+        segments of the cells are saved to files in this directory, and read
+        back by later simulations with the same geometry. They are always
+        kept in memory for simulations in the same process. The directory is
+        a runtime setting of the machine it is on: it is kept by copies and
+        trial selections of the array, but not written by ``to_dict`` or to
+        network files. Default: None.
+    compression : 'section' | 'multipole' | None
+        If not None, the currents of the segments of each section are
+        projected onto summary sources of the section at each time step, and
+        the potentials are computed from these fewer sources. ``'section'``
+        sums the currents into one source at the section (a point or line
+        source depending on ``method``). ``'multipole'`` adds an axial
+        current dipole at the section center, which is much more accurate.
+        Sections closer to a contact than their length keep their segments,
+        so compression mostly speeds up contacts away from the cells. Use
+        :meth:`~hnn_core.extracellular.MembraneCurrents.compression_error` to
+        check the error. Default: None.
 
     Attributes
     ----------
@@ -288,6 +748,8 @@ class ExtracellularArray:
         min_distance=0.5,
         times=None,
         voltages=None,
+        cache_dir=None,
+        compression=None,
     ):
         _validate_type(positions, (tuple, list), "positions")
         if np.array(positions).shape == (3,):  # a single coordinate given
@@ -309,6 +771,10 @@ class ExtracellularArray:
         if method is not None:  # method allowed to be None for testing
             _validate_type(method, str, "method")
             _check_option("method", method, ["psa", "lsa"])
+        _validate_type(cache_dir, ("path-like", None), "cache_dir")
+        if cache_dir is not None:
+            cache_dir = op.abspath(cache_dir)
+        _check_option("compression", compression, [None, "section", "multipole"])
 
         if times is None:
             times = np.array([])
@@ -337,6 +803,8 @@ class ExtracellularArray:
         self.conductivity = conductivity
         self.method = method
         self.min_distance = min_distance
+        self.compression = compression
+        self._cache_dir = cache_dir
 
         self._times = times
         self._data = voltages
@@ -365,6 +833,9 @@ class ExtracellularArray:
             method=self.method,
             times=self.times,
             voltages=return_data,
+            min_distance=self.min_distance,
+            cache_dir=self._cache_dir,
+            compression=self.compression,
         )
 
     def __repr__(self):
@@ -390,6 +861,7 @@ class ExtracellularArray:
         attrs_to_ignore = [x for x in all_attrs if x.startswith("_")]
         attrs_to_ignore.extend(
             [
+                "compute_csd",
                 "conductivity",
                 "copy",
                 "n_contacts",
@@ -484,6 +956,45 @@ class ExtracellularArray:
 
         return self
 
+    def compute_csd(
+        self, *, vaknin=False, interpolation=None, n_depths=None, dtype=None
+    ):
+        """Compute the current source density (CSD) of all trials at once.
+
+        The electrode contacts must be equispaced along a line in the
+        z-direction, like for
+        :meth:`~hnn_core.extracellular.ExtracellularArray.plot_csd`.
+
+        Parameters
+        ----------
+        vaknin : bool
+            If True, duplicate the first and last contacts before taking the
+            second spatial derivative (Vaknin et al., 1988). Default: False.
+        interpolation : 'spline' | None
+            If 'spline', interpolate the CSD with a cubic spline at
+            ``n_depths`` equispaced depths along the contacts. Default: None.
+        n_depths : int | None
+            The number of depths of the spline interpolation (see
+            :func:`~hnn_core.extracellular.calculate_csd2d`). Default: None.
+        dtype : str | numpy dtype | None
+            The data type of the CSD, e.g., ``'float32'``. Default: None.
+
+        Returns
+        -------
+        csd : array, shape (n_trials, n_contacts, n_times)
+            The CSD estimate of each trial (in uV/um^2), at ``n_depths``
+            depths instead of the contacts with ``interpolation='spline'``.
+        """
+        _, delta = _get_laminar_z_coords(self.positions)
+        return calculate_csd2d(
+            self._data,
+            delta=delta,
+            vaknin=vaknin,
+            interpolation=interpolation,
+            n_depths=n_depths,
+            dtype=dtype,
+        )
+
     def plot_lfp(
         self,
         *,
@@ -632,6 +1143,9 @@ class ExtracellularArray:
         """Converts an object of ExtracellularArray class to a
         dictionary.
 
+        The cache directory of the transfer resistances is a runtime setting
+        and is not included.
+
         Returns
         -------
         dictionary form of an object of ExtracellularArray class.
@@ -641,12 +1155,239 @@ class ExtracellularArray:
         rec_array_data["conductivity"] = self.conductivity
         rec_array_data["method"] = self.method
         rec_array_data["min_distance"] = self.min_distance
+        rec_array_data["compression"] = self.compression
         rec_array_data["times"] = self.times
         rec_array_data["voltages"] = self.voltages
 
         return rec_array_data
 
 
+class MembraneCurrents(object):
+    """Membrane currents recorded from the cells of a network.
+
+    The net transmembrane currents of the segments (or sections) of all cells
+    are recorded during a simulation with
+    ``simulate_dipole(net, record_imem='segment')``, and stored in
+    ``net.membrane_currents``. Extracellular potentials of any electrode array
+    can then be computed from them without simulating again.
+
+    Parameters
+    ----------
+    times : array, shape (n_times,)
+        The time points the currents are sampled at (ms).
+    currents : array, shape (n_trials, n_sources, n_times)
+        The net transmembrane current (nA) of each source in each trial.
+    gids : array, shape (n_sources,)
+        The gid of the cell of each source.
+    geometry : tuple of array
+        The center points, half lengths and section vectors of the sources
+        (in um).
+    mode : 'segment' | 'section'
+        Whether the sources are the segments of the cells, or their sections
+        with the currents of all segments summed.
+    sections : array, shape (n_sources,) | None
+        The index of the section of each source within its cell. Required to
+        compute compressed potentials from the currents of segments.
+
+    Attributes
+    ----------
+    times : array, shape (n_times,)
+        The time points the currents are sampled at (ms).
+    currents : array, shape (n_trials, n_sources, n_times)
+        The net transmembrane current (nA) of each source in each trial.
+    gids : array, shape (n_sources,)
+        The gid of the cell of each source.
+    mode : 'segment' | 'section'
+        The kind of current sources.
+    sections : array, shape (n_sources,) | None
+        The index of the section of each source within its cell.
+    """
+
+    def __init__(self, times, currents, gids, geometry, mode, sections=None):
+        self.times = np.array(times, dtype=float)
+        self.currents = np.asarray(currents)
+        self.gids = np.asarray(gids)
+        self.mode = mode
+        self.sections = None if sections is None else np.asarray(sections)
+        self._geometry = tuple(geometry)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        n_trials, n_sources, n_times = self.currents.shape
+        return (
+            f"<{class_name} | {n_sources} {self.mode}s, {n_trials} trials, "
+            f"{n_times} times>"
+        )
+
+    def __len__(self):
+        return len(self.currents)  # length == number of trials
+
+    def __eq__(self, other):
+        if not isinstance(other, MembraneCurrents):
+            return NotImplemented
+        if self.mode != other.mode or len(self._geometry) != len(other._geometry):
+            return False
+        if (self.sections is None) != (other.sections is None):
+            return False
+        arrays = [
+            (self.times, other.times),
+            (self.currents, other.currents),
+            (self.gids, other.gids),
+        ]
+        arrays.extend(zip(self._geometry, other._geometry))
+        if self.sections is not None:
+            arrays.append((self.sections, other.sections))
+        return all(np.array_equal(arr, other_arr) for arr, other_arr in arrays)
+
+    def _get_sec_starts(self):
+        """The index of the first segment of each section."""
+        if self.mode != "segment" or self.sections is None:
+            raise ValueError(
+                "Compression requires the currents of the segments and their "
+                "sections, record them with record_imem='segment'"
+            )
+        new_section = (np.diff(self.gids) != 0) | (np.diff(self.sections) != 0)
+        return np.flatnonzero(np.concatenate(([True], new_section)))
+
+    def compute_potentials(
+        self,
+        electrode_pos,
+        *,
+        conductivity=0.3,
+        method="psa",
+        min_distance=0.5,
+        compression=None,
+    ):
+        """Compute the extracellular potentials of an electrode array.
+
+        Parameters
+        ----------
+        electrode_pos : tuple | list of tuple
+            Coordinates specifying the position for extracellular electrodes in
+            the form of (x, y, z) (in um).
+        conductivity : float
+            Extracellular conductivity, in S/m, of the assumed infinite,
+            homogeneous volume conductor that the cell and electrode are in.
+        method : str
+            Approximation to use, ``'psa'`` (point source approximation) or
+            ``'lsa'`` (line source approximation). See
+            :meth:`~hnn_core.Network.add_electrode_array`.
+        min_distance : float (default: 0.5; unit: um)
+            The minimum distance between the electrode contacts and the
+            sources of current.
+        compression : 'section' | 'multipole' | None
+            If not None, the currents of the segments are projected onto
+            summary sources of their sections first, like in a simulation
+            with an electrode array added with this ``compression`` (see
+            :class:`~hnn_core.extracellular.ExtracellularArray`). Requires
+            currents recorded with ``record_imem='segment'``. Default: None.
+
+        Returns
+        -------
+        array : instance of ExtracellularArray
+            The electrode array, with the potentials of all trials.
+
+        Notes
+        -----
+        With ``mode='segment'`` the potentials are the same as those of an
+        array added to the network before simulating, up to rounding errors.
+        With ``mode='section'`` each section is a single source, which is
+        less accurate close to the cells.
+        """
+        _check_option("method", method, ["psa", "lsa"])
+        array = ExtracellularArray(
+            electrode_pos,
+            conductivity=conductivity,
+            method=method,
+            min_distance=min_distance,
+            compression=compression,
+        )
+        if compression is None:
+            transfer_resistance = _transfer_resistance_matrix(
+                *self._geometry,
+                array.positions,
+                conductivity=conductivity,
+                method=method,
+                min_distance=min_distance,
+            )
+            currents = self.currents
+        else:
+            sec_starts = self._get_sec_starts()
+            transfer_resistance = _compressed_transfer_matrix(
+                self._geometry,
+                sec_starts,
+                array.positions,
+                conductivity=conductivity,
+                method=method,
+                min_distance=min_distance,
+                compression=compression,
+            )
+            projection = _get_source_projection(
+                self._geometry, sec_starts, array.positions, compression
+            )
+            currents = np.stack([projection @ trial for trial in self.currents])
+        array._data = np.matmul(transfer_resistance, currents)
+        array._times = self.times
+        return array
+
+    def compression_error(
+        self,
+        electrode_pos,
+        compression,
+        *,
+        conductivity=0.3,
+        method="psa",
+        min_distance=0.5,
+    ):
+        """Compare compressed potentials with those of all segments.
+
+        Parameters
+        ----------
+        electrode_pos : tuple | list of tuple
+            Coordinates specifying the position for extracellular electrodes in
+            the form of (x, y, z) (in um).
+        compression : 'section' | 'multipole'
+            The summary sources of the sections (see
+            :class:`~hnn_core.extracellular.ExtracellularArray`).
+        conductivity : float
+            Extracellular conductivity, in S/m.
+        method : str
+            Approximation to use, ``'psa'`` or ``'lsa'``.
+        min_distance : float (default: 0.5; unit: um)
+            The minimum distance between the electrode contacts and the
+            sources of current.
+
+        Returns
+        -------
+        report : dict
+            The ``'relative_error'`` (the RMS error over trials and times
+            relative to the RMS of the full potentials) and the
+            ``'max_error'`` (in uV) of each contact, both arrays of shape
+            (n_contacts,), and the number of sources with and without
+            compression (``'n_sources'`` and ``'n_segments'``).
+        """
+        _check_option("compression", compression, ["section", "multipole"])
+        kwargs = dict(
+            conductivity=conductivity, method=method, min_distance=min_distance
+        )
+        full = self.compute_potentials(electrode_pos, **kwargs).voltages
+        array = self.compute_potentials(
+            electrode_pos, compression=compression, **kwargs
+        )
+        error = array.voltages - full
+        rms_error = np.sqrt(np.mean(error**2, axis=(0, 2)))
+        rms_full = np.sqrt(np.mean(full**2, axis=(0, 2)))
+        n_sources = _get_source_projection(
+            self._geometry, self._get_sec_starts(), array.positions, compression
+        ).shape[0]
+        return dict(
+            relative_error=rms_error / np.maximum(rms_full, np.finfo(float).tiny),
+            max_error=np.abs(error).max(axis=(0, 2)),
+            n_sources=n_sources,
+            n_segments=self.currents.shape[1],
+        )
+
+
 class _ExtracellularArrayBuilder(object):
     """The _ExtracellularArrayBuilder class
 
@@ -662,12 +1403,16 @@ class _ExtracellularArrayBuilder(object):
         self.n_contacts = array.n_contacts
         self._nrn_imem_ptrvec = None
         self._nrn_imem_vec = None
+        self._nrn_source_vec = None
         self._nrn_r_transfer = None
+        self._projection = None
         self._nrn_times = None
         self._nrn_voltages = None
         self._recording_callback = None
+        self._record_step = 1
+        self._n_steps = 0
 
-    def _build(self, cvode=None, include_celltypes="all"):
+    def _build(self, cvode=None, include_celltypes="all", record_dt=None):
         """Assemble NEURON objects for calculating extracellular potentials.
 
         The handler is set up to maintain a vector of membrane currents at at
@@ -685,6 +1430,10 @@ class _ExtracellularArrayBuilder(object):
             cells. To restrict this to include only pyramidal cells, use
             ``'Pyr'``. For basket cells, use ``'Basket'``. NB This argument is
             currently not exposed in the API.
+        record_dt : float | None
+            The interval (ms) at which the time is recorded. If not None,
+            ``_record_step`` must be set to the number of integration time
+            steps in ``record_dt`` before simulating. Default: None.
         """
         secs_on_rank = h.allsec()  # get all h.Sections known to this MPI rank
         _validate_type(include_celltypes, str)
@@ -711,35 +1460,35 @@ class _ExtracellularArrayBuilder(object):
                 f"Expected {n_total_segments} imem pointers, got {ptr_idx}."
             )
 
-        # transfer resistances for each segment (keep in Neuron Matrix object)
-        self._nrn_r_transfer = h.Matrix(self.n_contacts, n_total_segments)
-
-        for row, pos in enumerate(self.array.positions):
-            if self.array.method is not None:
-                transfer_resistance = list()
-                for sec in secs_on_rank:
-                    this_xfer_r = _transfer_resistance(
-                        sec,
-                        pos,
-                        conductivity=self.array.conductivity,
-                        method=self.array.method,
-                        min_distance=self.array.min_distance,
-                    )
-                    transfer_resistance.extend(this_xfer_r)
-
-                self._nrn_r_transfer.setrow(row, h.Vector(transfer_resistance))
-            else:
-                # for testing, make a matrix of ones
-                self._nrn_r_transfer.setrow(row, h.Vector(n_total_segments, 1.0))
+        geometry = _get_segment_geometry(secs_on_rank)
+        n_sources, sec_starts = n_total_segments, None
+        if self.array.compression is not None and n_total_segments > 0:
+            # the segment currents are projected onto fewer summary sources of
+            # the sections, which are placed into _nrn_source_vec
+            sec_starts = np.cumsum(segment_counts) - segment_counts
+            self._projection = _get_source_projection(
+                geometry, sec_starts, self.array.positions, self.array.compression
+            )
+            n_sources = self._projection.shape[0]
+            self._nrn_source_vec = h.Vector(n_sources)
+
+        # transfer resistances for each source (keep in Neuron Matrix object)
+        self._nrn_r_transfer = h.Matrix(self.n_contacts, n_sources)
+
+        if self.array.method is not None:
+            transfer_resistance = _get_transfer_resistance(
+                geometry, self.array, sec_starts=sec_starts
+            )
+        else:
+            # for testing, make a matrix of ones
+            transfer_resistance = np.ones((self.n_contacts, n_sources))
+        for row, row_resistance in enumerate(transfer_resistance):
+            self._nrn_r_transfer.setrow(row, h.Vector(row_resistance))
 
         # record time for each array
-        self._nrn_times = h.Vector().record(h._ref_t)
+        self._nrn_times = _record_vector(h._ref_t, record_dt)
 
-        # contributions of all segments on this rank to total calculated
-        # potential at electrode (_PC.allreduce called in _simulate_dipole)
-        # NB voltages of all contacts are initialised to 0 mV, i.e., the
-        # potential at time 0.0 ms is defined to be zero.
-        self._nrn_voltages = h.Vector(self.n_contacts, 0.0)
+        self._reset_nrn_voltages()
 
         # NB we must make a copy of the function reference, and keep it for
         # later decoupling using extra_scatter_gather_remove
@@ -759,17 +1508,36 @@ class _ExtracellularArrayBuilder(object):
         """
         # keep all data in Neuron objects for efficiency
 
+        # only sample the potentials once every _record_step solver steps
+        self._n_steps += 1
+        if self._n_steps % self._record_step != 0:
+            return
+
         # 'gather' the values of seg.i_membrane_ into self.imem_vec
         self._nrn_imem_ptrvec.gather(self._nrn_imem_vec)
+        source_vec = self._nrn_imem_vec
+        if self._projection is not None:
+            source_vec = self._nrn_source_vec
+            imem = self._nrn_imem_vec.as_numpy()
+            source_vec.as_numpy()[:] = self._projection @ imem
 
-        # Calculate potentials by multiplying the _nrn_imem_vec by the matrix
+        # Calculate potentials by multiplying the source_vec by the matrix
         # _nrn_r_transfer. This is equivalent to a row-by-row dot-product:
         # V_i(t) = SUM_j ( R_i,j x I_j (t) )
-        self._nrn_voltages.append(self._nrn_r_transfer.mulv(self._nrn_imem_vec))
+        self._nrn_voltages.append(self._nrn_r_transfer.mulv(source_vec))
         # NB all values appended to the h.Vector _nrn_voltages at current time
         # step. The vector will have size (n_contacts x n_samples, 1), which
         # will be reshaped later to (n_contacts, n_samples).
 
+    def _reset_nrn_voltages(self):
+        """Clear the extracellular data before simulating a trial."""
+        # contributions of all segments on this rank to total calculated
+        # potential at electrode (summed over ranks in aggregate_data)
+        # NB voltages of all contacts are initialised to 0 mV, i.e., the
+        # potential at time 0.0 ms is defined to be zero.
+        self._nrn_voltages = h.Vector(self.n_contacts, 0.0)
+        self._n_steps = 0
+
     @property
     def _nrn_n_samples(self):
         """Return the length (in samples) of the extracellular data."""
@@ -785,18 +1553,110 @@ class _ExtracellularArrayBuilder(object):
         if len(self._nrn_voltages) > 0:
             assert self._nrn_voltages.size() == self.n_contacts * self._nrn_n_samples
 
-            # first reshape to a Neuron Matrix object
-            extmat = h.Matrix(self.n_contacts, self._nrn_n_samples)
-            extmat.from_vector(self._nrn_voltages)
-
-            # then unpack into 2D python list and return
-            return [extmat.getrow(ii).to_python() for ii in range(extmat.nrow())]
+            # the voltages of all contacts are appended at each time step, so
+            # the samples are reshaped to (n_samples, n_contacts) and copied
+            # out of the Neuron buffer in (n_contacts, n_samples) order. NB
+            # always copy: for a single contact the transpose is already
+            # contiguous and would alias the buffer replaced in the next trial
+            voltages = self._nrn_voltages.as_numpy()
+            voltages = voltages.reshape(self._nrn_n_samples, self.n_contacts)
+            # Vector.record(ref, Dt) does not sample tstop, drop it likewise
+            voltages = voltages[: self._nrn_times.size()]
+            return voltages.T.copy()
         else:
             raise RuntimeError("Simulation not yet run!")
 
     def _get_nrn_times(self):
         """The sampling time points."""
         if self._nrn_times.size() > 0:
-            return self._nrn_times.to_python()
+            return self._nrn_times.as_numpy().copy()
         else:
             raise RuntimeError("Simulation not yet run!")
+
+
+class _MembraneCurrentBuilder(object):
+    """Record the membrane currents of the cells on this rank in NEURON.
+
+    Parameters
+    ----------
+    mode : 'segment' | 'section'
+        Whether to record the current of each segment, or the summed current
+        of the segments of each section.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.gids = None
+        self.sections = None
+        self.geometry = None
+        self._nrn_imem_ptrvec = None
+        self._nrn_imem_vec = None
+        self._sec_starts = None
+        self._samples = list()
+        self._recording_callback = None
+        self._record_step = 1
+        self._n_steps = 0
+
+    def _build(self, cells, cvode=None):
+        """Assemble the NEURON objects recording the membrane currents.
+
+        Parameters
+        ----------
+        cells : list of Cell
+            The built cells on this rank.
+        cvode : instance of h.CVode
+            Multi order variable time step integration method.
+        """
+        sections, sec_gids, sec_idxs = list(), list(), list()
+        for cell in cells:
+            sections.extend(cell._nrn_sections.values())
+            sec_gids.extend([cell.gid] * len(cell._nrn_sections))
+            sec_idxs.extend(range(len(cell._nrn_sections)))
+        segment_counts = np.array([sec.nseg for sec in sections], dtype=int)
+
+        self._nrn_imem_ptrvec = h.PtrVector(int(segment_counts.sum()))
+        self._nrn_imem_vec = h.Vector(int(segment_counts.sum()))
+        ptr_idx = 0
+        for sec in sections:
+            for seg in sec:
+                self._nrn_imem_ptrvec.pset(ptr_idx, sec(seg.x)._ref_i_membrane_)
+                ptr_idx += 1
+
+        if self.mode == "segment":
+            self.geometry = _get_segment_geometry(sections)
+            self.gids = np.repeat(np.array(sec_gids, dtype=int), segment_counts)
+            self.sections = np.repeat(np.array(sec_idxs, dtype=int), segment_counts)
+        else:
+            self.geometry = _get_section_geometry(sections)
+            self.gids = np.array(sec_gids, dtype=int)
+            self.sections = np.array(sec_idxs, dtype=int)
+            self._sec_starts = np.cumsum(segment_counts) - segment_counts
+
+        self._reset_currents()
+        self._recording_callback = self._gather_currents
+        cvode.extra_scatter_gather(0, self._recording_callback)
+
+    def _gather_currents(self):
+        """Callback function for _CVODE.extra_scatter_gather"""
+        # only sample the currents once every _record_step solver steps
+        self._n_steps += 1
+        if self._n_steps % self._record_step != 0:
+            return
+
+        self._nrn_imem_ptrvec.gather(self._nrn_imem_vec)
+        currents = self._nrn_imem_vec.as_numpy()
+        if self.mode == "section" and len(self._sec_starts) > 0:
+            self._samples.append(np.add.reduceat(currents, self._sec_starts))
+        else:
+            self._samples.append(currents.copy())
+
+    def _reset_currents(self):
+        """Clear the recorded currents before simulating a trial."""
+        # NB like the extracellular potentials, the currents at time 0.0 ms
+        # are defined to be zero
+        self._samples = [np.zeros(len(self.gids))]
+        self._n_steps = 0
+
+    def _get_currents(self, n_samples):
+        """The recorded currents, shape (n_sources, n_samples)."""
+        return np.ascontiguousarray(np.array(self._samples[:n_samples]).T)
@@ -12,7 +12,7 @@ from collections import OrderedDict
 from pathlib import Path
 
 from .cell import Cell, Section
-from .cell_response import CellResponse
+from .cell_response import CellResponse, _TraceData
 from .externals.mne import fill_doc
 
 
@@ -59,7 +59,7 @@ def _conn_to_dict(conn):
         "src_type": conn["src_type"],
         "src_gids": list(conn["src_gids"]),
         "num_srcs": conn["num_srcs"],
-        "gid_pairs": {str(key): val for key, val in conn["gid_pairs"].items()},
+        "gid_pairs": {str(key): list(val) for key, val in conn["gid_pairs"].items()},
         "loc": conn["loc"],
         "receptor": conn["receptor"],
         "nc_dict": conn["nc_dict"],
@@ -78,7 +78,10 @@ def _external_drive_to_dict(drive, write_output):
             drive_data[key] = list(drive[key])
         else:
             drive_data[key] = drive[key]
-    if not write_output:
+    if write_output:
+        # event times may be created on demand for each trial
+        drive_data["events"] = list(drive["events"])
+    else:
         drive_data["events"] = list()
     return drive_data
 
@@ -226,14 +229,17 @@ def _read_cell_response(cell_response_data, read_output):
     )
 
     cell_response._times = cell_response_data["times"]
-    cell_response._vsec = list()
+    n_times = len(cell_response_data["times"])
+    vsec = list()
     for trial in cell_response_data["vsec"]:
         trial = dict((int(key), val) for key, val in trial.items())
-        cell_response._vsec.append(trial)
-    cell_response._isec = list()
+        vsec.append(trial)
+    cell_response._vsec = _TraceData._from_trials(vsec, n_times)
+    isec = list()
     for trial in cell_response_data["isec"]:
         trial = dict((int(key), val) for key, val in trial.items())
-        cell_response._isec.append(trial)
+        isec.append(trial)
+    cell_response._isec = _TraceData._from_trials(isec, n_times)
     return cell_response
 
 
@@ -355,6 +361,7 @@ def _read_rec_arrays(net, rec_arrays_data, read_output):
             conductivity=rec_array["conductivity"],
             method=rec_array["method"],
             min_distance=rec_array["min_distance"],
+            compression=rec_array.get("compression"),
         )
         net.rec_arrays[key]._times = rec_array["times"]
         net.rec_arrays[key]._data = rec_array["voltages"]
@@ -33,6 +33,28 @@ def _str_to_net(input_str):
     return net
 
 
+def _file_to_net(net_file, net_size):
+    """Unpickle the net from the temp file written by the parent process.
+
+    The file is removed once read.
+    """
+    try:
+        with open(net_file, "rb") as f:
+            data_bytes = f.read()
+    finally:
+        try:
+            os.unlink(net_file)
+        except OSError:
+            pass
+
+    if len(data_bytes) != net_size:
+        raise ValueError(
+            "Got incorrect network size: %d bytes " % len(data_bytes)
+            + "expected length: %d" % net_size
+        )
+    return pickle.loads(data_bytes)
+
+
 class MPISimulation(object):
     """The MPISimulation class.
     Parameters
@@ -83,20 +105,35 @@ class MPISimulation(object):
             MPI.Finalize()
 
     def _read_net(self):
-        """Read net broadcasted to all ranks on stdin"""
+        """Read net broadcasted to all ranks
+
+        The parent signals the path and byte count of a temp file holding the
+        pickled net on stdin as "@net_file:PATH:SIZE@". The net can also be
+        sent inline, base64-encoded between "@start_of_net@" and
+        "@end_of_net:SIZE@". Returns None on all ranks if the parent sent
+        "@shutdown@" (or closed stdin) instead of a network.
+        """
 
         # read Network from stdin
         if self.rank == 0:
-            input_str = ""
+            # collect the lines of an inline net and join them once at the
+            # end, since concatenating them one by one is quadratic
+            input_lines = list()
+            net = None
             while True:
                 line = sys.stdin.readline()
-                line = line.rstrip("\n")
-                input_str += line
-                end_match = re.search(r"@end_of_net:\d+@", input_str)
+                if line == "" or "@shutdown@" in line:
+                    break
+                file_match = re.search(r"@net_file:(.+):(\d+)@", line)
+                if file_match is not None:
+                    net = _file_to_net(file_match.group(1), int(file_match.group(2)))
+                    break
+                input_lines.append(line.rstrip("\n"))
+                # only the latest line can complete the message
+                end_match = re.search(r"@end_of_net:\d+@", line)
                 if end_match is not None:
+                    net = _str_to_net("".join(input_lines))
                     break
-
-            net = _str_to_net(input_str)
         else:
             net = None
 
@@ -113,12 +150,13 @@ class MPISimulation(object):
 
         # read from stdin
         if self.rank == 0:
-            input_str = ""
             while True:
                 line = sys.stdin.readline()
-                line = line.rstrip("\n")
-                input_str += line
-                if "@data_received@" in input_str:
+                if line == "":
+                    # parent closed stdin
+                    break
+                # the signal is written on a line of its own
+                if "@data_received@" in line:
                     break
 
     def _write_data_tempfile(self, sim_data):
@@ -174,18 +212,45 @@ class MPISimulation(object):
                     f"Rank 0 finished writing data to temp file {tmp_path}"
                 )
 
-    def run(self, net, tstop, dt, n_trials):
-        """Run MPI simulation(s) and write results to stderr"""
+    def run(self, net, tstop, dt, n_trials, net_key=None, subworld_size=None):
+        """Run MPI simulation(s) and write results to stderr
+
+        If ``net_key`` is given, the network built by a previous call with the
+        same key is reused (see ``hnn_core.network_builder._network_key``).
+
+        If ``subworld_size`` is given, the ranks are split into groups of that
+        size, each group simulating a share of the trials. The data of all
+        trials is then collected on rank 0.
+        """
 
-        from hnn_core.network_builder import _simulate_single_trial
+        from hnn_core.network_builder import (
+            NetworkBuilder,
+            _create_subworlds,
+            _get_cached_network,
+            _get_rank,
+            _set_cached_network,
+            _simulate_single_trial,
+        )
+
+        trial_idxs = range(n_trials)
+        n_groups = 1
+        if subworld_size is not None:
+            group_idx, n_groups = _create_subworlds(subworld_size)
+            trial_idxs = range(group_idx, n_trials, n_groups)
 
         sim_data = list()
-        for trial_idx in range(n_trials):
+        neuron_net = _get_cached_network(net, net_key)
+        for trial_idx in trial_idxs:
             if self.logger:
                 self.logger.info(
                     f"Beginning simulation of trial {trial_idx} on rank {self.rank}"
                 )
-            single_sim_data = _simulate_single_trial(net, tstop, dt, trial_idx)
+            # build the network once, then reuse it for the remaining trials
+            if neuron_net is None:
+                neuron_net = NetworkBuilder(net, trial_idx=trial_idx)
+            single_sim_data = _simulate_single_trial(
+                net, tstop, dt, trial_idx, neuron_net=neuron_net
+            )
 
             # go ahead and append trial data for each rank, though
             # only rank 0 has data that should be sent back to MPIBackend
@@ -196,6 +261,20 @@ class MPISimulation(object):
                     f"Successfully finished simulation of trial {trial_idx} on rank {self.rank}"
                 )
 
+        _set_cached_network(neuron_net, net_key)
+
+        if n_groups > 1:
+            # only rank 0 of each group holds complete trial data
+            group_data = dict()
+            if _get_rank() == 0:
+                group_data = dict(zip(trial_idxs, sim_data))
+            all_group_data = self.comm.gather(group_data, root=0)
+            if self.rank == 0:
+                trial_data = dict()
+                for data in all_group_data:
+                    trial_data.update(data)
+                sim_data = [trial_data[trial_idx] for trial_idx in range(n_trials)]
+
         # flush output buffers from all ranks (any errors or status messages)
         sys.stdout.flush()
         sys.stderr.flush()
@@ -213,13 +292,29 @@ if __name__ == "__main__":
 
     rc = 0
     verbose_subprocess = "--verbose-subprocess" in sys.argv
+    # with --persistent, keep accepting jobs until MPIBackend sends the
+    # shutdown signal
+    persistent = "--persistent" in sys.argv
 
     try:
         with MPISimulation(verbose_subprocess=verbose_subprocess) as mpi_sim:
-            net, tstop, dt, n_trials = mpi_sim._read_net()
-            sim_data = mpi_sim.run(net, tstop, dt, n_trials)
-            mpi_sim._send_data_to_parent_process(sim_data)
-            mpi_sim._wait_for_exit_signal()
+            while True:
+                job = mpi_sim._read_net()
+                if job is None:
+                    break
+                net, tstop, dt, n_trials, net_key, subworld_size = job
+                sim_data = mpi_sim.run(
+                    net,
+                    tstop,
+                    dt,
+                    n_trials,
+                    net_key=net_key,
+                    subworld_size=subworld_size,
+                )
+                mpi_sim._send_data_to_parent_process(sim_data)
+                mpi_sim._wait_for_exit_signal()
+                if not persistent:
+                    break
     except Exception:
         # This can be useful to indicate the problem to the
         # caller (in parallel_backends.py)
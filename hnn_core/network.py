@@ -8,15 +8,17 @@
 #          Ryan Thorpe <ryan_thorpe@brown.edu>
 
 import itertools as it
+import operator
 from copy import deepcopy
 from collections import OrderedDict, defaultdict
+from collections.abc import ItemsView, Mapping, MutableMapping, ValuesView
 from typing import Dict
 
 import numpy as np
 import warnings
 
 from .cell_response import read_spikes
-from .drives import _drive_cell_event_times
+from .drives import _DriveEvents
 from .drives import _get_target_properties, _add_drives_from_params
 from .drives import _check_drive_parameter_values, _check_poisson_rates
 from .cells_default import pyramidal, basket
@@ -25,6 +27,7 @@ from .viz import plot_cells
 from .externals.mne import _validate_type, _check_option
 from .extracellular import ExtracellularArray
 from .check import _check_gids, _gid_to_type, _string_input_to_list
+from .check import _get_gid_type_table
 from .hnn_io import write_network_configuration, network_to_dict
 from .externals.mne import copy_doc
 from .utils import _replace_dict_identifier
@@ -168,33 +171,24 @@ def _connection_probability(conn, probability, conn_seed=None):
     _validate_type(probability, float, "probability")
     if probability <= 0.0 or probability >= 1.0:
         raise ValueError("probability must be in the range (0,1)")
-    # Flatten connections into a list of targets.
-    all_connections = np.concatenate(
-        [target_src_pair for target_src_pair in conn["gid_pairs"].values()]
-    )
-    n_connections = np.round(len(all_connections) * probability).astype(int)
+    # Flatten connections into an array of targets.
+    gid_pairs = _GidPairs(conn["gid_pairs"])
+    n_all_connections = len(gid_pairs.target_gids)
+    n_connections = np.round(n_all_connections * probability).astype(int)
 
     # Select a random subset of connections to retain.
-    new_connections = rng.choice(
-        range(len(all_connections)), n_connections, replace=False
+    new_connections = rng.choice(range(n_all_connections), n_connections, replace=False)
+    keep = np.zeros(n_all_connections, dtype=bool)
+    keep[new_connections] = True
+
+    # Count the targets retained by each src_gid and keep src_gids with targets
+    src_idxs = np.repeat(np.arange(len(gid_pairs)), np.diff(gid_pairs.offsets))
+    n_targets = np.bincount(src_idxs[keep], minlength=len(gid_pairs))
+    has_targets = n_targets > 0
+    offsets = np.concatenate([[0], np.cumsum(n_targets[has_targets])])
+    conn["gid_pairs"] = _GidPairs._from_arrays(
+        gid_pairs.src_gids[has_targets], offsets, gid_pairs.target_gids[keep]
     )
-    remove_srcs = list()
-    connection_idx = 0
-    for src_gid, target_src_pair in conn["gid_pairs"].items():
-        target_new = list()
-        for target_gid in target_src_pair:
-            if connection_idx in new_connections:
-                target_new.append(target_gid)
-            connection_idx += 1
-
-        # Update targets for src_gid
-        if target_new:
-            conn["gid_pairs"][src_gid] = target_new
-        else:
-            remove_srcs.append(src_gid)
-    # Remove src_gids with no targets
-    for src_gid in remove_srcs:
-        conn["gid_pairs"].pop(src_gid)
 
 
 def pick_connection(net, src_gids=None, target_gids=None, loc=None, receptor=None):
@@ -263,31 +257,17 @@ def pick_connection(net, src_gids=None, target_gids=None, loc=None, receptor=Non
     loc_list = _string_input_to_list(loc, valid_loc, "loc")
     receptor_list = _string_input_to_list(receptor, valid_receptor, "receptor")
 
-    # Create lookup dictionaries
-    src_dict, target_dict = defaultdict(list), defaultdict(list)
-    loc_dict, receptor_dict = defaultdict(list), defaultdict(list)
-    for conn_idx, conn in enumerate(net.connectivity):
-        # Store connections matching each src_gid
-        for src_gid in conn["src_gids"]:
-            src_dict[src_gid].append(conn_idx)
-
-        # Store connections matching each target_gid
-        for target_gid in conn["target_gids"]:
-            target_dict[target_gid].append(conn_idx)
-
-        # Store connections matching each location
-        loc_dict[conn["loc"]].append(conn_idx)
-
-        # Store connections matching each receptor
-        receptor_dict[conn["receptor"]].append(conn_idx)
+    # Lookup dictionaries kept by the Network
+    conn_index = net._connectivity_index
+    conn_index.update(net.connectivity)
 
     # Look up conn indices that match search terms and add to set.
     conn_set = set()
     search_pairs = [
-        (src_gids_checked, src_dict),
-        (target_gids_checked, target_dict),
-        (loc_list, loc_dict),
-        (receptor_list, receptor_dict),
+        (src_gids_checked, conn_index.src_dict),
+        (target_gids_checked, conn_index.target_dict),
+        (loc_list, conn_index.loc_dict),
+        (receptor_list, conn_index.receptor_dict),
     ]
     for search_terms, search_dict in search_pairs:
         if search_terms:
@@ -423,6 +403,9 @@ class Network:
         for extracellular potential measurements. Multiple electrode arrays
         may be defined as unique keys. The values of the dictionary are
         instances of :class:`hnn_core.extracellular.ExtracellularArray`.
+    membrane_currents : MembraneCurrents | None
+        The transmembrane currents recorded in the last simulation, if
+        ``record_imem`` was passed to :func:`~hnn_core.simulate_dipole`.
     threshold : float
         Firing threshold of all cells.
     delay : float
@@ -457,6 +440,7 @@ class Network:
         # artificial drive cells
         self.gid_ranges = OrderedDict()
         self._n_gids = 0  # utility: keep track of last GID
+        self._gid_type_table = None  # cached by _get_gid_type_table()
         self._verbose = True
 
         # XXX this can be removed once tests are made independent of HNN GUI
@@ -479,11 +463,13 @@ class Network:
 
         # network connectivity
         self.connectivity = list()
+        self._connectivity_index = _ConnectivityIndex()
         self.threshold = self._params["threshold"]
         self.delay = 1.0
 
         # extracellular recordings (if applicable)
         self.rec_arrays = dict()
+        self.membrane_currents = None
 
         # contents of pos_dict determines all downstream inferences of
         # cell counts, real and artificial
@@ -562,6 +548,7 @@ class Network:
 
         self._tstop = None
         self._dt = None
+        self._record_dir = None
 
     def __repr__(self):
         class_name = self.__class__.__name__
@@ -667,7 +654,8 @@ class Network:
         instantiated ``events`` of the drives are cleared. This allows
         iterating over the values defining drive dynamics, without the need to
         re-define connectivity. Extracellular recording arrays are retained in
-        the network, but cleared of existing data.
+        the network, but cleared of existing data, and recorded membrane
+        currents are not retained.
 
         Returns
         -------
@@ -675,9 +663,35 @@ class Network:
             A copy of the instance with previous simulation results and
             ``events`` of external drives removed.
         """
-        net_copy = deepcopy(self)
-        net_copy._reset_drives()
-        net_copy._reset_rec_arrays()
+        # Cell templates, connection and drive parameters may be modified in
+        # place, e.g., by the set_params function of an optimization, and are
+        # deep copied. The arrays of the gid pairs of connections (see
+        # _GidPairs) and the position tuples of cells are never modified in
+        # place and are shared with the copy. Data that is cleared in the copy
+        # is not copied.
+        net_copy = Network.__new__(type(self))
+        memo = {id(self): net_copy}
+        for attr, value in vars(self).items():
+            if attr == "pos_dict":
+                value = {
+                    cell_type: _copy_positions(positions, memo)
+                    for cell_type, positions in value.items()
+                }
+            elif attr == "external_drives":
+                value = {
+                    drive_name: _copy_drive(drive, memo)
+                    for drive_name, drive in value.items()
+                }
+            elif attr == "rec_arrays":
+                value = {
+                    arr_name: _copy_attrs(arr, memo, cleared=("_times", "_data"))
+                    for arr_name, arr in value.items()
+                }
+            elif attr == "membrane_currents":
+                value = None
+            else:
+                value = deepcopy(value, memo)
+            setattr(net_copy, attr, value)
         return net_copy
 
     def add_evoked_drive(
@@ -1433,6 +1447,7 @@ class Network:
                         self.connectivity[-1]["src_gids"] = self.connectivity[-2][
                             "src_gids"
                         ]
+                        self._connectivity_index.update(self.connectivity, reindex=-1)
 
             else:
                 for receptor_idx, receptor in enumerate(
@@ -1456,6 +1471,7 @@ class Network:
                         self.connectivity[-1]["src_gids"] = self.connectivity[-2][
                             "src_gids"
                         ]
+                        self._connectivity_index.update(self.connectivity, reindex=-1)
 
     def _reset_drives(self):
         # reset every time called again, e.g., from dipole.py or in self.copy()
@@ -1470,6 +1486,9 @@ class Network:
     def _instantiate_drives(self, tstop, n_trials=1):
         """Creates event time vectors for all drives across trials
 
+        The event times of a trial are only generated when the trial is
+        accessed, e.g., when it is simulated.
+
         Parameters
         ----------
         tstop : float
@@ -1484,52 +1503,36 @@ class Network:
         """
         self._reset_drives()
 
-        # each trial needs unique event time vectors
-        for trial_idx in range(n_trials):
-            for drive in self.external_drives.values():
-                event_times = list()  # new list for each trial and drive
-                for drive_cell_gid in self.gid_ranges[drive["name"]]:
-                    drive_cell_gid_offset = (
-                        drive_cell_gid - self.gid_ranges[drive["name"]][0]
-                    )
-                    trial_seed_offset = self._n_gids
-                    if drive["cell_specific"]:
-                        # loop over drives (one for each target cell
-                        # population) and create event times
-                        conn_idxs = pick_connection(self, src_gids=drive_cell_gid)
-                        target_types = set(
+        for drive in self.external_drives.values():
+            drive_cell_gids = self.gid_ranges[drive["name"]]
+            if drive["cell_specific"]:
+                # create event times for each target cell population of the
+                # drive cells
+                target_types = list()
+                for drive_cell_gid in drive_cell_gids:
+                    conn_idxs = pick_connection(self, src_gids=drive_cell_gid)
+                    target_types.append(
+                        set(
                             [
                                 self.connectivity[conn_idx]["target_type"]
                                 for conn_idx in conn_idxs
                             ]
                         )
-                        for target_type in target_types:
-                            event_times.append(
-                                _drive_cell_event_times(
-                                    drive["type"],
-                                    drive["dynamics"],
-                                    target_type=target_type,
-                                    trial_idx=trial_idx,
-                                    drive_cell_gid=drive_cell_gid_offset,
-                                    event_seed=drive["event_seed"],
-                                    tstop=tstop,
-                                    trial_seed_offset=trial_seed_offset,
-                                )
-                            )
-                    else:
-                        src_event_times = _drive_cell_event_times(
-                            drive["type"],
-                            drive["dynamics"],
-                            tstop=tstop,
-                            target_type="any",
-                            trial_idx=trial_idx,
-                            drive_cell_gid=drive_cell_gid_offset,
-                            event_seed=drive["event_seed"],
-                            trial_seed_offset=trial_seed_offset,
-                        )
-                        event_times.append(src_event_times)
-                # 'events': nested list (n_trials x n_drive_cells x n_events)
-                self.external_drives[drive["name"]]["events"].append(event_times)
+                    )
+            else:
+                target_types = [["any"]] * len(drive_cell_gids)
+            # each trial needs unique event time vectors, which are created
+            # when the trial is simulated
+            # 'events': nested sequence (n_trials x n_drive_cells x n_events)
+            drive["events"] = _DriveEvents(
+                drive["type"],
+                drive["dynamics"],
+                tstop=tstop,
+                target_types=target_types,
+                n_trials=n_trials,
+                event_seed=drive["event_seed"],
+                trial_seed_offset=self._n_gids,
+            )
 
     def add_tonic_bias(
         self,
@@ -1687,8 +1690,57 @@ class Network:
                     ]
 
     def gid_to_type(self, gid):
-        """Reverse lookup of gid to type."""
-        return _gid_to_type(gid, self.gid_ranges)
+        """Reverse lookup of gid to type.
+
+        Parameters
+        ----------
+        gid : int | array-like of int
+            The gid(s) to look up.
+
+        Returns
+        -------
+        gid_type : str | None | array of str or None
+            The type of the gid in ``gid_ranges``, None if the gid is not in
+            any. For an array-like of gids, an object array of the same shape
+            containing the type of each gid.
+        """
+        if not isinstance(gid, (list, tuple, range, np.ndarray)):
+            if not isinstance(gid, (int, np.integer)):
+                return _gid_to_type(gid, self.gid_ranges)
+            gid_types, gid_type_idxs, _ = self._get_gid_type_table()
+            if 0 <= gid < len(gid_type_idxs) and gid_type_idxs[gid] >= 0:
+                return gid_types[gid_type_idxs[gid]]
+            return None
+
+        gid_types, gid_type_idxs, _ = self._get_gid_type_table()
+        gids = np.asarray(gid, dtype=int)
+        valid = (gids >= 0) & (gids < len(gid_type_idxs))
+        type_idxs = np.full(gids.shape, -1, dtype=int)
+        type_idxs[valid] = gid_type_idxs[gids[valid]]
+        # the type index -1 of gids without a type selects the trailing None
+        type_names = np.array(gid_types + [None], dtype=object)
+        return type_names[type_idxs]
+
+    def _get_gid_type_table(self):
+        """Lookup table of gids to the index of their type in gid_ranges.
+
+        The table is cached and rebuilt whenever ``gid_ranges`` changes.
+
+        Returns
+        -------
+        gid_types : list of str
+            The types in ``gid_ranges``.
+        gid_type_idxs : array of int, shape (max_gid + 1,)
+            The index into gid_types of the type of each gid, -1 for the gids
+            without a type.
+        type_offsets : array of int, shape (n_types,)
+            The first gid of each type.
+        """
+        # the values of gid_ranges are immutable ranges
+        signature = tuple(self.gid_ranges.items())
+        if self._gid_type_table is None or self._gid_type_table[0] != signature:
+            self._gid_type_table = (signature, *_get_gid_type_table(self.gid_ranges))
+        return self._gid_type_table[1:]
 
     def add_connection(
         self,
@@ -1826,7 +1878,7 @@ class Network:
         conn["src_gids"] = set(src_gids)
         conn["num_srcs"] = len(src_gids)
 
-        conn["gid_pairs"] = gid_pairs
+        conn["gid_pairs"] = _GidPairs(gid_pairs)
 
         # Validate string inputs
         _validate_type(loc, str, "loc")
@@ -1895,6 +1947,7 @@ class Network:
         conn["allow_autapses"] = allow_autapses
 
         self.connectivity.append(deepcopy(conn))
+        self._connectivity_index.update(self.connectivity)
 
     def clear_connectivity(self):
         """Remove all connections defined in Network.connectivity"""
@@ -1903,6 +1956,7 @@ class Network:
             if conn["src_type"] in self.external_drives.keys():
                 connectivity.append(conn)
         self.connectivity = connectivity
+        self._connectivity_index = _ConnectivityIndex()
 
     def clear_drives(self):
         """Remove all drives defined in Network.connectivity"""
@@ -1911,6 +1965,7 @@ class Network:
             for conn in self.connectivity
             if conn["src_type"] not in self.external_drives.keys()
         ]
+        self._connectivity_index = _ConnectivityIndex()
 
         for cell_name in list(self.gid_ranges.keys()):
             if cell_name in self.external_drives:
@@ -1921,7 +1976,15 @@ class Network:
         self.external_drives = dict()
 
     def add_electrode_array(
-        self, name, electrode_pos, *, conductivity=0.3, method="psa", min_distance=0.5
+        self,
+        name,
+        electrode_pos,
+        *,
+        conductivity=0.3,
+        method="psa",
+        min_distance=0.5,
+        cache_dir=None,
+        compression=None,
     ):
         """Specify coordinates of electrode array for extracellular recording.
 
@@ -1947,6 +2010,19 @@ class Network:
             minimum distance limit between the electrode contacts and the
             active neuronal membrane elements that act as sources of current.
             The default value of 0.5 um corresponds to 1 um diameter dendrites.
+        cache_dir : path-like | None
+            If not None, the transfer resistances between the electrodes and
+            the segments of the cells are saved to files in this directory,
+            and read back by later simulations with the same cell geometry and
+            electrode array. The directory is not saved to network files.
+            Default: None.
+        compression : 'section' | 'multipole' | None
+            If not None, the currents of the segments of each section are
+            projected onto summary sources of the section before computing
+            the potentials, which is faster but less accurate. Sections close
+            to a contact are not compressed. See
+            :class:`~hnn_core.extracellular.ExtracellularArray`.
+            Default: None.
         """
         _validate_type(name, str, "name")
         if name in self.rec_arrays.keys():
@@ -1960,6 +2036,8 @@ class Network:
                     conductivity=conductivity,
                     method=method,
                     min_distance=min_distance,
+                    cache_dir=cache_dir,
+                    compression=compression,
                 )
             }
         )
@@ -2269,8 +2347,8 @@ class _Connectivity(dict):
         Cell type of source gids.
     target_type : str
         Cell type of target gids.
-    gid_pairs : dict
-        dict indexed by src gids with the format:
+    gid_pairs : instance of _GidPairs
+        Dict-like object indexed by src gids with the format:
         {src_gid: [target_gids, ...], ...}
         where each src_gid indexes a list of all its targets.
     num_srcs : int
@@ -2328,6 +2406,318 @@ class _Connectivity(dict):
         return entr
 
 
+class _GidPairs(MutableMapping):
+    """The target gids of each src gid of a connection.
+
+    A dict-like object of the format {src_gid: [target_gids, ...], ...},
+    stored in compressed sparse row format: the target gids of all src gids
+    are concatenated in one array and delimited by offsets. This keeps
+    copying, pickling and serializing the connectivity of large networks
+    cheap.
+
+    The arrays are never modified in place. Writes, including in-place
+    changes of the lists of target gids it returns, replace them with new
+    arrays, so that copies can share the arrays until either is modified.
+
+    Parameters
+    ----------
+    gid_pairs : dict of list of int | instance of _GidPairs | None
+        The target gids of each src gid. Instances of _GidPairs share their
+        arrays.
+
+    Attributes
+    ----------
+    src_gids : array of int32, shape (n_srcs,)
+        The src gids, in insertion order.
+    offsets : array of int64, shape (n_srcs + 1,)
+        The target gids of ``src_gids[idx]`` are
+        ``target_gids[offsets[idx]:offsets[idx + 1]]``.
+    target_gids : array of int32, shape (n_pairs,)
+        The target gids of all src gids.
+    """
+
+    def __init__(self, gid_pairs=None):
+        if gid_pairs is None:
+            gid_pairs = dict()
+        if isinstance(gid_pairs, _GidPairs):
+            self._set_arrays(
+                gid_pairs.src_gids, gid_pairs.offsets, gid_pairs.target_gids
+            )
+        else:
+            self._set_dict(gid_pairs)
+
+    @classmethod
+    def _from_arrays(cls, src_gids, offsets, target_gids):
+        """Create an instance from its compressed sparse row arrays."""
+        gid_pairs = cls()
+        gid_pairs._set_arrays(src_gids, offsets, target_gids)
+        return gid_pairs
+
+    def _set_dict(self, gid_pairs):
+        src_gids = np.array(list(gid_pairs.keys()), dtype=np.int32)
+        n_targets = [len(target_gids) for target_gids in gid_pairs.values()]
+        offsets = np.zeros(len(src_gids) + 1, dtype=np.int64)
+        np.cumsum(n_targets, out=offsets[1:])
+        target_gids = np.fromiter(
+            it.chain.from_iterable(gid_pairs.values()),
+            dtype=np.int32,
+            count=offsets[-1],
+        )
+        self._set_arrays(src_gids, offsets, target_gids)
+
+    def _set_arrays(self, src_gids, offsets, target_gids):
+        self.src_gids = np.asarray(src_gids, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.target_gids = np.asarray(target_gids, dtype=np.int32)
+        for arr in (self.src_gids, self.offsets, self.target_gids):
+            arr.flags.writeable = False
+        self._src_idxs = None
+        # lists of target gids handed out before are no longer written back
+        self._version = getattr(self, "_version", 0) + 1
+
+    def _get_src_idx(self, src_gid):
+        if self._src_idxs is None:
+            self._src_idxs = {
+                gid: src_idx for src_idx, gid in enumerate(self.src_gids.tolist())
+            }
+        return self._src_idxs[src_gid]
+
+    def __getitem__(self, src_gid):
+        src_idx = self._get_src_idx(src_gid)
+        start, stop = self.offsets[src_idx], self.offsets[src_idx + 1]
+        return _TargetGids(self, int(src_gid), self.target_gids[start:stop].tolist())
+
+    def __setitem__(self, src_gid, target_gids):
+        gid_pairs = dict(zip(self, map(list, self._iter_targets())))
+        gid_pairs[int(src_gid)] = list(target_gids)
+        self._set_dict(gid_pairs)
+
+    def __delitem__(self, src_gid):
+        gid_pairs = dict(zip(self, map(list, self._iter_targets())))
+        del gid_pairs[int(src_gid)]
+        self._set_dict(gid_pairs)
+
+    def __contains__(self, src_gid):
+        try:
+            self._get_src_idx(src_gid)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.src_gids.tolist())
+
+    def _iter_targets(self):
+        # slicing a list is faster than converting each slice of the array
+        target_gids, offsets = self.target_gids.tolist(), self.offsets.tolist()
+        for src_gid, start, stop in zip(self, offsets[:-1], offsets[1:]):
+            yield _TargetGids(self, src_gid, target_gids[start:stop])
+
+    def items(self):
+        return _GidPairsItemsView(self)
+
+    def values(self):
+        return _GidPairsValuesView(self)
+
+    def __len__(self):
+        return len(self.src_gids)
+
+    def __eq__(self, other):
+        if isinstance(other, _GidPairs) and (
+            np.array_equal(self.src_gids, other.src_gids)
+            and np.array_equal(self.offsets, other.offsets)
+            and np.array_equal(self.target_gids, other.target_gids)
+        ):
+            return True
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        # target gids compare equal as lists or tuples
+        return dict(zip(self, map(list, self._iter_targets()))) == {
+            src_gid: list(target_gids) for src_gid, target_gids in other.items()
+        }
+
+    def __repr__(self):
+        return repr(dict(zip(self, map(list, self._iter_targets()))))
+
+    def __getstate__(self):
+        return {
+            "src_gids": self.src_gids,
+            "offsets": self.offsets,
+            "target_gids": self.target_gids,
+        }
+
+    def __setstate__(self, state):
+        self._set_arrays(state["src_gids"], state["offsets"], state["target_gids"])
+
+    # the arrays are never modified in place and thus shared by copies
+    def __copy__(self):
+        return _GidPairs(self)
+
+    def __deepcopy__(self, memo):
+        return _GidPairs(self)
+
+    def _get_pairs(self):
+        """The src and target gid of each connected pair, in order.
+
+        Returns
+        -------
+        src_gids : array of int, shape (n_pairs,)
+            The src gid of each pair.
+        target_gids : array of int, shape (n_pairs,)
+            The target gid of each pair.
+        """
+        return np.repeat(self.src_gids, np.diff(self.offsets)), self.target_gids
+
+
+def _write_back(method_name):
+    """Wrap a list method to write the changes of _TargetGids back."""
+    method = getattr(list, method_name)
+
+    def _method(self, *args, **kwargs):
+        out = method(self, *args, **kwargs)
+        self._write_back()
+        return self if method_name.startswith("__i") else out
+
+    _method.__name__ = method_name
+    return _method
+
+
+class _TargetGids(list):
+    """The target gids of a src gid of _GidPairs.
+
+    A list whose in-place changes are written back to the _GidPairs it was
+    taken from, as long as that was not modified otherwise in the meantime.
+    """
+
+    def __init__(self, gid_pairs, src_gid, target_gids):
+        super().__init__(target_gids)
+        self._gid_pairs = gid_pairs
+        self._src_gid = src_gid
+        self._version = gid_pairs._version
+
+    def _write_back(self):
+        gid_pairs = self._gid_pairs
+        if gid_pairs is not None and gid_pairs._version == self._version:
+            gid_pairs[self._src_gid] = list(self)
+            self._version = gid_pairs._version
+        else:
+            self._gid_pairs = None
+
+    def __reduce__(self):
+        # copies are plain lists
+        return list, (list(self),)
+
+
+for _method_name in (
+    "append",
+    "extend",
+    "insert",
+    "remove",
+    "pop",
+    "clear",
+    "sort",
+    "reverse",
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+):
+    setattr(_TargetGids, _method_name, _write_back(_method_name))
+
+
+class _GidPairsItemsView(ItemsView):
+    def __iter__(self):
+        return zip(self._mapping, self._mapping._iter_targets())
+
+
+class _GidPairsValuesView(ValuesView):
+    def __iter__(self):
+        return self._mapping._iter_targets()
+
+
+class _ConnectivityIndex(object):
+    """Index of the connections of a Network by their search parameters.
+
+    Maps each src gid, target gid, loc and receptor to the indices of the
+    connections with it in ``Network.connectivity``, in increasing order.
+    Connections appended to ``Network.connectivity`` are indexed
+    incrementally, whereas the whole index is rebuilt when an indexed
+    connection is removed or replaced.
+
+    Attributes
+    ----------
+    src_dict : dict of list
+        The indices of the connections of each src gid.
+    target_dict : dict of list
+        The indices of the connections of each target gid.
+    loc_dict : dict of list
+        The indices of the connections of each location.
+    receptor_dict : dict of list
+        The indices of the connections of each receptor.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def __deepcopy__(self, memo):
+        # the index of a copy is rebuilt when first needed
+        return _ConnectivityIndex()
+
+    def _reset(self):
+        self._conns = list()
+        self._conn_terms = list()
+        self.src_dict, self.target_dict = defaultdict(list), defaultdict(list)
+        self.loc_dict, self.receptor_dict = defaultdict(list), defaultdict(list)
+
+    def _search_dicts(self):
+        return [self.src_dict, self.target_dict, self.loc_dict, self.receptor_dict]
+
+    def update(self, connectivity, reindex=None):
+        """Bring the index up to date with the connections of a Network.
+
+        Parameters
+        ----------
+        connectivity : list of _Connectivity
+            The connections of the Network.
+        reindex : int | None
+            The index of a connection whose search parameters were modified
+            in place, to be indexed again. The last connection is reindexed
+            incrementally, any other one by rebuilding the index.
+        """
+        n_indexed = len(self._conns)
+        if n_indexed > len(connectivity) or not all(
+            map(operator.is_, self._conns, connectivity)
+        ):
+            self._reset()
+        elif reindex is not None:
+            reindex = range(len(connectivity))[reindex]
+            if reindex == n_indexed - 1:
+                # the last connection is last in the lists of its terms
+                self._conns.pop()
+                conn_terms = self._conn_terms.pop()
+                for search_terms, search_dict in zip(conn_terms, self._search_dicts()):
+                    for term in search_terms:
+                        search_dict[term].pop()
+                        if not search_dict[term]:
+                            del search_dict[term]
+            elif reindex < n_indexed:
+                self._reset()
+
+        for conn_idx in range(len(self._conns), len(connectivity)):
+            conn = connectivity[conn_idx]
+            conn_terms = [
+                conn["src_gids"],
+                conn["target_gids"],
+                [conn["loc"]],
+                [conn["receptor"]],
+            ]
+            for search_terms, search_dict in zip(conn_terms, self._search_dicts()):
+                for term in search_terms:
+                    search_dict[term].append(conn_idx)
+            self._conns.append(conn)
+            self._conn_terms.append(conn_terms)
+
+
 class _NetworkDrive(dict):
     """A class for containing the parameters of external drives
 
@@ -2384,6 +2774,30 @@ class _NetworkDrive(dict):
         return entr
 
 
+def _copy_positions(positions, memo):
+    """Copy a list of cell positions, sharing the immutable tuples."""
+    if isinstance(positions, list) and all(isinstance(pos, tuple) for pos in positions):
+        return list(positions)
+    return deepcopy(positions, memo)
+
+
+def _copy_drive(drive, memo):
+    """Deep copy a drive, without its events."""
+    drive_copy = _NetworkDrive()
+    for key, val in drive.items():
+        drive_copy[key] = list() if key == "events" else deepcopy(val, memo)
+    return drive_copy
+
+
+def _copy_attrs(obj, memo, cleared=()):
+    """Deep copy the attributes of an object, leaving some of them empty."""
+    obj_copy = obj.__class__.__new__(obj.__class__)
+    memo[id(obj)] = obj_copy
+    for attr, val in vars(obj).items():
+        setattr(obj_copy, attr, list() if attr in cleared else deepcopy(val, memo))
+    return obj_copy
+
+
 def _add_cell_type_bias(
     network: Network,
     amplitude: float,
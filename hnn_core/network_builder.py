@@ -6,7 +6,9 @@
 
 import os
 import os.path as op
-from copy import deepcopy
+import hashlib
+import heapq
+import pickle
 
 import numpy as np
 from neuron import h
@@ -17,31 +19,166 @@ from neuron import __version__
 if int(__version__[0]) >= 8:
     h.nrnunit_use_legacy(1)
 
-from .cell import _ArtificialCell
+from .cell import _ArtificialCell, _get_gaussian_connection, _record_vector
 from .params import _long_name, _short_name
-from .extracellular import _ExtracellularArrayBuilder
-from .network import pick_connection
+from .extracellular import _ExtracellularArrayBuilder, _MembraneCurrentBuilder
+from .network import pick_connection, _GidPairs
 
 # a few globals
 _PC = None
 _CVODE = None
 
+# interval (ms) at which recorded traces are written to disk if streaming
+_STREAM_INTERVAL = 100.0
+
 # We need to maintain a reference to the last
 # NetworkBuilder instance that ran pc.gid_clear(). Even if
 # pc is global, if pc.gid_clear() is called within a new
 # NetworkBuilder, it will seg fault.
 _LAST_NETWORK = None
 
+# number of MPI processes in each subworld (see _create_subworlds)
+_SUBWORLD_SIZE = None
+
+# mpi4py communicator of the processes of this process's subworld
+_GROUP_COMM = None
+
+# NetworkBuilder instance kept alive between calls of _simulate_trials in the
+# same process (e.g., a joblib worker), and the key of the Network it was
+# built from
+_CACHED_NETWORK = None
+_CACHED_NETWORK_KEY = None
+
+
+def _network_key(net):
+    """Hash everything in a Network that the NEURON model depends on.
+
+    Drive event times, and the drive parameters only used to generate them,
+    are excluded since events are swapped per trial without rebuilding (see
+    :meth:`NetworkBuilder._set_trial`).
+
+    Parameters
+    ----------
+    net : Network object
+        The Network to be instantiated in NEURON.
+
+    Returns
+    -------
+    key : str
+        Hex digest identifying the instantiated network.
+    """
+    drives = {
+        name: {
+            key: val
+            for key, val in drive.items()
+            if key not in ("events", "dynamics", "event_seed")
+        }
+        for name, drive in net.external_drives.items()
+    }
+    rec_arrays = {
+        name: (
+            arr.positions,
+            arr.conductivity,
+            arr.method,
+            arr.min_distance,
+            arr.compression,
+        )
+        for name, arr in net.rec_arrays.items()
+    }
+    params = {
+        key: net._params.get(key)
+        for key in (
+            "threshold",
+            "celsius",
+            "record_vsec",
+            "record_isec",
+            "record_ca",
+            "record_dt",
+            "record_imem",
+        )
+    }
+    topology = (
+        net.cell_types,
+        net.gid_ranges,
+        net.pos_dict,
+        net.connectivity,
+        net.external_biases,
+        drives,
+        rec_arrays,
+        params,
+        net._inplane_distance,
+    )
+    return hashlib.sha1(
+        pickle.dumps(topology, protocol=pickle.HIGHEST_PROTOCOL)
+    ).hexdigest()
+
+
+def _simulate_trials(net, tstop, dt, trial_idxs, net_key=None):
+    """Simulate several trials, building the network only once
+
+    The NEURON model is instantiated for the first trial and then reused for
+    every following trial: only the drive event times are swapped and the
+    model state is re-initialized.
+
+    If ``net_key`` (see :func:`_network_key`) is given, the instantiated
+    network is also kept for later calls in the same process, and reused
+    as long as they pass the same key.
+    """
+    sim_data = list()
+    neuron_net = _get_cached_network(net, net_key)
+    for trial_idx in trial_idxs:
+        if neuron_net is None:
+            neuron_net = NetworkBuilder(net, trial_idx=trial_idx)
+        sim_data.append(
+            _simulate_single_trial(net, tstop, dt, trial_idx, neuron_net=neuron_net)
+        )
+
+    _set_cached_network(neuron_net, net_key)
+    return sim_data
+
+
+def _get_cached_network(net, net_key):
+    """Return the cached NetworkBuilder if it was built for ``net_key``.
+
+    The cached instance is only valid while it is the last network that was
+    built in this process. Returns None if there is no valid cached network.
+    """
+    if (
+        net_key is None
+        or net_key != _CACHED_NETWORK_KEY
+        or _CACHED_NETWORK is None
+        or _CACHED_NETWORK is not _LAST_NETWORK
+    ):
+        return None
+    # drive events are read from the Network of the current call
+    _CACHED_NETWORK.net = net
+    return _CACHED_NETWORK
+
+
+def _set_cached_network(neuron_net, net_key):
+    """Keep a built NetworkBuilder for later calls passing ``net_key``."""
+    global _CACHED_NETWORK, _CACHED_NETWORK_KEY
 
-def _simulate_single_trial(net, tstop, dt, trial_idx):
+    if net_key is not None and neuron_net is not None:
+        _CACHED_NETWORK, _CACHED_NETWORK_KEY = neuron_net, net_key
+
+
+def _simulate_single_trial(net, tstop, dt, trial_idx, neuron_net=None):
     """Simulate one trial including building the network
 
     This is used by both backends. MPIBackend calls this in mpi_child.py, once
     for each trial (blocking), and JoblibBackend calls this for each trial
     (non-blocking)
+
+    If ``neuron_net`` is an already built NetworkBuilder instance, the
+    network is not rebuilt. Instead, the existing NEURON objects are prepared
+    for ``trial_idx`` using :meth:`NetworkBuilder._set_trial`.
     """
 
-    neuron_net = NetworkBuilder(net, trial_idx=trial_idx)
+    if neuron_net is None:
+        neuron_net = NetworkBuilder(net, trial_idx=trial_idx)
+    else:
+        neuron_net._set_trial(trial_idx)
 
     global _PC, _CVODE
 
@@ -58,7 +195,14 @@ def _simulate_single_trial(net, tstop, dt, trial_idx):
     h.dt = dt  # simulation duration and time-step
     h.celsius = net._params["celsius"]  # 37.0 - set temperature
 
-    times = h.Vector().record(h._ref_t)
+    # record at every time step, or at the coarser record_dt interval
+    record_dt = net._params.get("record_dt")
+    times = _record_vector(h._ref_t, record_dt)
+    record_step = 1 if record_dt is None else int(round(record_dt / dt))
+    for nrn_arr in neuron_net._nrn_rec_arrays.values():
+        nrn_arr._record_step = record_step
+    if neuron_net._nrn_imem is not None:
+        neuron_net._nrn_imem._record_step = record_step
 
     # sets the default max solver step in ms (purposefully large)
     _PC.set_maxstep(10)
@@ -75,6 +219,15 @@ def _simulate_single_trial(net, tstop, dt, trial_idx):
         for tt in range(0, int(h.tstop), 10):
             _CVODE.event(tt, simulation_time)
 
+    # write the recorded traces to disk at regular intervals
+    streamer = None
+    if net._record_dir is not None:
+        streamer = _RecordingStreamer(
+            net._record_dir, neuron_net._cells, times, trial_idx, rank
+        )
+        for tt in np.arange(_STREAM_INTERVAL, tstop, _STREAM_INTERVAL):
+            _CVODE.event(tt, streamer.flush)
+
     h.fcurrent()
 
     # initialization complete, but wait for all procs to start the solver
@@ -85,30 +238,21 @@ def _simulate_single_trial(net, tstop, dt, trial_idx):
 
     _PC.barrier()
 
+    if streamer is not None:
+        streamer.close(neuron_net)
+
     # these calls aggregate data across procs/nodes
     neuron_net.aggregate_data(n_samples=times.size())
 
-    # now convert data from Neuron into Python
-    vsec_py = dict()
-    for gid, vsec_dict in neuron_net._vsec.items():
-        vsec_py[gid] = dict()
-        for sec_name, vsec in vsec_dict.items():
-            vsec_py[gid][sec_name] = vsec.to_python()
-
-    isec_py = dict()
-    for gid, isec_dict in neuron_net._isec.items():
-        isec_py[gid] = dict()
-        for sec_name, isec in isec_dict.items():
-            isec_py[gid][sec_name] = {
-                key: isec.to_python() for key, isec in isec.items()
-            }
-
-    ca_py = dict()
-    for gid, ca_dict in neuron_net._ca.items():
-        ca_py[gid] = dict()
-        for sec_name, ca in ca_dict.items():
-            if ca is not None:
-                ca_py[gid][sec_name] = ca.to_python()
+    # now copy the recorded data from Neuron into contiguous NumPy arrays
+    n_samples = times.size()
+    if streamer is not None:
+        # the recorded traces were written to disk
+        vsec_py = isec_py = ca_py = (dict(), np.empty((0, n_samples)))
+    else:
+        vsec_py = _pack_traces(neuron_net._vsec, n_samples)
+        isec_py = _pack_traces(neuron_net._isec, n_samples)
+        ca_py = _pack_traces(neuron_net._ca, n_samples)
 
     dipole_cell_types = [
         name
@@ -146,20 +290,200 @@ def _simulate_single_trial(net, tstop, dt, trial_idx):
 
     data = {
         "dpl_data": dpl_data,
-        "spike_times": neuron_net._all_spike_times.to_python(),
-        "spike_gids": neuron_net._all_spike_gids.to_python(),
+        "spike_times": neuron_net._all_spike_times.as_numpy().copy(),
+        "spike_gids": neuron_net._all_spike_gids.as_numpy().copy(),
         "gid_ranges": net.gid_ranges,
         "vsec": vsec_py,
         "isec": isec_py,
         "ca": ca_py,
         "rec_data": rec_arr_py,
         "rec_times": rec_times_py,
-        "times": times.to_python(),
+        "imem": neuron_net._imem,
+        "times": times.as_numpy().copy(),
     }
 
     return data
 
 
+def _pack_traces(traces, n_samples):
+    """Copy recorded traces of cells into one contiguous array.
+
+    Parameters
+    ----------
+    traces : dict
+        Nested dicts (gid -> section name [-> synapse name]) of recorded
+        h.Vector objects. Entries that are None are dropped.
+    n_samples : int
+        The number of samples of each trace.
+
+    Returns
+    -------
+    index : dict
+        The nested dicts of traces, with each h.Vector replaced by the row of
+        its samples in ``data``.
+    data : array, shape (n_traces, n_samples)
+        The samples of all traces.
+    """
+    vectors = list()
+
+    def _get_index(traces):
+        index = dict()
+        for key, trace in traces.items():
+            if isinstance(trace, dict):
+                index[key] = _get_index(trace)
+            elif trace is not None:
+                index[key] = len(vectors)
+                vectors.append(trace)
+        return index
+
+    index = _get_index(traces)
+    data = np.empty((len(vectors), n_samples))
+    # read the samples through the buffer of each h.Vector, which NEURON
+    # reuses between trials
+    for row, vec in zip(data, vectors):
+        row[:] = vec.as_numpy()
+    return index, data
+
+
+def _get_record_selection(record):
+    """Get the gids of a recording option as a set for fast lookups."""
+    if isinstance(record, dict) and record["gids"] is not None:
+        record = dict(record, gids=set(record["gids"]))
+    return record
+
+
+def _select_record(record, cell, cell_type):
+    """Get what to record from one cell given a recording option.
+
+    Parameters
+    ----------
+    record : 'all' | 'soma' | dict | False
+        The recording option of the network. A dict has the keys
+        'cell_types', 'gids' and 'sections'.
+    cell : instance of Cell
+        The cell to record from.
+    cell_type : str
+        The cell type of the cell.
+
+    Returns
+    -------
+    record : 'all' | 'soma' | list of str | False
+        The recording option of the cell (see :meth:`Cell.record`).
+    """
+    if not isinstance(record, dict):
+        return record
+    if record["cell_types"] is not None and cell_type not in record["cell_types"]:
+        return False
+    if record["gids"] is not None and cell.gid not in record["gids"]:
+        return False
+    sections = record["sections"]
+    if isinstance(sections, str):
+        return sections
+    sections = [sec_name for sec_name in sections if sec_name in cell.sections]
+    return sections if sections else False
+
+
+def _combine_membrane_currents(imem_list):
+    """Combine the membrane currents recorded on each rank.
+
+    Parameters
+    ----------
+    imem_list : list of tuple
+        The gids, sections, geometry and currents of the sources on each rank
+        (see ``_MembraneCurrentBuilder``).
+
+    Returns
+    -------
+    imem : dict
+        The gids, sections, geometry and currents of all sources, ordered by
+        gid.
+    """
+    gids = np.concatenate([imem[0] for imem in imem_list])
+    # the sources of each cell are kept in their order
+    order = np.argsort(gids, kind="stable")
+    sections = np.concatenate([imem[1] for imem in imem_list])[order]
+    geometry = tuple(
+        np.concatenate([imem[2][idx] for imem in imem_list])[order] for idx in range(3)
+    )
+    currents = np.concatenate([imem[3] for imem in imem_list])[order]
+    return dict(
+        gids=gids[order], sections=sections, geometry=geometry, currents=currents
+    )
+
+
+class _RecordingStreamer(object):
+    """Write the traces recorded on this rank to disk during a simulation.
+
+    The samples recorded since the last flush are written to one file per
+    flush and cleared from the recording h.Vector objects. On closing, the
+    index of the traces and the spikes of the rank are written as well (see
+    :func:`~hnn_core.read_streamed_response`).
+
+    Parameters
+    ----------
+    record_dir : str
+        The directory to write the files to.
+    cells : list of Cell
+        The cells instantiated on this rank.
+    times : h.Vector
+        The recorded sample times.
+    trial_idx : int
+        The index of the simulated trial.
+    rank : int
+        The rank of this process.
+    """
+
+    def __init__(self, record_dir, cells, times, trial_idx, rank):
+        self._fname = op.join(record_dir, f"trial_{trial_idx}_rank_{rank}")
+        self._traces = {
+            key: {cell.gid: getattr(cell, key) for cell in cells}
+            for key in ("vsec", "isec", "ca")
+        }
+        self._times = times
+        self._n_samples = 0
+        self._n_chunks = 0
+
+    def flush(self):
+        """Write the samples recorded since the last flush and clear them."""
+        n_samples = int(self._times.size()) - self._n_samples
+        chunk = {
+            key: _pack_traces(traces, n_samples)[1]
+            for key, traces in self._traces.items()
+        }
+        np.savez(f"{self._fname}_chunk_{self._n_chunks}.npz", **chunk)
+        self._n_chunks += 1
+        self._n_samples += n_samples
+        for traces in self._traces.values():
+            _clear_traces(traces)
+
+    def close(self, neuron_net):
+        """Write the remaining samples, the index of traces and the spikes."""
+        self.flush()
+        net = neuron_net.net
+        recording = {
+            key: _pack_traces(traces, 0)[0] for key, traces in self._traces.items()
+        }
+        recording.update(
+            n_chunks=self._n_chunks,
+            spike_times=neuron_net._spike_times.as_numpy().copy(),
+            spike_gids=neuron_net._spike_gids.as_numpy().copy(),
+            times=self._times.as_numpy().copy(),
+            gid_ranges=net.gid_ranges,
+            cell_type_names=list(net.cell_types.keys()),
+        )
+        with open(f"{self._fname}.pkl", "wb") as f:
+            pickle.dump(recording, f)
+
+
+def _clear_traces(traces):
+    """Clear the samples of nested dicts of recorded h.Vector objects."""
+    for trace in traces.values():
+        if isinstance(trace, dict):
+            _clear_traces(trace)
+        elif trace is not None:
+            trace.resize(0)
+
+
 def _is_loaded_mechanisms():
     # copied from:
     # https://www.neuron.yale.edu/neuron/static/py_doc/modelspec/programmatic/mechtype.html
@@ -231,6 +555,53 @@ def _get_rank():
     return 0
 
 
+def _get_group_comm():
+    """Return the mpi4py communicator of the ranks of ParallelContext.
+
+    Returns
+    -------
+    comm : instance of mpi4py.MPI.Comm
+        The communicator of all MPI processes, or of the processes of the
+        subworld of the current process if they were split into groups (see
+        ``_create_subworlds``). Ranks in it match those of ParallelContext.
+    """
+    global _GROUP_COMM
+
+    if _GROUP_COMM is None:
+        from mpi4py import MPI
+
+        _GROUP_COMM = MPI.COMM_WORLD
+    return _GROUP_COMM
+
+
+def _reduce_to_root(data):
+    """Sum an array over the ranks of ParallelContext on rank 0 only.
+
+    Uses an MPI reduction to rank 0, which receives the sum into ``data``
+    without holding the partial sums of the other ranks.
+
+    Parameters
+    ----------
+    data : array of float
+        The partial sum of this rank. On rank 0, it is summed into in place.
+
+    Returns
+    -------
+    data : array of float
+        The sum over all ranks on rank 0, the partial sum of this rank
+        otherwise.
+    """
+    from mpi4py import MPI
+
+    comm = _get_group_comm()
+    data = np.ascontiguousarray(data, dtype=np.float64)
+    if comm.Get_rank() == 0:
+        comm.Reduce(MPI.IN_PLACE, data, op=MPI.SUM, root=0)
+    else:
+        comm.Reduce(data, None, op=MPI.SUM, root=0)
+    return data
+
+
 def _create_parallel_context(n_cores=None, expose_imem=False):
     """Create parallel context.
 
@@ -268,6 +639,101 @@ def _create_parallel_context(n_cores=None, expose_imem=False):
         _CVODE.use_fast_imem(1)
 
 
+def _create_subworlds(subworld_size):
+    """Split the MPI processes into groups simulating different trials.
+
+    Each group (subworld) of ``subworld_size`` consecutive processes runs its
+    own trials, with the cells of the network distributed over the processes
+    of the group. After the split, ParallelContext methods such as ``id``,
+    ``nhost``, ``allreduce`` and ``py_gather`` refer to the group.
+
+    The processes can only be split once: NEURON's spike exchange does not
+    survive regrouping the processes after a simulation. A single group of
+    all processes is not split at all.
+
+    Parameters
+    ----------
+    subworld_size : int
+        Number of MPI processes in each group. Must divide the total number
+        of processes.
+
+    Returns
+    -------
+    group_idx : int
+        Index of the group the current process belongs to.
+    n_groups : int
+        Number of groups.
+    """
+    global _LAST_NETWORK, _SUBWORLD_SIZE, _GROUP_COMM
+
+    _create_parallel_context()
+    n_hosts_world = int(_PC.nhost_world())
+    if n_hosts_world % subworld_size != 0:
+        raise ValueError(
+            f"subworld_size must divide the number of MPI processes "
+            f"({n_hosts_world}). Got {subworld_size}."
+        )
+
+    if _SUBWORLD_SIZE is None and subworld_size == n_hosts_world:
+        return 0, 1
+    if _SUBWORLD_SIZE is None:
+        # gids must be cleared before the processes are grouped, which also
+        # invalidates any cached network
+        if _LAST_NETWORK is not None:
+            _LAST_NETWORK._clear_neuron_objects()
+            _LAST_NETWORK = None
+        _PC.subworlds(subworld_size)
+        _SUBWORLD_SIZE = subworld_size
+        # the mpi4py communicator of the group, with the same ranks
+        from mpi4py import MPI
+
+        id_world = int(_PC.id_world())
+        _GROUP_COMM = MPI.COMM_WORLD.Split(id_world // subworld_size, id_world)
+    elif subworld_size != _SUBWORLD_SIZE:
+        raise RuntimeError(
+            f"The MPI processes are already split into groups of "
+            f"{_SUBWORLD_SIZE} and cannot be regrouped. Got "
+            f"subworld_size={subworld_size}."
+        )
+
+    return int(_PC.id_world()) // subworld_size, n_hosts_world // subworld_size
+
+
+def _get_cell_costs(net):
+    """Estimate the relative cost of simulating each cell of a network.
+
+    The cost of a cell is the number of its segments, plus the number of
+    density mechanisms summed over its segments (counting the dipole
+    mechanism of cell types that measure the dipole), plus the number of
+    synapses receiving connections.
+
+    Parameters
+    ----------
+    net : Network object
+        The Network to be instantiated in NEURON.
+
+    Returns
+    -------
+    costs : array, shape (n_cells,)
+        The estimated cost of each cell, indexed by gid.
+    """
+    costs = np.zeros(net._n_cells)
+    for cell_type, cell_data in net.cell_types.items():
+        measure_dipole = cell_data["cell_metadata"].get("measure_dipole", False)
+        cost = 0
+        for section in cell_data["cell_object"].sections.values():
+            cost += section.nseg * (1 + len(section.mechs) + measure_dipole)
+        costs[list(net.gid_ranges[cell_type])] = cost
+
+    for conn in net.connectivity:
+        if conn["target_type"] not in net.cell_types:
+            continue
+        sect_loc = net.cell_types[conn["target_type"]]["cell_object"].sect_loc
+        n_syns = len(sect_loc.get(conn["loc"], [conn["loc"]]))
+        np.add.at(costs, _GidPairs(conn["gid_pairs"]).target_gids, n_syns)
+    return costs
+
+
 class NetworkBuilder(object):
     """The NetworkBuilder class.
 
@@ -298,6 +764,11 @@ class NetworkBuilder(object):
     creating new `nrniv` processes. Instead, the NERUON objects are recreated
     and gids are reassigned according to the specifications in
     `self.net._params` and the network is ready for another simulation.
+
+    When only the drive event times change (i.e., between trials), the
+    `_set_trial` routine avoids rebuilding altogether: the event vectors of
+    the artificial cells are swapped, recordings are reset and the instantiated
+    network is simulated again.
     """
 
     def __init__(self, net, trial_idx=0):
@@ -332,11 +803,14 @@ class NetworkBuilder(object):
         self._ca = dict()
         self._nrn_rec_arrays = dict()
         self._nrn_rec_callbacks = list()
+        self._nrn_imem = None
+        self._imem = None
 
-        # if extracellular electrodes have been included, we need to calculate
-        # transmembrane currents at each integration step
+        # if extracellular electrodes have been included, or membrane currents
+        # are recorded, we need to calculate transmembrane currents at each
+        # integration step
         self._expose_imem = False
-        if len(self.net.rec_arrays) > 0:
+        if len(self.net.rec_arrays) > 0 or self.net._params.get("record_imem"):
             self._expose_imem = True
 
         self._rank = 0
@@ -373,6 +847,7 @@ class NetworkBuilder(object):
             record_vsec=record_vsec,
             record_isec=record_isec,
             record_ca=record_ca,
+            record_dt=self.net._params.get("record_dt"),
         )
 
         # set to record spikes, somatic voltages, and extracellular potentials
@@ -388,10 +863,48 @@ class NetworkBuilder(object):
 
         if len(self.net.rec_arrays) > 0:
             self._record_extracellular()
+        if self.net._params.get("record_imem"):
+            self._nrn_imem = _MembraneCurrentBuilder(self.net._params["record_imem"])
+            self._nrn_imem._build(self._cells, cvode=_CVODE)
 
         if self._rank == 0 and self.net._verbose:
             print("[Done]")
 
+    def _set_trial(self, trial_idx):
+        """Prepare the instantiated network for simulating another trial.
+
+        Parameters
+        ----------
+        trial_idx : int
+            Index number of the trial to simulate next.
+        """
+        self.trial_idx = trial_idx
+
+        gid_types, gid_type_idxs, type_offsets = self.net._get_gid_type_table()
+        for drive_cell in self._drive_cells:
+            type_idx = gid_type_idxs[drive_cell.gid]
+            src_type = gid_types[type_idx]
+            gid_idx = drive_cell.gid - type_offsets[type_idx]
+            drive_cell._set_event_times(
+                self.net.external_drives[src_type]["events"][trial_idx][gid_idx]
+            )
+
+        for cell in self._cells:
+            cell._reset_voltages()
+
+        # vectors recorded with Vector.record are cleared by h.finitialize,
+        # the ones below are appended to and need to be cleared manually
+        self._spike_times.resize(0)
+        self._spike_gids.resize(0)
+        self._all_spike_times.resize(0)
+        self._all_spike_gids.resize(0)
+        for nrn_dpl in self._nrn_dipoles.values():
+            nrn_dpl.resize(0)
+        for nrn_arr in self._nrn_rec_arrays.values():
+            nrn_arr._reset_nrn_voltages()
+        if self._nrn_imem is not None:
+            self._nrn_imem._reset_currents()
+
     def _gid_assign(self, rank=None, n_hosts=None):
         """Assign cell IDs to this node
 
@@ -409,9 +922,17 @@ class NetworkBuilder(object):
         if n_hosts is None:
             n_hosts = _get_nhosts()
 
-        # round robin assignment of cell gids
-        for gid in range(self._rank, self.net._n_cells, n_hosts):
-            self._gid_list.append(gid)
+        # balance the estimated load of the cells across ranks: starting with
+        # the most expensive cell, each cell is assigned to the rank with the
+        # least load so far (ties broken by gid and rank), so that all ranks
+        # compute the same assignment
+        costs = _get_cell_costs(self.net)
+        loads = [(0.0, host) for host in range(n_hosts)]
+        for gid in np.argsort(-costs, kind="stable"):
+            load, host = heapq.heappop(loads)
+            heapq.heappush(loads, (load + costs[gid], host))
+            if host == self._rank:
+                self._gid_list.append(int(gid))
 
         for drive in self.net.external_drives.values():
             if drive["cell_specific"]:
@@ -443,7 +964,12 @@ class NetworkBuilder(object):
         self._gid_list.sort()
 
     def _create_cells_and_drives(
-        self, threshold, record_vsec=False, record_isec=False, record_ca=False
+        self,
+        threshold,
+        record_vsec=False,
+        record_isec=False,
+        record_ca=False,
+        record_dt=None,
     ):
         """Parallel create cells AND external drives
 
@@ -460,9 +986,15 @@ class NetworkBuilder(object):
         # loop through ALL gids
         # have to loop over self._gid_list, since this is what we got
         # on this rank (MPI)
+        records = [
+            _get_record_selection(record)
+            for record in (record_vsec, record_isec, record_ca)
+        ]
+        gid_types, gid_type_idxs, type_offsets = self.net._get_gid_type_table()
         for gid in self._gid_list:
-            src_type = self.net.gid_to_type(gid)
-            gid_idx = gid - self.net.gid_ranges[src_type][0]
+            type_idx = gid_type_idxs[gid]
+            src_type = gid_types[type_idx]
+            gid_idx = gid - type_offsets[type_idx]
             if src_type in self.net.cell_types:
                 # copy cell object from template cell type in Network
                 cell = self.net.cell_types[src_type]["cell_object"].copy()
@@ -473,7 +1005,7 @@ class NetworkBuilder(object):
                 # using meta data style
                 src_type_metadata = self.net.cell_types[src_type]["cell_metadata"]
                 if src_type_metadata.get("measure_dipole", False):
-                    cell.build(sec_name_apical="apical_trunk")
+                    cell.build(sec_name_apical="apical_trunk", record_dt=record_dt)
                 else:
                     cell.build()
                 # add tonic biases
@@ -482,7 +1014,10 @@ class NetworkBuilder(object):
                         cell.create_tonic_bias(
                             **self.net.external_biases[bias][src_type]
                         )
-                cell.record(record_vsec, record_isec, record_ca)
+                cell.record(
+                    *(_select_record(record, cell, src_type) for record in records),
+                    record_dt=record_dt,
+                )
 
                 # this call could belong in init of a _Cell (with threshold)?
                 nrn_netcon = cell.setup_source_netcon(threshold)
@@ -512,64 +1047,74 @@ class NetworkBuilder(object):
 
         assert len(self._cells) == len(self._gid_list) - len(self._drive_cells)
 
+        # indices of the cells on current node, as possible targets, and
+        # their positions
+        cell_idxs = np.full(net._n_cells, -1, dtype=int)
+        for idx, cell in enumerate(self._cells):
+            cell_idxs[cell.gid] = idx
+        cell_pos = np.array([cell.pos for cell in self._cells], dtype=float)
+
         for conn in connectivity:
             loc, receptor = conn["loc"], conn["receptor"]
-            nc_dict = deepcopy(conn["nc_dict"])
+            src_type, target_type = conn["src_type"], conn["target_type"]
+            nc_dict = dict(conn["nc_dict"])
             nc_dict["A_weight"] *= nc_dict["gain"]
-            # Gather indices of targets on current node
-            valid_targets = set()
-            for src_gid, target_gids in conn["gid_pairs"].items():
-                filtered_targets = list()
-                for target_gid in target_gids:
-                    if _PC.gid_exists(target_gid):
-                        filtered_targets.append(target_gid)
-                        valid_targets.add(target_gid)
-                conn["gid_pairs"][src_gid] = filtered_targets
-
-            target_filter = dict()
-            for idx in range(len(self._cells)):
-                gid = self._gid_list[idx]
-                if gid in valid_targets:
-                    target_filter[gid] = idx
+
+            # Gather src/target pairs with targets on current node, leaving
+            # the connectivity of the Network untouched
+            src_gids, target_gids = _GidPairs(conn["gid_pairs"])._get_pairs()
+            target_idxs = cell_idxs[target_gids]
+            is_local = target_idxs >= 0
+            src_gids, target_idxs = src_gids[is_local], target_idxs[is_local]
+            if len(src_gids) == 0:
+                continue
+
+            connection_name = (
+                f"{_short_name(src_type)}_{_short_name(target_type)}_{receptor}"
+            )
+            if connection_name not in self.ncs:
+                self.ncs[connection_name] = list()
+
+            # distance-dependent weights and delays of all pairs at once
+            # NB pos_dict for this drive must include ALL cell types!
+            src_pos = np.array(net.pos_dict[_long_name(src_type)], dtype=float)
+            pos_idxs = src_gids - net.gid_ranges[_long_name(src_type)][0]
+            weights, delays = _get_gaussian_connection(
+                src_pos[pos_idxs],
+                cell_pos[target_idxs],
+                nc_dict,
+                inplane_distance=net._inplane_distance,
+            )
+
+            # get synapse locations
+            sect_loc = self._cells[target_idxs[0]].sect_loc
+            # Targeting group of sections like proximal or distal
+            if loc in sect_loc:
+                syn_keys = [f"{sect}_{receptor}" for sect in sect_loc[loc]]
+            # Targeting individual section like soma or apical_tuft
+            else:
+                syn_keys = [f"{loc}_{receptor}"]
 
             # Iterate over src/target pairs and connect cells
-            for src_gid, target_gids in conn["gid_pairs"].items():
-                for target_gid in target_gids:
-                    src_type = self.net.gid_to_type(src_gid)
-                    target_type = self.net.gid_to_type(target_gid)
-                    target_cell = self._cells[target_filter[target_gid]]
-                    connection_name = (
-                        f"{_short_name(src_type)}_{_short_name(target_type)}_{receptor}"
+            for src_gid, target_idx, weight, delay in zip(
+                src_gids.tolist(), target_idxs.tolist(), weights, delays
+            ):
+                target_cell = self._cells[target_idx]
+                for syn_key in syn_keys:
+                    nc = target_cell.parconnect_from_src(
+                        src_gid,
+                        nc_dict,
+                        target_cell._nrn_synapses[syn_key],
+                        net._inplane_distance,
+                        weight=weight,
+                        delay=delay,
                     )
-                    if connection_name not in self.ncs:
-                        self.ncs[connection_name] = list()
-                    pos_idx = src_gid - net.gid_ranges[_long_name(src_type)][0]
-                    # NB pos_dict for this drive must include ALL cell types!
-                    nc_dict["pos_src"] = net.pos_dict[_long_name(src_type)][pos_idx]
-
-                    # get synapse locations
-                    syn_keys = list()
-                    # Targeting group of sections like proximal or distal
-                    if loc in target_cell.sect_loc:
-                        for sect in target_cell.sect_loc[loc]:
-                            syn_keys.append(f"{sect}_{receptor}")
-                    # Targeting individual section like soma or apical_tuft
-                    else:
-                        syn_keys = [f"{loc}_{receptor}"]
-
-                    for syn_key in syn_keys:
-                        nc = target_cell.parconnect_from_src(
-                            src_gid,
-                            deepcopy(nc_dict),
-                            target_cell._nrn_synapses[syn_key],
-                            net._inplane_distance,
-                        )
-                        self.ncs[connection_name].append(nc)
+                    self.ncs[connection_name].append(nc)
 
     def _record_extracellular(self):
         for arr_name, arr in self.net.rec_arrays.items():
             nrn_arr = _ExtracellularArrayBuilder(arr)
-            nrn_arr._build(cvode=_CVODE)
+            nrn_arr._build(cvode=_CVODE, record_dt=self.net._params.get("record_dt"))
             self._nrn_rec_arrays.update({arr_name: nrn_arr})
 
     def _record_spikes(self):
@@ -594,7 +1139,9 @@ class NetworkBuilder(object):
         -----
         Specifying ``n_samples`` ensures that certain NEURON data objects
         (e.g., h.Vector()) are congruent in shape and can thus be reduced
-        across all MPI ranks when using ``MPIBackend``.
+        across all MPI ranks when using ``MPIBackend``. The dipoles and
+        extracellular potentials are only summed on rank 0, the other ranks
+        keep the contributions of their own cells.
         """
         # ensure that the shape of this rank's nrn_dpl h.Vector() object is
         # initialized consistently across all MPI ranks regardless of whether
@@ -603,7 +1150,8 @@ class NetworkBuilder(object):
             if nrn_dpl.size() != n_samples:
                 nrn_dpl.append(h.Vector(n_samples, 0))
 
-        for cell in self._cells:
+        cell_types = self.net.gid_to_type([cell.gid for cell in self._cells])
+        for cell, cell_type in zip(self._cells, cell_types):
             # add dipoles across neurons on the current thread
             if hasattr(cell, "dipole"):
                 if cell.dipole.size() != n_samples:
@@ -613,7 +1161,6 @@ class NetworkBuilder(object):
                         f"Got n_samples={n_samples}, {cell.name}."
                         f"dipole.size()={cell.dipole.size()}."
                     )
-                cell_type = self.net.gid_to_type(cell.gid)
                 nrn_dpl = self._nrn_dipoles[cell_type]
                 nrn_dpl.add(cell.dipole)
 
@@ -621,11 +1168,19 @@ class NetworkBuilder(object):
             self._isec[cell.gid] = cell.isec
             self._ca[cell.gid] = cell.ca
 
-        # reduce across threads
-        for nrn_dpl in self._nrn_dipoles.values():
-            _PC.allreduce(nrn_dpl, 1)
-        for nrn_arr in self._nrn_rec_arrays.values():
-            _PC.allreduce(nrn_arr._nrn_voltages, 1)
+        # sum the dipoles and extracellular potentials of all ranks on rank 0,
+        # in one reduction for all vectors
+        nrn_vecs = list(self._nrn_dipoles.values()) + [
+            nrn_arr._nrn_voltages for nrn_arr in self._nrn_rec_arrays.values()
+        ]
+        if len(nrn_vecs) > 0 and _get_nhosts() > 1:
+            data = _reduce_to_root(
+                np.concatenate([nrn_vec.as_numpy() for nrn_vec in nrn_vecs])
+            )
+            if _get_rank() == 0:
+                offsets = np.cumsum([0] + [nrn_vec.size() for nrn_vec in nrn_vecs])
+                for nrn_vec, start, stop in zip(nrn_vecs, offsets[:-1], offsets[1:]):
+                    nrn_vec.as_numpy()[:] = data[start:stop]
 
         # aggregate the currents and voltages independently on each proc
         vsec_list = _PC.py_gather(self._vsec, 0)
@@ -649,6 +1204,21 @@ class NetworkBuilder(object):
             for ca in ca_list:
                 self._ca.update(ca)
 
+        # gather the membrane currents of the cells of all procs
+        self._imem = None
+        if self._nrn_imem is not None:
+            imem_list = _PC.py_gather(
+                (
+                    self._nrn_imem.gids,
+                    self._nrn_imem.sections,
+                    self._nrn_imem.geometry,
+                    self._nrn_imem._get_currents(n_samples),
+                ),
+                0,
+            )
+            if _get_rank() == 0:
+                self._imem = _combine_membrane_currents(imem_list)
+
         _PC.barrier()  # get all nodes to this place before continuing
 
     def _clear_neuron_objects(self):
@@ -689,6 +1259,8 @@ class NetworkBuilder(object):
         for nrn_arr in self._nrn_rec_arrays.values():
             if nrn_arr._recording_callback is not None:
                 _CVODE.extra_scatter_gather_remove(nrn_arr._recording_callback)
+        if self._nrn_imem is not None:
+            _CVODE.extra_scatter_gather_remove(self._nrn_imem._recording_callback)
 
     def _clear_last_network_objects(self):
         """Clears NEURON objects and saves the current Network instance"""
@@ -8,8 +8,9 @@ import sys
 import re
 import shlex
 import pickle
-import base64
+import tempfile
 import time
+from copy import copy
 from warnings import warn
 from subprocess import Popen, PIPE, TimeoutExpired
 from queue import Queue, Empty
@@ -17,9 +18,12 @@ from threading import Thread, Event
 
 from typing import Union
 
-from .cell_response import CellResponse
+import numpy as np
+
+from .cell_response import CellResponse, _TraceData
 from .dipole import Dipole
-from .network_builder import _simulate_single_trial
+from .extracellular import MembraneCurrents
+from .network_builder import _network_key, _simulate_trials
 
 _BACKEND = None
 
@@ -32,6 +36,34 @@ def _thread_handler(event, out, queue):
         queue.put(line)
 
 
+def _strip_sim_results(net):
+    """Return a shallow copy of a Network without earlier simulation results.
+
+    The recordings of earlier simulations are replaced by those of the next
+    one, so they are not sent to the processes simulating the network.
+
+    Parameters
+    ----------
+    net : instance of Network
+        The network to simulate. It is not modified.
+
+    Returns
+    -------
+    net_sim : instance of Network
+        A copy sharing all attributes of ``net``, except for its cell
+        response, membrane currents and the data of its extracellular arrays.
+    """
+    net_sim = copy(net)
+    net_sim.cell_response = None
+    net_sim.membrane_currents = None
+    net_sim.rec_arrays = dict()
+    for arr_name, arr in net.rec_arrays.items():
+        arr_sim = copy(arr)
+        arr_sim._reset()
+        net_sim.rec_arrays[arr_name] = arr_sim
+    return net_sim
+
+
 def _gather_trial_data(sim_data, net, n_trials, postproc):
     """Arrange data by trial
 
@@ -49,12 +81,9 @@ def _gather_trial_data(sim_data, net, n_trials, postproc):
 
     for idx in range(n_trials):
         # cell response
-        net.cell_response._spike_times.append(sim_data[idx]["spike_times"])
-        net.cell_response._spike_gids.append(sim_data[idx]["spike_gids"])
+        net.cell_response._spike_times.append(sim_data[idx]["spike_times"].tolist())
+        net.cell_response._spike_gids.append(sim_data[idx]["spike_gids"].tolist())
         net.cell_response.update_types(net.gid_ranges)
-        net.cell_response._vsec.append(sim_data[idx]["vsec"])
-        net.cell_response._isec.append(sim_data[idx]["isec"])
-        net.cell_response._ca.append(sim_data[idx]["ca"])
 
         # extracellular array
         for arr_name, arr in net.rec_arrays.items():
@@ -78,9 +107,64 @@ def _gather_trial_data(sim_data, net, n_trials, postproc):
                 dpl.scale(fctr)
         dpls.append(dpl)
 
+    # the traces of all trials are stacked into one array per recorded variable
+    dtype = net._params.get("record_dtype") or "float64"
+    for key in ("vsec", "isec", "ca"):
+        packed = [sim_data[idx][key] for idx in range(n_trials)]
+        traces = _TraceData._from_packed(packed, dtype=dtype)
+        setattr(net.cell_response, f"_{key}", traces)
+
+    net.membrane_currents = None
+    if sim_data[0]["imem"] is not None:
+        # the sources are the same in all trials
+        currents = [sim_data[idx]["imem"]["currents"] for idx in range(n_trials)]
+        net.membrane_currents = MembraneCurrents(
+            times=sim_data[0]["times"],
+            currents=np.stack(currents),
+            gids=sim_data[0]["imem"]["gids"],
+            geometry=sim_data[0]["imem"]["geometry"],
+            mode=net._params["record_imem"],
+            sections=sim_data[0]["imem"]["sections"],
+        )
+
     return dpls
 
 
+# above this number of network cells per MPI process, the trials are not
+# simulated in parallel groups of processes (see _get_subworld_size)
+_MAX_CELLS_PER_PROC = 1000
+
+
+def _get_subworld_size(n_procs, n_cells, n_trials):
+    """Choose the number of MPI processes simulating each trial.
+
+    The processes are split into groups (subworlds) that simulate different
+    trials concurrently, distributing the network cells over the processes of
+    each group. Since small networks scale poorly over many processes, the
+    smallest group size is chosen such that no group is left without a trial,
+    and no process holds more than ``_MAX_CELLS_PER_PROC`` cells.
+
+    Parameters
+    ----------
+    n_procs : int
+        The number of MPI processes.
+    n_cells : int
+        The number of cells in the network (excluding drive cells).
+    n_trials : int
+        The number of trials to simulate.
+
+    Returns
+    -------
+    subworld_size : int
+        The number of processes in each group. Always divides ``n_procs``.
+    """
+    min_size = int(np.ceil(n_cells / _MAX_CELLS_PER_PROC))
+    for size in range(1, n_procs + 1):
+        if n_procs % size == 0 and size >= min_size and n_procs // size <= n_trials:
+            return size
+    return n_procs
+
+
 def _get_mpi_env():
     """Set some MPI environment variables."""
     my_env = os.environ.copy()
@@ -103,8 +187,9 @@ def run_subprocess(
     command : list of str | str
         Command to run as subprocess (see subprocess.Popen documentation).
     obj : object
-        The object to write to stdin after starting child process
-        with MPI command.
+        The object to hand over to the child process after starting it
+        with MPI command. It is pickled to a temporary file whose path is
+        written to the child's stdin.
     timeout : float
         The number of seconds to wait for a process without output.
     verbose : bool, default False
@@ -123,11 +208,10 @@ def run_subprocess(
     timeout_cycles = timeout / 0.02
 
     ## Maybe leaving this print for debugging purposes
-    raw_pickle = pickle.dumps(obj)
-    pickled_obj = base64.b64encode(raw_pickle)
+    net_file, net_size = _write_net_tempfile(obj)
     if verbose:
         print(
-            f"Network size': {len(raw_pickle)} bytes ({len(raw_pickle) / 1024:.2f} KB)",
+            f"Network size': {net_size} bytes ({net_size / 1024:.2f} KB)",
             flush=True,
         )
 
@@ -169,9 +253,10 @@ def run_subprocess(
         ## loop while the process is running the simulation
         # This loop coordinates the parent-child communication protocol:
         #
-        # 1. Send the network: on the first iteration, serializes and writes the
-        #    network object to the child's stdin via _write_net(). The child's
-        #    rank 0 reads it, deserializes it, and broadcasts it to all MPI ranks.
+        # 1. Send the network: on the first iteration, writes the path and
+        #    byte count of the temp file holding the pickled network object to
+        #    the child's stdin via _write_net(). The child's rank 0 reads the
+        #    file, deserializes it, and broadcasts it to all MPI ranks.
         #
         # 2. Wait for results: after sending, polls the child's stdout
         #    (_echo_child_output) for NEURON progress output and stderr
@@ -232,7 +317,7 @@ def run_subprocess(
             if not sent_network:
                 # Send network object to child so it can start
                 try:
-                    _write_net(proc.stdin, pickled_obj)
+                    _write_net(proc.stdin, net_file, net_size)
                 except BrokenPipeError:
                     # child failed during _write_net(). get the
                     # output and break out of loop on the next
@@ -283,6 +368,9 @@ def run_subprocess(
 
     except KeyboardInterrupt:
         warn("Received KeyboardInterrupt. Stopping simulation process...")
+    finally:
+        # normally removed by the child once read
+        _remove_file(net_file)
 
     if threads_started:
         # stop the threads
@@ -567,11 +655,31 @@ def kill_proc_name(proc_name):
     return killed_procs
 
 
-def _write_net(stream, pickled_net):
+def _write_net_tempfile(obj):
+    """Pickle obj to a temp file and return file path and byte count."""
+    pickled_bytes = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    fd, tmp_path = tempfile.mkstemp(prefix="hnn_mpi_net_", suffix=".pkl")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pickled_bytes)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+    return tmp_path, len(pickled_bytes)
+
+
+def _remove_file(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _write_net(stream, net_file, net_size):
+    # Signal the child the file path @net_file:/path/to/file:SIZE@
     stream.flush()
-    stream.write("@start_of_net@")
-    stream.write(pickled_net.decode())
-    stream.write("@end_of_net:%d@\n" % len(pickled_net))
+    stream.write("@net_file:%s:%d@\n" % (net_file, net_size))
     stream.flush()
 
 
@@ -581,6 +689,138 @@ def _write_child_exit_signal(stream):
     stream.flush()
 
 
+def _write_child_shutdown_signal(stream):
+    stream.flush()
+    stream.write("@shutdown@\n")
+    stream.flush()
+
+
+class _MPIWorkerPool(object):
+    """Long-lived MPI child processes accepting successive simulation jobs.
+
+    The child processes run ``mpi_child.py --persistent``: after returning
+    the data of a job, they wait for the next network on stdin instead of
+    exiting, until :meth:`shutdown` is called.
+
+    Parameters
+    ----------
+    command : list of str
+        Command to start the persistent child processes.
+    proc_queue : threading.Queue | None
+        If not None, the process handle is put on this queue while a job is
+        running (used by MPIBackend.terminate()).
+    **kwargs : arguments
+        Additional arguments to pass to subprocess.Popen.
+
+    Attributes
+    ----------
+    proc : instance of subprocess.Popen
+        The handle of the running MPI process.
+    """
+
+    def __init__(self, command, proc_queue=None, **kwargs):
+        self.proc_queue = proc_queue
+        self.proc = Popen(command, stdin=PIPE, stdout=PIPE, stderr=PIPE, **kwargs)
+
+        self._out_q = Queue()
+        self._err_q = Queue()
+        self._event = Event()
+        self._threads = [
+            Thread(target=_thread_handler, args=(self._event, out, queue))
+            for out, queue in (
+                (self.proc.stdout, self._out_q),
+                (self.proc.stderr, self._err_q),
+            )
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    @property
+    def alive(self):
+        """Whether the child processes are still running."""
+        return self.proc.poll() is None
+
+    def submit(self, obj):
+        """Send a job to the child processes and wait for its data.
+
+        Parameters
+        ----------
+        obj : object
+            The object to write to stdin of the child processes.
+
+        Returns
+        -------
+        child_data : object
+            The data returned by the child process.
+        """
+        net_file, net_size = _write_net_tempfile(obj)
+
+        if self.proc_queue is not None:
+            self.proc_queue.put(self.proc)
+
+        data_len, data_file = 0, None
+        try:
+            try:
+                _write_net(self.proc.stdin, net_file, net_size)
+            except BrokenPipeError:
+                warn(
+                    "Received BrokenPipeError exception. "
+                    "Child process failed unexpectedly"
+                )
+
+            while data_len == 0:
+                child_terminated = not self.alive
+                _echo_child_output(self._out_q)
+                data_len, data_file = _get_data_info_from_child_err(self._err_q)
+                if data_len == 0 and child_terminated:
+                    warn("Child process failed unexpectedly")
+                    self.shutdown()
+                    raise RuntimeError(
+                        "MPI simulation failed. Return code: %d" % self.proc.returncode
+                    )
+        except KeyboardInterrupt:
+            warn("Received KeyboardInterrupt. Stopping simulation process...")
+            self.shutdown()
+            raise
+        finally:
+            _remove_file(net_file)
+            if self.proc_queue is not None:
+                try:
+                    self.proc_queue.get_nowait()
+                except Empty:
+                    pass
+
+        _write_child_exit_signal(self.proc.stdin)
+        return _process_child_data(data_file, data_len)
+
+    def shutdown(self, timeout=10):
+        """Ask the child processes to exit and wait for them to finish.
+
+        Parameters
+        ----------
+        timeout : float
+            The number of seconds to wait before killing the process.
+        """
+        if self.alive:
+            try:
+                _write_child_shutdown_signal(self.proc.stdin)
+                self.proc.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            try:
+                self.proc.wait(timeout)
+            except TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait(timeout)
+
+        self._event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        _echo_child_output(self._out_q)
+        _get_data_info_from_child_err(self._err_q)
+
+
 class JoblibBackend(object):
     """The JoblibBackend class.
 
@@ -655,10 +895,22 @@ class JoblibBackend(object):
                 f"Joblib will run {n_trials} trial(s) in parallel by "
                 f"distributing trials over {self.n_jobs} jobs."
             )
-        parallel, myfunc = self._parallel_func(_simulate_single_trial)
+        parallel, myfunc = self._parallel_func(_simulate_trials)
+        # each job builds the network once and reuses it for a contiguous
+        # block of trials. Workers keep their build alive between calls, and
+        # reuse it whenever the key of the network is unchanged. The jobs are
+        # sent the network without the results of earlier simulations
+        net_key = _network_key(net)
+        net_sim = _strip_sim_results(net)
+        n_chunks = n_trials
+        if isinstance(self.n_jobs, int) and self.n_jobs > 0:
+            n_chunks = min(self.n_jobs, n_trials)
+        trial_chunks = np.array_split(np.arange(n_trials), n_chunks)
         sim_data = parallel(
-            myfunc(net, tstop, dt, trial_idx) for trial_idx in range(n_trials)
+            myfunc(net_sim, tstop, dt, trial_idxs.tolist(), net_key=net_key)
+            for trial_idxs in trial_chunks
         )
+        sim_data = [trial_data for chunk in sim_data for trial_data in chunk]
 
         dpls = _gather_trial_data(
             sim_data, net=net, n_trials=n_trials, postproc=postproc
@@ -920,6 +1172,16 @@ class MPIBackend(object):
         that number exceeds the number of detected available cores. If this
         argument is set to 'True', then '--oversubscribe' will always be
         used. If 'False', then '--oversubscribe' will never be used.
+    persistent : bool
+        If True, the MPI processes are started by the first simulation and
+        kept alive for all following simulations, until the context of the
+        backend is exited. This avoids paying the MPI startup and import cost
+        on every call to ``simulate_dipole``. Networks with the same topology
+        are also only built once. The processes can be split into groups
+        simulating different trials in parallel only once. If a later
+        simulation is best run with groups of another size, e.g., because it
+        has fewer trials, the processes are restarted, which costs the MPI
+        startup again. Defaults to 'False'.
 
     Attributes
     ----------
@@ -938,6 +1200,8 @@ class MPIBackend(object):
         simulation is running.
     verbose : bool, default False
         If True, prints progress messages and status updates to stdout.
+    persistent : bool
+        Whether the MPI processes are kept alive between simulations.
     """
 
     def __init__(
@@ -949,11 +1213,15 @@ class MPIBackend(object):
         override_hwthreading_option: Union[None, bool] = None,
         override_oversubscribe_option: Union[None, bool] = None,
         verbose: bool = False,
+        persistent: bool = False,
     ) -> None:
         self.expected_data_length = 0
         self.proc = None
         self.proc_queue = Queue()
         self.verbose = verbose
+        self.persistent = persistent
+        self._pool = None
+        self._pool_subworld_size = None
 
         # Check of psutil and mpi4py import has been moved into this function,
         # since this function is called by GUI before MPIBackend()
@@ -1035,6 +1303,10 @@ class MPIBackend(object):
 
         _BACKEND = self._old_backend
 
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
         # always kill nrniv processes for good measure
         if self.n_procs > 1:
             kill_proc_name("nrniv")
@@ -1081,22 +1353,63 @@ class MPIBackend(object):
                 f"distribute the {net._n_cells} network neurons."
             )
 
-        print(
-            f"MPI will run {n_trials} trial(s) sequentially by "
-            f"distributing network neurons over {self.n_procs} processes."
-        )
+        subworld_size = _get_subworld_size(self.n_procs, net._n_cells, n_trials)
+        if (
+            self.persistent
+            and self._pool is not None
+            and self._pool.alive
+            and self._pool_subworld_size not in (self.n_procs, subworld_size)
+        ):
+            # the processes of a pool can only be split into groups once (see
+            # network_builder._create_subworlds), so they are restarted
+            print(
+                f"Restarting the MPI processes to regroup them from groups of "
+                f"{self._pool_subworld_size} into groups of {subworld_size}."
+            )
+            self._pool.shutdown()
+            self._pool = None
+        if subworld_size == self.n_procs:
+            print(
+                f"MPI will run {n_trials} trial(s) sequentially by "
+                f"distributing network neurons over {self.n_procs} processes."
+            )
+        else:
+            print(
+                f"MPI will run {n_trials} trial(s) in parallel over "
+                f"{self.n_procs // subworld_size} groups, distributing network "
+                f"neurons over {subworld_size} process(es) in each group."
+            )
 
         env = _get_mpi_env()
-        self.proc, sim_data = run_subprocess(
-            command=self.mpi_cmd,
-            obj=[net, tstop, dt, n_trials],
-            timeout=10,
-            proc_queue=self.proc_queue,
-            verbose=self.verbose,
-            env=env,
-            cwd=os.getcwd(),
-            universal_newlines=True,
-        )
+        # the processes are only split into groups if there are several
+        job_subworld_size = None if subworld_size == self.n_procs else subworld_size
+        net_sim = _strip_sim_results(net)
+        if self.persistent:
+            if self._pool is None or not self._pool.alive:
+                self._pool = _MPIWorkerPool(
+                    self.mpi_cmd + ["--persistent"],
+                    proc_queue=self.proc_queue,
+                    env=env,
+                    cwd=os.getcwd(),
+                    universal_newlines=True,
+                )
+            self.proc = self._pool.proc
+            sim_data = self._pool.submit(
+                [net_sim, tstop, dt, n_trials, _network_key(net), job_subworld_size]
+            )
+            # processes that are not split yet can still be split later
+            self._pool_subworld_size = subworld_size
+        else:
+            self.proc, sim_data = run_subprocess(
+                command=self.mpi_cmd,
+                obj=[net_sim, tstop, dt, n_trials, None, job_subworld_size],
+                timeout=10,
+                proc_queue=self.proc_queue,
+                verbose=self.verbose,
+                env=env,
+                cwd=os.getcwd(),
+                universal_newlines=True,
+            )
 
         dpls = _gather_trial_data(sim_data, net, n_trials, postproc)
         return dpls
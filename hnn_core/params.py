@@ -373,6 +373,14 @@ class Params(dict):
     def copy(self):
         return deepcopy(self)
 
+    def __deepcopy__(self, memo):
+        # bypass the pattern matching of __setitem__ when filling the copy
+        params = Params.__new__(Params)
+        memo[id(self)] = params
+        for key, value in self.items():
+            dict.__setitem__(params, key, deepcopy(value, memo))
+        return params
+
     def write(self, fname):
         """Write param values to a file.
 
@@ -5,7 +5,7 @@ import numpy as np
 import matplotlib
 
 from hnn_core import pyramidal
-from hnn_core.cell import _ArtificialCell, Cell, Section
+from hnn_core.cell import _ArtificialCell, Cell, Section, _get_gaussian_connection
 from hnn_core.network_builder import load_custom_mechanisms
 
 matplotlib.use("agg")
@@ -151,6 +151,50 @@ def test_cell():
         assert sec_dist_test == sec_dist[sec_name]
 
 
+def test_gaussian_connection():
+    """Test distance-dependent connection weights and delays."""
+    nc_dict = {"A_weight": 2.0, "A_delay": 1.0, "lamtha": 3.0}
+    weight, delay = _get_gaussian_connection((0, 0, 0), (0, 0, 5), nc_dict)
+    assert weight == 2.0 and delay == 1.0
+
+    rng = np.random.default_rng(0)
+    src_pos = rng.uniform(0, 10, size=(20, 3))
+    target_pos = rng.uniform(0, 10, size=(20, 3))
+    weights, delays = _get_gaussian_connection(
+        src_pos, target_pos, nc_dict, inplane_distance=2.0
+    )
+    assert weights.shape == delays.shape == (20,)
+    for src, target, weight, delay in zip(src_pos, target_pos, weights, delays):
+        assert (weight, delay) == _get_gaussian_connection(
+            tuple(src), tuple(target), nc_dict, inplane_distance=2.0
+        )
+
+
+def test_parconnect_from_src():
+    """Test connecting a cell with computed or precomputed weight and delay."""
+    from hnn_core.network_builder import _create_parallel_context
+
+    load_custom_mechanisms()
+    _create_parallel_context(n_cores=1)
+    cell = pyramidal(cell_name="L5_pyramidal")
+    cell.build()
+    nc_dict = {
+        "A_weight": 2.0,
+        "A_delay": 1.0,
+        "lamtha": 3.0,
+        "threshold": 0.5,
+        "pos_src": (1.0, 2.0, 0.0),
+    }
+    postsyn = cell._nrn_synapses["soma_gabaa"]
+    nc = cell.parconnect_from_src(1000, nc_dict, postsyn, 1.0)
+    weight, delay = _get_gaussian_connection(
+        nc_dict["pos_src"], cell.pos, nc_dict, inplane_distance=1.0
+    )
+    assert (nc.weight[0], nc.delay, nc.threshold) == (weight, delay, 0.5)
+    nc = cell.parconnect_from_src(1000, nc_dict, postsyn, 1.0, weight=0.3, delay=2.5)
+    assert (nc.weight[0], nc.delay, nc.threshold) == (0.3, 2.5, 0.5)
+
+
 def test_artificial_cell():
     """Test artificial cell object."""
     load_custom_mechanisms()
@@ -164,6 +208,9 @@ def test_artificial_cell():
     # the h.Netcon() instance should reference the h.VecStim() instance
     assert artificial_cell.nrn_netcon.pre() == artificial_cell.nrn_vecstim
     assert artificial_cell.nrn_netcon.threshold == threshold
+    # event times can be swapped in place for a new simulation
+    artificial_cell._set_event_times([4, 5])
+    assert artificial_cell.nrn_eventvec.to_python() == [4, 5]
 
     # GID is assigned exactly once for each cell, either at initialisation...
     cell = _ArtificialCell(event_times, threshold, gid=42)
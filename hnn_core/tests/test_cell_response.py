@@ -7,6 +7,7 @@ import pytest
 import numpy as np
 
 from hnn_core import CellResponse, read_spikes
+from hnn_core.cell_response import _TraceData
 
 
 def test_cell_response(tmp_path):
@@ -204,3 +205,55 @@ def test_cell_response(tmp_path):
         }
         cell_response = read_spikes(tmp_path / "spk_*.txt", gid_ranges=gid_ranges)
     plt.close("all")
+
+
+def test_trace_data():
+    """Test columnar storage of recorded traces."""
+    trials = [
+        {0: {"soma": [1.0, 2.0], "dend": [3.0, 4.0]}, 1: {}},
+        {0: {"soma": [5.0, 6.0], "dend": [7.0, 8.0]}, 1: {}},
+    ]
+    traces = _TraceData._from_trials(trials, n_times=2)
+    assert len(traces) == 2
+    assert traces.data.shape == (2, 2, 2)
+    assert traces.index == {0: {"soma": 0, "dend": 1}, 1: {}}
+
+    # trials are served as nested dict views of the array
+    vsec = traces._get_trials()
+    assert vsec == trials
+    assert list(vsec[1][0]) == ["soma", "dend"]
+    assert vsec[1][0]["dend"].base is traces.data
+    np.testing.assert_array_equal(vsec[1][0]["dend"], [7.0, 8.0])
+    assert vsec[0] != trials[1]
+    assert vsec[0] != {0: trials[0][0]}
+    assert traces._to_trials() == trials
+    assert isinstance(traces._to_trials()[0][0]["soma"], list)
+    with pytest.raises(TypeError):
+        vsec[0][0]["soma"] = [0.0, 0.0]
+    # the traces are read-only views
+    with pytest.raises(ValueError, match="read-only"):
+        vsec[0][0]["soma"][0] = 0.0
+    assert traces.data[0, 0, 0] == 1.0
+    trace = np.array(vsec[0][0]["soma"])
+    trace[0] = 0.0
+    assert traces.data[0, 0, 0] == 1.0
+    assert traces.data.flags.writeable
+
+    # the samples can be stored in single precision
+    traces_32 = _TraceData._from_trials(trials, n_times=2, dtype="float32")
+    assert traces_32.data.dtype == np.float32
+    assert traces_32._get_trials() == trials
+    assert _TraceData(dtype="float32").data.dtype == np.float32
+    with pytest.raises(ValueError, match="Invalid value for the 'dtype'"):
+        _TraceData(dtype="int64")
+
+    # packed trials are stacked in the order of the first trial
+    index_0 = {3: {"soma": 0, "dend": 1}}
+    index_1 = {3: {"dend": 0, "soma": 1}}
+    data = np.array([[1.0, 2.0], [3.0, 4.0]])
+    traces = _TraceData._from_packed([(index_0, data), (index_1, data)])
+    np.testing.assert_array_equal(traces.data[1], data[::-1])
+    assert traces == _TraceData._from_trials(traces._to_trials(), n_times=2)
+    assert traces != _TraceData()
+    with pytest.raises(ValueError, match="must record the same traces"):
+        _TraceData._from_packed([(index_0, data), ({3: {"soma": 0}}, data[:1])])
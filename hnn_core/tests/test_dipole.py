@@ -12,6 +12,8 @@ import pytest
 import hnn_core
 from hnn_core import read_params, read_dipole, average_dipoles
 from hnn_core import Network, neymotin_2020_model
+from hnn_core import network_builder, read_streamed_response
+from hnn_core.network_models import add_erp_drives_to_jones_model
 from hnn_core.viz import plot_dipole
 from hnn_core.dipole import Dipole, simulate_dipole, _rmse
 from hnn_core.parallel_backends import requires_mpi4py, requires_psutil
@@ -232,6 +234,155 @@ def test_dipole_simulation():
     plt.close("all")
 
 
+def test_record_dir(tmp_path, monkeypatch):
+    """Test writing recorded traces to disk during the simulation."""
+    # write the recorded traces to disk several times per trial
+    monkeypatch.setattr(network_builder, "_STREAM_INTERVAL", 10.0)
+    net = neymotin_2020_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    kwargs = dict(tstop=25.0, dt=0.5, n_trials=2, record_vsec="all")
+    kwargs.update(record_isec="soma", record_ca="soma", verbose=False)
+    simulate_dipole(net, **kwargs)
+    cell_response = net.cell_response
+
+    record_dir = tmp_path / "recording"
+    simulate_dipole(net, record_dir=record_dir, **kwargs)
+    assert net.cell_response.spike_times == cell_response.spike_times
+    assert net.cell_response.vsec[0] == dict()
+    assert len(list(record_dir.glob("trial_0_rank_0_chunk_*.npz"))) == 3
+
+    streamed_response = read_streamed_response(record_dir)
+    assert streamed_response == cell_response
+    assert_allclose(streamed_response.times, cell_response.times)
+    gid = net.gid_ranges["L5_pyramidal"][0]
+    assert streamed_response.vsec[1][gid]["apical_tuft"].shape == (51,)
+
+    with pytest.raises(ValueError, match="record_dir must be an empty"):
+        simulate_dipole(net, record_dir=record_dir, **kwargs)
+    with pytest.raises(TypeError, match="record_dir must be an instance of"):
+        simulate_dipole(net, record_dir=1, **kwargs)
+    with pytest.raises(ValueError, match="No recordings found"):
+        read_streamed_response(tmp_path)
+
+
+def test_record_spec():
+    """Test recording from a selection of cells and sections."""
+    net = neymotin_2020_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    kwargs = dict(tstop=25.0, dt=0.5, n_trials=1, verbose=False)
+    simulate_dipole(net, record_vsec="all", record_isec="all", **kwargs)
+    cell_response = net.cell_response
+
+    gids = list(net.gid_ranges["L5_pyramidal"][:2])
+    record_vsec = dict(cell_types="L5_pyramidal", gids=gids, sections="apical_tuft")
+    record_isec = dict(gids=gids[0], sections=["soma", "apical_tuft"])
+    record_ca = dict(cell_types=["L2_basket", "L5_pyramidal"], sections="soma")
+    simulate_dipole(
+        net,
+        record_vsec=record_vsec,
+        record_isec=record_isec,
+        record_ca=record_ca,
+        **kwargs,
+    )
+    vsec, isec = net.cell_response.vsec[0], net.cell_response.isec[0]
+    assert {gid for gid in vsec if vsec[gid]} == set(gids)
+    for gid in gids:
+        assert list(vsec[gid]) == ["apical_tuft"]
+        assert_allclose(
+            vsec[gid]["apical_tuft"], cell_response.vsec[0][gid]["apical_tuft"]
+        )
+    assert {gid for gid in isec if isec[gid]} == {gids[0]}
+    assert isec[gids[0]] == {
+        sec_name: cell_response.isec[0][gids[0]][sec_name]
+        for sec_name in ("soma", "apical_tuft")
+    }
+    # only pyramidal cells have calcium
+    ca = net.cell_response.ca[0]
+    assert {gid for gid in ca if ca[gid]} == set(net.gid_ranges["L5_pyramidal"])
+    assert net._params["record_vsec"] == dict(
+        cell_types=["L5_pyramidal"], gids=gids, sections=["apical_tuft"]
+    )
+
+    # sections missing from some cell types are skipped
+    simulate_dipole(net, record_vsec=dict(sections="apical_tuft"), **kwargs)
+    vsec = net.cell_response.vsec[0]
+    assert {gid for gid in vsec if vsec[gid]} == set(
+        net.gid_ranges["L2_pyramidal"]
+    ) | set(net.gid_ranges["L5_pyramidal"])
+
+    with pytest.raises(ValueError, match="'key of record_vsec' parameter"):
+        simulate_dipole(net, record_vsec=dict(cells="L5_pyramidal"), **kwargs)
+    with pytest.raises(ValueError, match="'cell type of record_isec' param"):
+        simulate_dipole(net, record_isec=dict(cell_types="L5_pyr"), **kwargs)
+    with pytest.raises(ValueError, match="must be gids of cells"):
+        drive_gid = net.gid_ranges["evprox1"][0]
+        simulate_dipole(net, record_vsec=dict(gids=drive_gid), **kwargs)
+    with pytest.raises(TypeError, match="must be int or a list of int"):
+        simulate_dipole(net, record_vsec=dict(gids=[0.5]), **kwargs)
+    with pytest.raises(ValueError, match="'section of record_ca' parameter"):
+        record_ca = dict(cell_types="L2_basket", sections="apical_tuft")
+        simulate_dipole(net, record_ca=record_ca, **kwargs)
+
+
+def test_record_dt():
+    """Test recording at a coarser interval than the integration time step."""
+    net = neymotin_2020_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    net.add_electrode_array("arr", [(2, 2, 400), (6, 6, 800)])
+    kwargs = dict(tstop=25.0, dt=0.025, n_trials=1, record_vsec="all")
+    kwargs.update(record_isec="soma", record_ca="soma", verbose=False)
+    dpl = simulate_dipole(net, **kwargs)[0]
+    cell_response = net.cell_response
+    voltages = net.rec_arrays["arr"].voltages
+
+    dpl_decim = simulate_dipole(net, record_dt=0.5, **kwargs)[0]
+    # samples are recorded every 20 time steps, up to but excluding tstop
+    times = net.cell_response.times
+    assert len(times) == 50
+    assert_allclose(times, np.arange(0, 25.0, 0.5), atol=1e-10)
+    assert_allclose(dpl_decim.times, times)
+    assert_allclose(net.rec_arrays["arr"].times, times)
+    for key in dpl.data:
+        assert_allclose(dpl_decim.data[key], dpl.data[key][:-1:20])
+    assert_allclose(net.rec_arrays["arr"].voltages, voltages[..., :-1:20])
+    for key in ("vsec", "isec", "ca"):
+        data = getattr(cell_response, f"_{key}").data[..., :-1:20]
+        assert_allclose(getattr(net.cell_response, f"_{key}").data, data)
+    assert net.cell_response.spike_times == cell_response.spike_times
+
+    # recording at dt is the same as not decimating
+    simulate_dipole(net, record_dt=0.025, **kwargs)
+    assert net.cell_response == cell_response
+    with pytest.raises(ValueError, match="record_dt must be a multiple of dt"):
+        simulate_dipole(net, record_dt=0.03, **kwargs)
+    with pytest.raises(ValueError, match="record_dt must be a multiple of dt"):
+        simulate_dipole(net, record_dt=0.01, **kwargs)
+    with pytest.raises(TypeError, match="record_dt must be an instance of"):
+        simulate_dipole(net, record_dt="0.5", **kwargs)
+
+
+def test_record_dtype():
+    """Test storing the recorded traces in single precision."""
+    net = neymotin_2020_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    kwargs = dict(tstop=10.0, n_trials=2, record_vsec="all", record_isec="soma")
+    kwargs.update(record_ca="soma", verbose=False)
+    dpl = simulate_dipole(net, **kwargs)[0]
+    cell_response = net.cell_response
+    assert cell_response._vsec.data.dtype == np.float64
+
+    dpl_single = simulate_dipole(net, record_dtype="float32", **kwargs)[0]
+    for key in ("vsec", "isec", "ca"):
+        traces = getattr(net.cell_response, f"_{key}")
+        assert traces.data.dtype == np.float32
+        assert_allclose(traces.data, getattr(cell_response, f"_{key}").data, rtol=1e-6)
+    assert net.cell_response.vsec[1][0]["soma"].dtype == np.float32
+    # only the recorded traces are stored in single precision
+    assert_allclose(dpl_single.data["agg"], dpl.data["agg"], rtol=0, atol=0)
+    with pytest.raises(ValueError, match="Invalid value for the 'record_dtype'"):
+        simulate_dipole(net, record_dtype="float16", **kwargs)
+
+
 @requires_mpi4py
 @requires_psutil
 @pytest.mark.uses_mpi
@@ -3,6 +3,7 @@
 
 import pytest
 import os.path as op
+import pickle
 
 import numpy as np
 
@@ -10,6 +11,8 @@ import hnn_core
 from hnn_core import Network, read_params
 from hnn_core.drives import (
     _drive_cell_event_times,
+    _drive_event_times,
+    _DriveEvents,
     _get_prng,
     _create_extpois,
     _create_bursty_input,
@@ -707,6 +710,105 @@ def test_drive_random_state():
     )
 
 
+def test_drive_event_times():
+    """Test that batched event times match those of single drive cells."""
+    tstop = 500.0
+    all_dynamics = {
+        "poisson": dict(
+            tstart=10.0,
+            tstop=400.0,
+            rate_constant={"L2_basket": 200.0, "L5_pyramidal": 40.0},
+        ),
+        "evoked": dict(mu=100.0, sigma=20.0, numspikes=3),
+        "bursty": dict(
+            tstart=20.0,
+            tstart_std=5.0,
+            tstop=400.0,
+            burst_rate=10.0,
+            burst_std=3.0,
+            numspikes=2,
+            spike_isi=10.0,
+        ),
+        "spike_train": dict(times=[5.0, 2.0, 7.0, 3.0], gids=[1, 0, 1, 3]),
+    }
+    target_types = [["L2_basket"], ["L5_pyramidal", "L2_basket"], ["L2_pyramidal"]]
+    drive_cell_gids = [0, 1, 3]
+    for drive_type, dynamics in all_dynamics.items():
+        events = _drive_event_times(
+            drive_type,
+            dynamics,
+            tstop,
+            target_types=target_types,
+            trial_idxs=range(3),
+            drive_cell_gids=drive_cell_gids,
+            event_seed=4,
+            trial_seed_offset=10,
+        )
+        assert len(events) == 3
+        for trial_idx, trial_events in enumerate(events):
+            cell_events = [
+                _drive_cell_event_times(
+                    drive_type,
+                    dynamics,
+                    tstop,
+                    target_type=target_type,
+                    trial_idx=trial_idx,
+                    drive_cell_gid=gid,
+                    event_seed=4,
+                    trial_seed_offset=10,
+                )
+                for gid, cell_target_types in zip(drive_cell_gids, target_types)
+                for target_type in cell_target_types
+            ]
+            assert trial_events == cell_events
+    assert events[0] == [[2.0], [5.0, 7.0], [5.0, 7.0], [3.0]]
+    assert events[0] is not events[1]
+
+    # batched poisson draws match drawing one interval at a time
+    lamtha, t0, T = 80.0, 5.0, 2000.0
+    prng = np.random.RandomState(12)
+    expected = list()
+    t_gen = t0
+    while t_gen < T:
+        t_gen += prng.exponential(1.0 / lamtha) * 1000.0
+        if t_gen < T:
+            expected.append(t_gen)
+    prng = np.random.RandomState(12)
+    event_times = _create_extpois(t0=t0, T=T, lamtha=lamtha, prng=prng)
+    np.testing.assert_array_equal(event_times, expected)
+    event_times = _create_extpois(t0=t0, T=t0, lamtha=lamtha, prng=prng)
+    assert len(event_times) == 0
+
+
+def test_drive_events_lazy():
+    """Test that event times are created on demand for each trial."""
+    dynamics = dict(mu=100.0, sigma=20.0, numspikes=3)
+    target_types = [["any"]] * 4
+    kwargs = dict(tstop=500.0, event_seed=2, trial_seed_offset=10)
+    events = _DriveEvents(
+        "evoked", dynamics, target_types=target_types, n_trials=3, **kwargs
+    )
+    expected = _drive_event_times(
+        "evoked", dynamics, target_types=target_types, trial_idxs=range(3), **kwargs
+    )
+    assert len(events) == 3
+    assert events[2] == expected[2]
+    assert events[-1] is events[2]  # the last trial accessed is kept
+    assert events[0:2] == expected[0:2]
+    assert list(events) == expected
+    assert events == expected
+    assert events != expected[:2]
+    with pytest.raises(IndexError, match="Trial index out of range"):
+        events[3]
+
+    # the stored dynamics are a copy and the cache is not pickled
+    dynamics["mu"] = 10.0
+    assert events == expected
+    events_unpickled = pickle.loads(pickle.dumps(events))
+    assert events_unpickled._trial_events is None
+    assert events_unpickled == events
+
+
 @pytest.mark.parametrize(
     "rate_constant,cell_specific,n_drive_cells",
     [
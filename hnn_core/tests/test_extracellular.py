@@ -3,14 +3,23 @@
 
 from copy import deepcopy
 import os.path as op
+import pickle
 import numpy as np
 from numpy.testing import assert_allclose, assert_array_equal
 import pytest
 
 import hnn_core
-from hnn_core import read_params, neymotin_2020_model, simulate_dipole
+from hnn_core import (
+    read_network_configuration,
+    read_params,
+    neymotin_2020_model,
+    simulate_dipole,
+    write_network_configuration,
+)
+from hnn_core.network_models import add_erp_drives_to_jones_model
 from hnn_core.extracellular import (
     ExtracellularArray,
+    MembraneCurrents,
     calculate_csd2d,
     _get_laminar_z_coords,
 )
@@ -152,7 +161,11 @@ def test_transmembrane_currents():
 def test_transfer_resistance():
     """Test transfer resistances calculated correctly"""
     from neuron import h
-    from hnn_core.extracellular import _transfer_resistance
+    from hnn_core.extracellular import (
+        _transfer_resistance,
+        _transfer_resistance_matrix,
+        _get_segment_geometry,
+    )
 
     sec = h.Section(name="dend")
     h.pt3dclear(sec=sec)
@@ -201,6 +214,66 @@ def test_transfer_resistance():
         res = _transfer_resistance(sec, elec_pos, conductivity, method)
         assert_allclose(res, target_vals[method], rtol=1e-12, atol=0.0)
 
+    # all sections and contacts at once, with the electrode behind, on top of
+    # and ahead of the segments. The target values were calculated one
+    # section and contact at a time with the scalar implementation
+    sec2 = h.Section(name="dend2")
+    h.pt3dclear(sec=sec2)
+    h.pt3dadd(10, 0, 50, 1, sec=sec2)
+    h.pt3dadd(40, 20, 90, 1, sec=sec2)
+    sec2.nseg = 3
+    positions = [elec_pos, (0, -200, 0), (0, 400, 5), (20, 10, 70)]
+    # one list of segment values per section and contact
+    target_vals = {
+        "psa": [
+            [
+                [2.20284977, 4.36081858, 26.5258238, 4.36081858, 2.20284977],
+                [1.68618667, 1.68694425, 1.66611009],
+            ],
+            [
+                [1.15329669, 0.914683581, 0.757880681, 0.646971313, 0.564379231],
+                [1.25349944, 1.1907446, 1.12989569],
+            ],
+            [
+                [0.716848707, 0.855560459, 1.06082081, 1.39561283, 2.03894045],
+                [0.662651093, 0.669558027, 0.675271002],
+            ],
+            [
+                [3.5134312, 2.45231328, 1.68100578, 1.24629192, 0.98243792],
+                [16.8703902, 53.0516477, 12.5431667],
+            ],
+        ],
+        "lsa": [
+            [
+                [2.24966688, 7.02886903, 11.0160856, 7.02886903, 2.24966688],
+                [1.68528337, 1.68333191, 1.6653008],
+            ],
+            [
+                [1.15990189, 0.928079279, 0.765437717, 0.651649554, 0.56514726],
+                [1.25352277, 1.19106512, 1.13001278],
+            ],
+            [
+                [0.718425096, 0.866483175, 1.08190031, 1.44489884, 2.07619067],
+                [0.662606094, 0.669358951, 0.675217037],
+            ],
+            [
+                [3.44284743, 2.5139944, 1.7368397, 1.27426482, 0.986059824],
+                [18.7831547, 31.9036319, 13.3261877],
+            ],
+        ],
+    }
+    for method in ["psa", "lsa"]:
+        res = _transfer_resistance_matrix(
+            *_get_segment_geometry([sec, sec2]),
+            positions,
+            conductivity,
+            method,
+            min_distance=0.5,
+        )
+        assert res.shape == (len(positions), sec.nseg + sec2.nseg)
+        target_res = [np.concatenate(vals) for vals in target_vals[method]]
+        assert_allclose(res, target_res, rtol=1e-8, atol=0.0)
+
 
 @requires_mpi4py
 @requires_psutil
@@ -302,6 +375,8 @@ def test_rec_array_calculation():
 
     # using the same electrode positions, but a different method: LSA
     net.add_electrode_array("arr2", electrode_pos, method="lsa")
+    # a single contact, whose voltages must not alias the Neuron buffer
+    net.add_electrode_array("arr3", electrode_pos[1:2])
 
     # make sure no sinister segfaults are triggered when running mult. trials
     n_trials = 5  # NB 5 trials!
@@ -319,6 +394,198 @@ def test_rec_array_calculation():
             rtol=1e-3,
             atol=1e-3,
         )
+        assert_allclose(
+            net.rec_arrays["arr3"]._data[trial_idx][0],
+            net.rec_arrays["arr1"]._data[trial_idx][1],
+        )
+
+
+def test_transfer_resistance_cache(tmp_path, monkeypatch):
+    """Test caching of transfer resistances in memory and on disk."""
+    from hnn_core import extracellular
+
+    monkeypatch.setattr(extracellular, "_TRANSFER_CACHE", dict())
+    net = neymotin_2020_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    electrode_pos = [(2, 2, 400), (6, 6, 800)]
+    net.add_electrode_array("arr", electrode_pos, method="lsa", cache_dir=tmp_path)
+    simulate_dipole(net, tstop=5, n_trials=1)
+    voltages = net.rec_arrays["arr"].voltages
+    assert len(extracellular._TRANSFER_CACHE) == 1
+    assert len(list(tmp_path.glob("transfer_resistance_*.npy"))) == 1
+
+    # rebuilding the network reads the matrix from memory, then from disk
+    def _fail(*args, **kwargs):
+        raise RuntimeError("transfer resistances recomputed")
+
+    monkeypatch.setattr(extracellular, "_transfer_resistance_matrix", _fail)
+    net.set_global_synaptic_gains(e_e=2.0)
+    simulate_dipole(net, tstop=5, n_trials=1)
+    monkeypatch.setattr(extracellular, "_TRANSFER_CACHE", dict())
+    net.set_global_synaptic_gains(e_e=1.0)
+    simulate_dipole(net, tstop=5, n_trials=1)
+    assert_array_equal(net.rec_arrays["arr"].voltages, voltages)
+    assert len(extracellular._TRANSFER_CACHE) == 1
+
+    # the cache directory is kept by trial selections and copies of the
+    # array, but not written to network files
+    arr = net.rec_arrays["arr"]
+    for arr_copy in (arr[0], arr.copy(), net.copy().rec_arrays["arr"]):
+        assert arr_copy._cache_dir == str(tmp_path)
+    assert arr[0] == arr
+    assert "cache_dir" not in arr.to_dict()
+    fname = tmp_path / "net.json"
+    write_network_configuration(net, fname)
+    arr_read = read_network_configuration(fname).rec_arrays["arr"]
+    assert arr_read._cache_dir is None
+    assert arr_read == net.copy().rec_arrays["arr"]  # without the data
+
+    # a different geometry is recomputed
+    net.add_electrode_array("arr2", electrode_pos[:1], method="lsa")
+    with pytest.raises(RuntimeError, match="transfer resistances recomputed"):
+        simulate_dipole(net, tstop=5, n_trials=1)
+
+
+def test_membrane_currents():
+    """Test computing potentials from recorded membrane currents."""
+    net = neymotin_2020_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    electrode_pos = [(2, 2, 400), (6, 6, 800), (45, 0, -200)]
+    net.add_electrode_array("psa", electrode_pos, method="psa")
+    net.add_electrode_array("lsa", electrode_pos, method="lsa")
+    with pytest.raises(ValueError, match="Invalid value for the 'record_imem'"):
+        simulate_dipole(net, tstop=5, record_imem="cell")
+    assert net.membrane_currents is None
+
+    simulate_dipole(net, tstop=10, n_trials=2, record_imem="segment")
+    imem = net.membrane_currents
+    assert isinstance(imem, MembraneCurrents)
+    assert len(imem) == 2
+    n_trials, n_sources, n_times = imem.currents.shape
+    assert n_sources == imem.gids.size
+    assert np.all(np.diff(imem.gids) >= 0)
+    assert_array_equal(imem.times, net.rec_arrays["psa"].times)
+    assert "2 trials" in repr(imem)
+    for method in ("psa", "lsa"):
+        array = imem.compute_potentials(electrode_pos, method=method)
+        assert_allclose(
+            array.voltages, net.rec_arrays[method].voltages, rtol=1e-9, atol=1e-12
+        )
+    with pytest.raises(ValueError, match="Invalid value for the 'method'"):
+        imem.compute_potentials(electrode_pos, method="foo")
+    assert net.copy().membrane_currents is None
+
+    # sections are single sources, also with a coarser recording interval
+    simulate_dipole(net, tstop=10, n_trials=1, record_imem="section", record_dt=0.1)
+    imem_sec = net.membrane_currents
+    assert imem_sec.mode == "section"
+    assert imem_sec.currents.shape[1] < n_sources
+    assert_array_equal(imem_sec.times, net.rec_arrays["psa"].times)
+    array = imem_sec.compute_potentials(electrode_pos[:1])
+    assert array.voltages.shape == (1, 1, imem_sec.times.size)
+
+    # the recorded currents are compared by value
+    assert net == deepcopy(net)
+    assert net == pickle.loads(pickle.dumps(net))
+    assert imem_sec != imem
+    imem_copy = deepcopy(imem_sec)
+    imem_copy.currents[0, 0, -1] += 1.0
+    assert imem_copy != imem_sec
+
+
+def test_compression():
+    """Test compressing segment currents into summary sources of sections."""
+    with pytest.raises(ValueError, match="Invalid value for the 'compression'"):
+        ExtracellularArray([(0, 0, 0)], compression="segment")
+
+    net = neymotin_2020_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    # contacts inside the column and away from the cells
+    electrode_pos = [(45, 45, 400), (45, 45, 1200), (1500, 0, 400), (1500, 0, 1200)]
+    for compression in ("section", "multipole"):
+        for method in ("psa", "lsa"):
+            net.add_electrode_array(
+                f"{compression}_{method}",
+                electrode_pos,
+                method=method,
+                compression=compression,
+            )
+    simulate_dipole(net, tstop=10, n_trials=1, record_imem="segment")
+    imem = net.membrane_currents
+    for compression in ("section", "multipole"):
+        for method in ("psa", "lsa"):
+            array = imem.compute_potentials(
+                electrode_pos, method=method, compression=compression
+            )
+            assert array.compression == compression
+            assert_allclose(
+                array.voltages,
+                net.rec_arrays[f"{compression}_{method}"].voltages,
+                rtol=1e-9,
+                atol=1e-12,
+            )
+
+    report = imem.compression_error(electrode_pos[2:], "multipole")
+    assert report["relative_error"].shape == report["max_error"].shape == (2,)
+    assert np.all(report["relative_error"] < 0.05)
+    assert report["n_sources"] < report["n_segments"] / 2
+    # sections close to the contacts keep their segments
+    report_near = imem.compression_error(electrode_pos, "multipole")
+    assert report["n_sources"] < report_near["n_sources"] < report["n_segments"]
+    assert np.all(report_near["relative_error"] < 0.2)
+    report_sec = imem.compression_error(electrode_pos[2:], "section")
+    assert report_sec["n_sources"] < report["n_sources"]
+    assert np.all(report_sec["relative_error"] > report["relative_error"])
+
+    simulate_dipole(net, tstop=5, n_trials=1, record_imem="section")
+    with pytest.raises(ValueError, match="record_imem='segment'"):
+        net.membrane_currents.compression_error(electrode_pos, "section")
+
+
+def test_calculate_csd2d():
+    """Test the CSD of several trials at once."""
+    rng = np.random.default_rng(0)
+    lfp_data = rng.standard_normal((3, 6, 50))
+    csd = calculate_csd2d(lfp_data, delta=100)
+    assert csd.shape == lfp_data.shape
+    for trial_lfp, trial_csd in zip(lfp_data, csd):
+        assert_array_equal(calculate_csd2d(trial_lfp, delta=100), trial_csd)
+    csd = calculate_csd2d(lfp_data, delta=100, dtype="float32")
+    assert csd.dtype == np.float32
+    assert_allclose(csd, calculate_csd2d(lfp_data, delta=100), rtol=1e-5, atol=1e-9)
+
+    # Vaknin et al. (1988) duplicate the border channels
+    padded = np.concatenate((lfp_data[:, :1], lfp_data, lfp_data[:, -1:]), axis=1)
+    assert_allclose(
+        calculate_csd2d(lfp_data, delta=100, vaknin=True),
+        -np.diff(padded, n=2, axis=1) / 100**2,
+    )
+
+    # the spline passes through the CSD at the channels
+    csd = calculate_csd2d(lfp_data, delta=100)
+    csd_spline = calculate_csd2d(lfp_data, delta=100, interpolation="spline")
+    assert csd_spline.shape == (3, 51, 50)
+    assert_allclose(csd_spline[:, ::10], csd, atol=1e-12)
+    csd_spline = calculate_csd2d(
+        lfp_data[0], delta=100, interpolation="spline", n_depths=11
+    )
+    assert csd_spline.shape == (11, 50)
+
+    with pytest.raises(ValueError, match="at least 2 dimensions"):
+        calculate_csd2d(lfp_data[0, 0])
+    with pytest.raises(ValueError, match="At least 4 channels"):
+        calculate_csd2d(lfp_data[:, :3])
+    with pytest.raises(ValueError, match="Invalid value for the 'interpolation'"):
+        calculate_csd2d(lfp_data, interpolation="linear")
+
+    # all trials of an electrode array
+    electrode_pos = [(0, 0, z) for z in range(0, 600, 100)]
+    times = np.arange(50) * 0.025
+    array = ExtracellularArray(electrode_pos, times=times, voltages=lfp_data)
+    assert_array_equal(array.compute_csd(), calculate_csd2d(lfp_data, delta=100))
+    csd = array.compute_csd(vaknin=True, interpolation="spline", dtype="float32")
+    assert csd.shape == (3, 51, 50)
+    assert csd.dtype == np.float32
 
 
 def test_extracellular_viz():
@@ -196,6 +196,7 @@ def test_rec_array_to_dict(jones_2009_network):
                 "conductivity",
                 "method",
                 "min_distance",
+                "compression",
                 "times",
                 "voltages",
             ]
@@ -7,7 +7,7 @@ import pytest
 
 import hnn_core
 from hnn_core import read_params, Network, neymotin_2020_model
-from hnn_core.mpi_child import MPISimulation, _str_to_net
+from hnn_core.mpi_child import MPISimulation, _file_to_net, _str_to_net
 from hnn_core.parallel_backends import (
     _gather_trial_data,
     _process_child_data,
@@ -15,6 +15,8 @@ from hnn_core.parallel_backends import (
     _get_data_info_from_child_err,
     _extract_data,
     _extract_data_length,
+    _write_net,
+    _write_net_tempfile,
     requires_mpi4py,
 )
 
@@ -25,6 +27,13 @@ import os
 from unittest.mock import patch
 
 
+class _FakeComm(object):
+    """Stand-in for the MPI communicator of a single rank."""
+
+    def bcast(self, obj, root=0):
+        return obj
+
+
 def test_get_data_from_child_err():
     """Test _get_data_from_child_err for handling stderr"""
     # write data to queue
@@ -103,6 +112,17 @@ def test_str_to_net():
     received_net = _str_to_net(input_str)
     assert isinstance(received_net, Network)
 
+    # the child reads the inline net split over many lines
+    data_str = pickled_net.decode()
+    lines = [data_str[idx : idx + 1000] for idx in range(0, len(data_str), 1000)]
+    lines = ["@start_of_net@"] + lines + ["@end_of_net:%d@\n" % len(pickled_net)]
+    with MPISimulation(skip_mpi_import=True) as mpi_sim:
+        mpi_sim.comm = _FakeComm()
+        with patch("sys.stdin", io.StringIO("\n".join(lines))):
+            received_net = mpi_sim._read_net()
+        del mpi_sim.comm
+    assert isinstance(received_net, Network)
+
     # muck with the data size in the signal
     input_str = (
         "@start_of_net@"
@@ -119,6 +139,49 @@ def test_str_to_net():
         _str_to_net(input_str)
 
 
+def test_file_to_net():
+    """Test reading the network from the temp file written by the parent"""
+
+    hnn_core_root = op.dirname(hnn_core.__file__)
+
+    # prepare network
+    params_fname = op.join(hnn_core_root, "param", "default.json")
+    params = read_params(params_fname)
+    net = neymotin_2020_model(params, add_drives_from_params=True)
+
+    net_file, net_size = _write_net_tempfile([net, 170.0])
+    with io.StringIO() as buf:
+        _write_net(buf, net_file, net_size)
+        assert buf.getvalue() == "@net_file:%s:%d@\n" % (net_file, net_size)
+
+    # the child reads the network and removes the temp file
+    with MPISimulation(skip_mpi_import=True) as mpi_sim:
+        mpi_sim.comm = _FakeComm()
+        with patch("sys.stdin", io.StringIO(f"@net_file:{net_file}:{net_size}@\n")):
+            received_net, tstop = mpi_sim._read_net()
+        del mpi_sim.comm
+    assert isinstance(received_net, Network)
+    assert tstop == 170.0
+    assert not op.exists(net_file)
+
+    # muck with the data size in the signal
+    net_file, net_size = _write_net_tempfile(net)
+    expected_string = "Got incorrect network size: %d bytes " % net_size + (
+        "expected length: %d" % (net_size + 1)
+    )
+    with pytest.raises(ValueError, match=expected_string):
+        _file_to_net(net_file, net_size + 1)
+    assert not op.exists(net_file)
+
+    # a shutdown signal, or closing stdin, returns no network
+    with MPISimulation(skip_mpi_import=True) as mpi_sim:
+        mpi_sim.comm = _FakeComm()
+        for stdin in ("@shutdown@\n", ""):
+            with patch("sys.stdin", io.StringIO(stdin)):
+                assert mpi_sim._read_net() is None
+        del mpi_sim.comm
+
+
 def test_child_run():
     """Test running the child process without MPI"""
 
@@ -1,12 +1,14 @@
 # Authors: Mainak Jas <mainakjas@gmail.com>
 
 from contextlib import redirect_stdout
+from copy import deepcopy
 import io
 import os.path as op
+import pickle
 import tempfile
 
 import numpy as np
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_array_equal
 import pytest
 import matplotlib.pyplot as plt
 
@@ -21,14 +23,23 @@ from hnn_core import (
     read_params,
     simulate_dipole,
 )
+from hnn_core.cell_response import _unpack_traces
 from hnn_core.cells_default import pyramidal
+from hnn_core.check import _gid_to_type
 from hnn_core.network import (
     _check_global_synaptic_gains_uniformity,
     _create_cell_coords,
     _get_cell_index_by_synapse_type,
+    _GidPairs,
     pick_connection,
 )
-from hnn_core.network_builder import NetworkBuilder
+from hnn_core import network_builder
+from hnn_core.network_builder import (
+    NetworkBuilder,
+    _network_key,
+    _simulate_single_trial,
+    _simulate_trials,
+)
 from hnn_core.network_models import add_erp_drives_to_jones_model
 from hnn_core.viz import plot_dipole
 
@@ -338,6 +349,64 @@ def test_network_models():
         assert np.all(np.diff(k_gbar, n=2) > 0)  # positive 2nd derivative
 
 
+def test_network_builder_reuse():
+    """Test that reusing a built network across trials matches rebuilding."""
+    net = jones_2009_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    net.add_electrode_array("shank", [(2, 400, 1000), (6, 800, 1000)])
+    net._params.update(record_vsec="soma", record_isec="soma", record_ca="soma")
+    tstop, dt, n_trials = 30.0, 0.5, 2
+    net._instantiate_drives(tstop=tstop, n_trials=n_trials)
+
+    fresh = [
+        _simulate_single_trial(net, tstop, dt, trial_idx)
+        for trial_idx in range(n_trials)
+    ]
+    reused = _simulate_trials(net, tstop, dt, range(n_trials))
+    assert len(reused) == n_trials
+    for fresh_data, reused_data in zip(fresh, reused):
+        assert_allclose(fresh_data["dpl_data"], reused_data["dpl_data"])
+        assert_array_equal(fresh_data["spike_times"], reused_data["spike_times"])
+        assert_array_equal(fresh_data["spike_gids"], reused_data["spike_gids"])
+        for key in ("vsec", "isec", "ca"):
+            # (index, data) of the traces packed into one array
+            assert fresh_data[key][0] == reused_data[key][0]
+            assert_array_equal(fresh_data[key][1], reused_data[key][1])
+        vsec = _unpack_traces(*fresh_data["vsec"])
+        isec = _unpack_traces(*fresh_data["isec"])
+        n_times = len(fresh_data["times"])
+        cell_gids = [
+            gid for cell_type in net.cell_types for gid in net.gid_ranges[cell_type]
+        ]
+        assert sorted(vsec) == cell_gids
+        assert all(list(cell_vsec) == ["soma"] for cell_vsec in vsec.values())
+        assert len(vsec[0]["soma"]) == n_times
+        assert isinstance(vsec[0]["soma"], list)
+        assert all(len(trace) == n_times for trace in isec[0]["soma"].values())
+        assert_allclose(
+            fresh_data["rec_data"]["shank"],
+            reused_data["rec_data"]["shank"],
+            atol=1e-12,
+        )
+    # trials differ only by their drive event times
+    assert not np.array_equal(reused[0]["spike_times"], reused[1]["spike_times"])
+
+    # the build is kept between calls passing the same network key
+    net_key = _network_key(net)
+    _simulate_trials(net, tstop, dt, [0], net_key=net_key)
+    neuron_net = network_builder._CACHED_NETWORK
+    cached = _simulate_trials(net, tstop, dt, [1], net_key=net_key)
+    assert network_builder._CACHED_NETWORK is neuron_net
+    assert_array_equal(cached[0]["spike_times"], fresh[1]["spike_times"])
+    assert_allclose(cached[0]["dpl_data"], fresh[1]["dpl_data"])
+
+    # drive events do not enter the key, but connectivity does
+    net_copy = net.copy()
+    assert _network_key(net_copy) == net_key
+    net_copy.connectivity[0]["nc_dict"]["A_weight"] *= 2
+    assert _network_key(net_copy) != net_key
+
+
 def test_network_cell_positions():
     """ "Test manipulation of cell positions in the network object"""
 
@@ -1031,6 +1100,15 @@ def test_network_connectivity(base_network):
     )
     assert n_connections_new == np.round(n_connections * 0.5).astype(int)
     assert net.connectivity[-1]["probability"] == 0.5
+    # retained pairs are a subset of the original ones, reproducible by seed
+    all_gid_pairs = net.connectivity[-2]["gid_pairs"]
+    for src_gid, target_gids in net.connectivity[-1]["gid_pairs"].items():
+        assert len(target_gids) > 0
+        assert set(target_gids).issubset(all_gid_pairs[src_gid])
+    kwargs["conn_seed"] = 42
+    net.add_connection(**kwargs)
+    net.add_connection(**kwargs)
+    assert net.connectivity[-1]["gid_pairs"] == net.connectivity[-2]["gid_pairs"]
     with pytest.raises(ValueError, match="probability must be"):
         kwargs = kwargs_default.copy()
         kwargs["probability"] = -1.0
@@ -1056,6 +1134,125 @@ def test_network_connectivity(base_network):
         simulate_dipole(net, tstop=10)
 
 
+def test_gid_pairs():
+    """Test the array-backed storage of connected gid pairs."""
+    gid_pairs_dict = {5: [0, 1, 2], 3: [], 7: [2]}
+    gid_pairs = _GidPairs(gid_pairs_dict)
+    assert gid_pairs == gid_pairs_dict and gid_pairs_dict == gid_pairs
+    assert gid_pairs != {5: [0, 1], 3: [], 7: [2]}
+    assert list(gid_pairs.keys()) == [5, 3, 7]
+    assert list(gid_pairs.items()) == list(gid_pairs_dict.items())
+    assert list(gid_pairs.values()) == list(gid_pairs_dict.values())
+    assert gid_pairs[5] == [0, 1, 2] and gid_pairs[np.int64(7)] == [2]
+    assert 3 in gid_pairs and 4 not in gid_pairs and len(gid_pairs) == 3
+    with pytest.raises(KeyError):
+        gid_pairs[4]
+    src_gids, target_gids = gid_pairs._get_pairs()
+    assert_array_equal(src_gids, [5, 5, 5, 7])
+    assert_array_equal(target_gids, [0, 1, 2, 2])
+
+    for gid_pairs_copy in (
+        _GidPairs(gid_pairs),
+        pickle.loads(pickle.dumps(gid_pairs)),
+        deepcopy(gid_pairs),
+    ):
+        assert gid_pairs_copy == gid_pairs
+        assert gid_pairs_copy[5] == [0, 1, 2]
+    # same pairs in another order
+    assert gid_pairs == _GidPairs({3: [], 7: [2], 5: [0, 1, 2]})
+
+
+    # modified like a dict of lists, without changing copies
+    gid_pairs_copy = deepcopy(gid_pairs)
+    assert gid_pairs_copy.target_gids is gid_pairs.target_gids
+    gid_pairs_copy[4] = [1]
+    gid_pairs_copy[5].append(3)
+    gid_pairs_copy[7][0] = 1
+    gid_pairs_copy[3] += [0]
+    for src_gid, target_gids in gid_pairs_copy.items():
+        target_gids.sort(reverse=True)
+    del gid_pairs_copy[np.int64(4)]
+    assert gid_pairs_copy == {5: [3, 2, 1, 0], 3: [0], 7: [1]}
+    assert gid_pairs == gid_pairs_dict
+    assert not gid_pairs.target_gids.flags.writeable
+    # lists taken before another change are not written back
+    target_gids = gid_pairs_copy[5]
+    gid_pairs_copy[5] = [2]
+    target_gids.append(4)
+    assert gid_pairs_copy[5] == [2]
+
+    net = jones_2009_model(mesh_shape=(3, 3))
+    for conn in net.connectivity:
+        assert isinstance(conn["gid_pairs"], _GidPairs)
+    assert net.copy() == net
+    src_gid = next(iter(net.connectivity[0]["gid_pairs"]))
+    net_copy = net.copy()
+    net_copy.connectivity[0]["gid_pairs"][src_gid].append(0)
+    assert net_copy.connectivity[0]["gid_pairs"] != net.connectivity[0]["gid_pairs"]
+
+
+def test_network_copy():
+    """Test that copies share only the parts never modified in place."""
+    net = jones_2009_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    assert net.copy() == net
+    net._instantiate_drives(tstop=10.0, n_trials=2)
+    net_copy = net.copy()
+    assert len(net.external_drives["evprox1"]["events"]) == 2
+    assert len(net_copy.external_drives["evprox1"]["events"]) == 0
+    assert pick_connection(net_copy, src_gids="evprox1") == pick_connection(
+        net, src_gids="evprox1"
+    )
+
+    # the arrays of gid pairs and position tuples are shared
+    conn, conn_copy = net.connectivity[0], net_copy.connectivity[0]
+    assert conn_copy["gid_pairs"].target_gids is conn["gid_pairs"].target_gids
+    assert net_copy.pos_dict["L2_basket"] is not net.pos_dict["L2_basket"]
+    assert net_copy.pos_dict["L2_basket"][0] is net.pos_dict["L2_basket"][0]
+
+    # everything else is copied
+    conn_copy["nc_dict"]["A_weight"] *= 2
+    assert conn_copy["nc_dict"]["A_weight"] != conn["nc_dict"]["A_weight"]
+    cell, cell_copy = (
+        this_net.cell_types["L2_basket"]["cell_object"] for this_net in (net, net_copy)
+    )
+    cell_copy.synapses["gabaa"]["tau1"] *= 2
+    assert cell_copy.synapses["gabaa"]["tau1"] != cell.synapses["gabaa"]["tau1"]
+    net_copy._params["threshold"] = 1.0
+    assert net._params["threshold"] != 1.0
+    assert type(net_copy._params) is type(net._params)
+    net_copy.pos_dict["L2_basket"][0] = (0.0, 0.0, 0.0)
+    assert net.pos_dict["L2_basket"][0] != (0.0, 0.0, 0.0)
+
+    # modifying a copy the way the set_params function of an optimization
+    # does leaves the original unchanged
+    net = jones_2009_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    net_orig = deepcopy(net)
+    net_copy = net.copy()
+    net_copy.set_global_synaptic_gains(e_e=2.0, i_i=0.5)
+    for conn in net_copy.connectivity:
+        conn["nc_dict"]["A_delay"] += 1.0
+    cell_copy = net_copy.cell_types["L5_pyramidal"]["cell_object"]
+    cell_copy.synapses["ampa"]["e"] = -10.0
+    cell_copy.sections["soma"].mechs["hh2"]["gkbar_hh2"] *= 2
+    cell_copy.sections["apical_trunk"]._diam /= 2
+    net_copy.external_drives["evprox1"]["dynamics"]["mu"] = 5.0
+    net_copy.external_drives["evprox1"]["weights_ampa"]["L2_basket"] = 1.0
+    net_copy.add_evoked_drive(
+        "evprox3",
+        mu=10.0,
+        sigma=1.0,
+        numspikes=1,
+        location="proximal",
+        weights_ampa={"L2_basket": 0.1},
+    )
+    net_copy.pos_dict["L2_basket"][0] = (0.0, 0.0, 0.0)
+    net_copy.threshold = 1.0
+    assert net_copy != net
+    assert net == net_orig
+
+
 def test_add_cell_type():
     """Test adding a new cell type."""
     params = read_params(params_fname)
@@ -1093,6 +1290,34 @@ def test_add_cell_type():
     assert nc.syn().tau1 == tau1
 
 
+def test_gid_to_type():
+    """Test the vectorized and cached lookup of gid types."""
+    net = jones_2009_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    gids = list(range(-2, net._n_gids + 2))
+    expected = [_gid_to_type(gid, net.gid_ranges) for gid in gids]
+    assert [net.gid_to_type(gid) for gid in gids] == expected
+    gid_types = net.gid_to_type(gids)
+    assert isinstance(gid_types, np.ndarray)
+    assert list(gid_types) == expected
+    assert net.gid_to_type(np.array([[0], [1]])).shape == (2, 1)
+    assert net.gid_to_type(np.int64(0)) == "L2_basket"
+
+    # the lookup table follows changes of gid_ranges
+    n_gids = net._n_gids
+    net.add_evoked_drive(
+        "evdist2",
+        mu=1.0,
+        sigma=1.0,
+        numspikes=1,
+        location="distal",
+        weights_ampa={"L2_pyramidal": 1.0},
+    )
+    assert net.gid_to_type(n_gids) == "evdist2"
+    net._rename_cell_types({"L2_basket": "L2_interneuron"})
+    assert net.gid_to_type(0) == "L2_interneuron"
+
+
 def test_tonic_biases():
     """Test tonic biases."""
     hnn_core_root = op.dirname(hnn_core.__file__)
@@ -1556,6 +1781,56 @@ class TestPickConnection:
         indices = pick_connection(net, src_gids=src_gids, target_gids=target_gids)
         assert len(indices) == expected
 
+    def test_connectivity_index(self, base_network):
+        """Tests that the connectivity index follows changes of a Network."""
+        net, _ = base_network
+        net = net.copy()
+
+        def _brute_force_pick(net, src_gid, loc):
+            return [
+                conn_idx
+                for conn_idx, conn in enumerate(net.connectivity)
+                if src_gid in conn["src_gids"] and conn["loc"] == loc
+            ]
+
+        def _assert_picks_match(net):
+            for src_gid in range(0, net._n_gids, 7):
+                for loc in ("proximal", "distal", "soma"):
+                    assert pick_connection(
+                        net, src_gids=src_gid, loc=loc
+                    ) == _brute_force_pick(net, src_gid, loc)
+
+        _assert_picks_match(net)
+        net.add_connection(
+            "L2_basket",
+            "L5_pyramidal",
+            "soma",
+            "gabaa",
+            weight=1.0,
+            delay=1.0,
+            lamtha=3,
+        )
+        # the AMPA/NMDA connections of a drive share their src gids
+        net.add_evoked_drive(
+            "evdist2",
+            mu=1.0,
+            sigma=1.0,
+            numspikes=1,
+            location="distal",
+            weights_ampa={"L2_pyramidal": 1.0},
+            weights_nmda={"L2_pyramidal": 1.0},
+            probability=0.5,
+            cell_specific=False,
+            n_drive_cells=4,
+        )
+        _assert_picks_match(net)
+        del net.connectivity[0]
+        _assert_picks_match(net)
+        net.clear_drives()
+        _assert_picks_match(net)
+        net.clear_connectivity()
+        assert pick_connection(net, loc="soma") == list()
+
 
 def test_rename_cell_types(base_network):
     """Tests renaming cell function"""
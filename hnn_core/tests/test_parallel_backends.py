@@ -1,7 +1,11 @@
 import os.path as op
+from copy import deepcopy
 from os import environ
 import io
 import itertools
+import pickle
+import subprocess
+import sys
 from contextlib import redirect_stdout
 from threading import Thread, Event
 from time import sleep
@@ -14,14 +18,25 @@ from numpy.testing import assert_array_equal, assert_allclose, assert_raises
 import pytest
 
 import hnn_core
-from hnn_core import MPIBackend, neymotin_2020_model, read_params
+from hnn_core import (
+    JoblibBackend,
+    MPIBackend,
+    jones_2009_model,
+    neymotin_2020_model,
+    read_params,
+)
 from hnn_core.dipole import simulate_dipole
 from hnn_core.parallel_backends import (
     requires_mpi4py,
     requires_psutil,
+    _MAX_CELLS_PER_PROC,
     _determine_cores_hwthreading,
+    _get_mpi_env,
+    _strip_sim_results,
+    _get_subworld_size,
 )
-from hnn_core.network_builder import NetworkBuilder
+from hnn_core.network_builder import NetworkBuilder, _get_cell_costs
+from hnn_core.network_models import add_erp_drives_to_jones_model
 
 
 def _terminate_mpibackend(event, backend):
@@ -85,6 +100,73 @@ def test_gid_assignment():
     assert all_gids == all_gids_instantiated
 
 
+def test_gid_assignment_load_balance():
+    """Test that the estimated cell load is balanced across ranks"""
+    net = jones_2009_model(mesh_shape=(5, 5))
+    costs = _get_cell_costs(net)
+    assert costs.shape == (net._n_cells,)
+    assert np.all(costs > 0)
+    # pyramidal cells have more segments and synapses than basket cells
+    assert (
+        costs[net.gid_ranges["L5_pyramidal"][0]]
+        > costs[net.gid_ranges["L2_basket"][0]]
+    )
+
+    n_hosts = 4
+    loads = list()
+    for rank in range(n_hosts):
+        net_builder = NetworkBuilder(net)
+        net_builder._gid_list = list()
+        net_builder._gid_assign(rank=rank, n_hosts=n_hosts)
+        cell_gids = [gid for gid in net_builder._gid_list if gid < net._n_cells]
+        loads.append(costs[cell_gids].sum())
+    # greedy assignment is within the cost of one cell from the optimum
+    assert max(loads) - min(loads) <= costs.max()
+    assert sum(loads) == costs.sum()
+
+
+def test_subworld_size():
+    """Test choosing the number of MPI processes simulating each trial"""
+    # trials run in parallel as long as no group of processes is left idle
+    assert _get_subworld_size(n_procs=4, n_cells=100, n_trials=4) == 1
+    assert _get_subworld_size(n_procs=4, n_cells=100, n_trials=8) == 1
+    assert _get_subworld_size(n_procs=4, n_cells=100, n_trials=3) == 2
+    assert _get_subworld_size(n_procs=6, n_cells=100, n_trials=4) == 2
+    assert _get_subworld_size(n_procs=4, n_cells=100, n_trials=1) == 4
+    # larger networks are distributed over more processes per trial
+    n_cells = 3 * _MAX_CELLS_PER_PROC
+    assert _get_subworld_size(n_procs=8, n_cells=n_cells, n_trials=8) == 4
+    assert _get_subworld_size(n_procs=2, n_cells=n_cells, n_trials=8) == 2
+
+
+
+def test_strip_sim_results():
+    """Test that earlier results are not sent to the simulating processes"""
+    net = jones_2009_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    net.add_electrode_array("arr", [(2, 2, 400)])
+    kwargs = dict(tstop=10.0, n_trials=2, record_vsec="all", record_imem="segment")
+    dpls = simulate_dipole(net, **kwargs)
+    net_orig = deepcopy(net)
+
+    net_sim = _strip_sim_results(net)
+    assert net_sim.cell_response is None and net_sim.membrane_currents is None
+    assert len(net_sim.rec_arrays["arr"]) == 0
+    assert net_sim.connectivity is net.connectivity
+    assert len(pickle.dumps(net_sim)) < len(pickle.dumps(net)) / 10
+    assert net == net_orig
+
+    # the results of the next simulation are the same
+    dpls_sim = simulate_dipole(net_sim, **kwargs)
+    for dpl, dpl_sim in zip(dpls, dpls_sim):
+        assert_array_equal(dpl.data["agg"], dpl_sim.data["agg"])
+    assert net_sim.cell_response == net.cell_response
+    assert net_sim.membrane_currents == net.membrane_currents
+    assert_array_equal(
+        net_sim.rec_arrays["arr"].voltages, net.rec_arrays["arr"].voltages
+    )
+
+
 # The purpose of this incremental mark is to avoid running the full length
 # simulation when there are failures in previous (faster) tests. When a test
 # in the sequence fails, all subsequent tests will be marked "xfailed" rather
@@ -423,6 +505,92 @@ class TestParallelBackends:
         }
 
 
+@requires_mpi4py
+@requires_psutil
+@pytest.mark.uses_mpi
+def test_mpibackend_persistent():
+    """Test reusing the MPI processes of a backend across simulations"""
+    net = jones_2009_model(mesh_shape=(3, 3))
+    add_erp_drives_to_jones_model(net)
+    tstop, n_trials = 20.0, 2
+
+    with JoblibBackend(n_jobs=1):
+        dpls_joblib = simulate_dipole(net, tstop=tstop, n_trials=n_trials)
+
+    with MPIBackend(n_procs=2, persistent=True) as backend:
+        dpls_first = simulate_dipole(net, tstop=tstop, n_trials=n_trials)
+        proc = backend.proc
+        assert proc.poll() is None  # still running after the simulation
+        dpls_second = simulate_dipole(net, tstop=tstop, n_trials=n_trials)
+        assert backend.proc is proc
+        assert backend._pool_subworld_size == 1
+
+        # the processes are restarted to regroup them for a single trial
+        with io.StringIO() as buf, redirect_stdout(buf):
+            dpls_single = simulate_dipole(net, tstop=tstop, n_trials=1)
+            stdout = buf.getvalue()
+        assert "Restarting the MPI processes" in stdout
+        assert proc.returncode == 0
+        proc = backend.proc
+        assert backend._pool_subworld_size == 2
+        # processes that were not split yet are split without a restart
+        dpls_third = simulate_dipole(net, tstop=tstop, n_trials=n_trials)
+        assert backend.proc is proc
+        assert backend._pool_subworld_size == 1
+    # shut down cleanly when exiting the context
+    assert proc.returncode == 0
+    assert backend._pool is None
+
+    assert len(dpls_single) == 1
+    for dpls in (dpls_first, dpls_second, dpls_single, dpls_third):
+        for dpl, dpl_joblib in zip(dpls, dpls_joblib):
+            assert_allclose(
+                dpl.data["agg"], dpl_joblib.data["agg"], rtol=0, atol=1e-14
+            )
+
+
+@requires_mpi4py
+@requires_psutil
+@pytest.mark.uses_mpi
+@pytest.mark.parametrize("n_procs, subworld_size", [(2, None), (3, None), (4, 2)])
+def test_reduce_to_root(tmp_path, n_procs, subworld_size):
+    """Test that arrays are only summed over MPI ranks on rank 0."""
+    script = tmp_path / "reduce_to_root.py"
+    script.write_text(
+        "import numpy as np\n"
+        "from neuron import h\n"
+        "from numpy.testing import assert_allclose, assert_array_equal\n"
+        "from hnn_core import network_builder\n"
+        "network_builder._create_parallel_context()\n"
+        f"if {subworld_size} is not None:\n"
+        f"    network_builder._create_subworlds({subworld_size})\n"
+        "rank = network_builder._get_rank()\n"
+        "rank_world = int(network_builder._PC.id_world())\n"
+        "partial_sum = np.random.default_rng(rank_world).random(100)\n"
+        "data = network_builder._reduce_to_root(partial_sum.copy())\n"
+        "expected = h.Vector(partial_sum)\n"
+        "network_builder._PC.allreduce(expected, 1)\n"
+        "if rank == 0:\n"
+        "    assert_allclose(data, expected.as_numpy(), rtol=1e-14)\n"
+        "else:\n"
+        "    assert_array_equal(data, partial_sum)\n"
+        "print(f'rank {rank_world} passed')\n"
+        "network_builder._PC.done()\n"
+    )
+    mpi_cmd = ["mpiexec", "--oversubscribe", "-np", str(n_procs)]
+    mpi_cmd += ["nrniv", "-python", "-mpi", "-nobanner", sys.executable, str(script)]
+    proc = subprocess.run(
+        mpi_cmd,
+        env=_get_mpi_env(),
+        capture_output=True,
+        universal_newlines=True,
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    for rank in range(n_procs):
+        assert f"rank {rank} passed" in proc.stdout
+
+
 # there are no dependencies if this unit tests fails; no need to be in
 # class marked incremental
 @requires_mpi4py